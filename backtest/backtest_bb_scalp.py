@@ -20,11 +20,13 @@ import math
 from pathlib import Path
 
 import pandas as pd
-import numpy as np
 
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
 
+from modules.module_indicators import calc_bb_series
+from backtest.engine import BarStrategy, ExitPolicy, new_position, run_strategy
+
 # === 전략 상수 ===
 TIMEFRAME = "15m"
 LEVERAGE = 3
@@ -49,155 +51,41 @@ def calc_buy_unit(total_balance: float) -> int:
     return max(math.floor(base_amount), MIN_BUY_UNIT)
 
 
-def calc_bb_series(close: pd.Series, period: int = 20, std: float = 2.0):
-    """볼린저 밴드 계산 (중앙선, 상단, 하단)"""
-    mid = close.rolling(window=period).mean()
-    sigma = close.rolling(window=period).std()
-    upper = mid + std * sigma
-    lower = mid - std * sigma
-    return mid, upper, lower
+class BBScalpStrategy(BarStrategy):
+    indicator_params = ("BB_PERIOD", "BB_STD")
 
+    def buy_unit(self, balance: float) -> int:
+        return calc_buy_unit(balance)
 
-def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> tuple:
-    df = df.copy()
-    df.columns = [c.lower() for c in df.columns]
-    if "timestamp" not in df.columns and df.index.name != "timestamp":
-        df = df.reset_index()
-
-    close = df["close"].astype(float)
-    high_s = df["high"].astype(float)
-    low_s = df["low"].astype(float)
-
-    bb_mid, bb_upper, bb_lower = calc_bb_series(close, BB_PERIOD, BB_STD)
-
-    balance = initial_balance
-    position = None
-    trades = []
-    equity = [initial_balance]
-
-    min_bars = BB_PERIOD + 1
-
-    for i in range(min_bars, len(df)):
-        row = df.iloc[i]
-        ts = row.get("timestamp", df.index[i])
-        o, h, l, c = float(row["open"]), float(row["high"]), float(row["low"]), float(row["close"])
-
-        buy_unit = calc_buy_unit(balance)
-
-        # ===== 포지션 관리 =====
-        if position is not None:
-            side = position["side"]
-            entry_price = position["entry_price"]
-            size = position["size"]
-            tp_price = position["tp_price"]
-            sl_price = position["sl_price"]
-
-            if side == "long":
-                # TP 체크 (고가가 TP 이상)
-                if h >= tp_price:
-                    pnl = size * (tp_price - entry_price)
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "TAKE_PROFIT",
-                        "entry_price": entry_price, "exit_price": tp_price,
-                        "pnl": pnl, "balance_after": balance
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-                # SL 체크 (저가가 SL 이하)
-                elif l <= sl_price:
-                    pnl = size * (sl_price - entry_price)
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                        "entry_price": entry_price, "exit_price": sl_price,
-                        "pnl": pnl, "balance_after": balance
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-            else:  # short
-                # TP 체크 (저가가 TP 이하)
-                if l <= tp_price:
-                    pnl = size * (entry_price - tp_price)
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "TAKE_PROFIT",
-                        "entry_price": entry_price, "exit_price": tp_price,
-                        "pnl": pnl, "balance_after": balance
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-                # SL 체크 (고가가 SL 이상)
-                elif h >= sl_price:
-                    pnl = size * (entry_price - sl_price)
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                        "entry_price": entry_price, "exit_price": sl_price,
-                        "pnl": pnl, "balance_after": balance
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-
-            equity.append(balance)
-            continue
-
-        # ===== 진입 판단 =====
-        if balance < buy_unit:
-            equity.append(balance)
-            continue
-
-        prev_close = float(df.iloc[i - 1]["close"])
-        lower = bb_lower.iloc[i]
-        upper = bb_upper.iloc[i]
+    def prepare(self, df: pd.DataFrame):
+        self.warmup = BB_PERIOD + 1
+        close = df["close"].astype(float).to_numpy()
+        _, bb_upper, bb_lower = calc_bb_series(close, BB_PERIOD, BB_STD)
+        self.close, self.bb_upper, self.bb_lower = close.tolist(), bb_upper.tolist(), bb_lower.tolist()
+
+    def entry(self, i, o, h, l, c, buy_unit):
+        prev_close = self.close[i - 1]
+        size = buy_unit * LEVERAGE / c
 
         # 볼린저 밴드 하단 이탈 → 롱 (과매도 평균 회귀)
-        should_long = prev_close < lower
+        if prev_close < self.bb_lower[i]:
+            return new_position("long", c, size, c * (1 - SL_PCT), tp_price=c * (1 + TP_PCT))
         # 볼린저 밴드 상단 이탈 → 숏 (과매수 평균 회귀)
-        should_short = prev_close > upper
-
-        if should_long:
-            size = buy_unit * LEVERAGE / c
-            position = {
-                "side": "long",
-                "entry_price": c,
-                "size": size,
-                "tp_price": c * (1 + TP_PCT),
-                "sl_price": c * (1 - SL_PCT),
-            }
-        elif should_short:
-            size = buy_unit * LEVERAGE / c
-            position = {
-                "side": "short",
-                "entry_price": c,
-                "size": size,
-                "tp_price": c * (1 - TP_PCT),
-                "sl_price": c * (1 + SL_PCT),
-            }
-
-        equity.append(balance)
-
-    # 마지막 포지션 청산
-    if position is not None:
-        last = df.iloc[-1]
-        c = float(last["close"])
-        ts = last.get("timestamp", df.index[-1])
-        side = position["side"]
-        entry_price = position["entry_price"]
-        size = position["size"]
-        pnl = size * (c - entry_price) if side == "long" else size * (entry_price - c)
-        balance += pnl
-        trades.append({
-            "timestamp": ts, "side": side, "exit_reason": "END_OF_DATA",
-            "entry_price": entry_price, "exit_price": c,
-            "pnl": pnl, "balance_after": balance
-        })
-
-    return trades, pd.Series(equity), balance
+        if prev_close > self.bb_upper[i]:
+            return new_position("short", c, size, c * (1 + SL_PCT), tp_price=c * (1 - TP_PCT))
+        return None
+
+
+def build_backtest() -> tuple:
+    """현재 모듈 상수로 (전략, 청산 정책) 생성 - run_backtest / sweep 공용"""
+    # 고정 TP/SL, 같은 봉에서 둘 다 닿으면 TP 우선
+    policy = ExitPolicy(stop_first=False)
+    return BBScalpStrategy(), policy
+
+
+def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> tuple:
+    strategy, policy = build_backtest()
+    return run_strategy(strategy, policy, df, initial_balance)
 
 
 def fetch_ohlcv(symbol: str = SYMBOL, timeframe: str = TIMEFRAME, limit: int = 1000) -> pd.DataFrame:
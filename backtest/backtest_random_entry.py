@@ -10,11 +10,13 @@ import random
 from pathlib import Path
 
 import pandas as pd
-import numpy as np
 
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
 
+from modules.module_indicators import calc_atr_series
+from backtest.engine import BarStrategy, ExitPolicy, atr_or_fallback, new_position, run_strategy
+
 # === 청산 파라미터 (v3와 동일) ===
 TIMEFRAME = "15m"
 LEVERAGE = 3
@@ -41,195 +43,46 @@ def calc_buy_unit(total_balance: float) -> int:
     return max(math.floor(base_amount), MIN_BUY_UNIT)
 
 
-def calc_atr_series(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-    prev_close = close.shift(1)
-    tr1 = high - low
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.ewm(span=period, adjust=False).mean()
-    return atr
-
-
-def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE, seed: int = RANDOM_SEED) -> tuple:
-    rng = random.Random(seed)
-
-    df = df.copy()
-    df.columns = [c.lower() for c in df.columns]
-    if "timestamp" not in df.columns and df.index.name != "timestamp":
-        df = df.reset_index()
-
-    close = df["close"].astype(float)
-    high_s = df["high"].astype(float)
-    low_s = df["low"].astype(float)
-    atr_series = calc_atr_series(high_s, low_s, close, ATR_PERIOD)
-
-    balance = initial_balance
-    position = None
-    trades = []
-    equity = [initial_balance]
-
-    min_bars = ATR_PERIOD + 1
-
-    for i in range(min_bars, len(df)):
-        row = df.iloc[i]
-        ts = row.get("timestamp", df.index[i])
-        o, h, l, c = float(row["open"]), float(row["high"]), float(row["low"]), float(row["close"])
-
-        atr = atr_series.iloc[i]
-        if pd.isna(atr) or atr <= 0:
-            atr = c * 0.01
-
-        buy_unit = calc_buy_unit(balance)
-
-        # ===== 포지션 관리 =====
-        if position is not None:
-            side = position["side"]
-            entry_price = position["entry_price"]
-            size = position["size"]
-            sl_price = position["sl_price"]
-
-            # 트레일링 갱신
-            if position["trailing_active"]:
-                if side == "long":
-                    position["best_price"] = max(position["best_price"], h)
-                else:
-                    position["best_price"] = min(position["best_price"], l)
-
-            # 손절 체크
-            if side == "long" and l <= sl_price:
-                pnl = size * (sl_price - entry_price)
-                balance += pnl
-                trades.append({
-                    "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                    "entry_price": entry_price, "exit_price": sl_price,
-                    "pnl": pnl, "balance_after": balance
-                })
-                position = None
-                equity.append(balance)
-                continue
-            elif side == "short" and h >= sl_price:
-                pnl = size * (entry_price - sl_price)
-                balance += pnl
-                trades.append({
-                    "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                    "entry_price": entry_price, "exit_price": sl_price,
-                    "pnl": pnl, "balance_after": balance
-                })
-                position = None
-                equity.append(balance)
-                continue
+class RandomEntryStrategy(BarStrategy):
+    indicator_params = ("ATR_PERIOD",)
 
-            # 부분 익절 (+5%, 30% 청산)
-            if not position["partial_taken"]:
-                if side == "long":
-                    partial_tp = entry_price * (1 + PARTIAL_TP_PCT)
-                    if h >= partial_tp:
-                        partial_size = size * PARTIAL_TP_RATIO
-                        pnl = partial_size * (partial_tp - entry_price)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "PARTIAL_TP",
-                            "entry_price": entry_price, "exit_price": partial_tp,
-                            "pnl": pnl, "balance_after": balance
-                        })
-                        position["size"] = size - partial_size
-                        position["partial_taken"] = True
-                        position["trailing_active"] = True
-                        position["best_price"] = h
-                        position["sl_price"] = entry_price
-                else:
-                    partial_tp = entry_price * (1 - PARTIAL_TP_PCT)
-                    if l <= partial_tp:
-                        partial_size = size * PARTIAL_TP_RATIO
-                        pnl = partial_size * (entry_price - partial_tp)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "PARTIAL_TP",
-                            "entry_price": entry_price, "exit_price": partial_tp,
-                            "pnl": pnl, "balance_after": balance
-                        })
-                        position["size"] = size - partial_size
-                        position["partial_taken"] = True
-                        position["trailing_active"] = True
-                        position["best_price"] = l
-                        position["sl_price"] = entry_price
+    def __init__(self, seed: int = None):
+        # None이면 호출 시점의 RANDOM_SEED (sweep이 모듈 상수를 바꾼 값이 반영되도록 기본값을 늦게 읽음)
+        self.rng = random.Random(RANDOM_SEED if seed is None else seed)
 
-            # 트레일링 스탑
-            if position is not None and position["trailing_active"]:
-                trail_atr = atr * TRAILING_STOP_ATR_MULT
-                remaining_size = position["size"]
-                if side == "long":
-                    trail_sl = position["best_price"] - trail_atr
-                    if l <= trail_sl:
-                        pnl = remaining_size * (trail_sl - entry_price)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "TRAILING_STOP",
-                            "entry_price": entry_price, "exit_price": trail_sl,
-                            "pnl": pnl, "balance_after": balance
-                        })
-                        position = None
-                        equity.append(balance)
-                        continue
-                else:
-                    trail_sl = position["best_price"] + trail_atr
-                    if h >= trail_sl:
-                        pnl = remaining_size * (entry_price - trail_sl)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "TRAILING_STOP",
-                            "entry_price": entry_price, "exit_price": trail_sl,
-                            "pnl": pnl, "balance_after": balance
-                        })
-                        position = None
-                        equity.append(balance)
-                        continue
+    def buy_unit(self, balance: float) -> int:
+        return calc_buy_unit(balance)
 
-            equity.append(balance)
-            continue
+    def prepare(self, df: pd.DataFrame):
+        self.warmup = ATR_PERIOD + 1
+        close = df["close"].astype(float)
+        atr = calc_atr_series(df["high"].astype(float), df["low"].astype(float), close, ATR_PERIOD)
+        self.atr = atr_or_fallback(atr, close).tolist()
 
-        # ===== 랜덤 진입 =====
-        if balance < buy_unit:
-            equity.append(balance)
-            continue
+    def entry(self, i, o, h, l, c, buy_unit):
+        if self.rng.random() >= ENTRY_PROB:
+            return None
+        side = self.rng.choice(["long", "short"])
+        size = buy_unit * LEVERAGE / c
+        atr = self.atr[i]
+        if side == "long":
+            return new_position("long", c, size, c - atr * INITIAL_SL_ATR_MULT)
+        return new_position("short", c, size, c + atr * INITIAL_SL_ATR_MULT)
 
-        if rng.random() < ENTRY_PROB:
-            side = rng.choice(["long", "short"])
-            size = buy_unit * LEVERAGE / c
-            if side == "long":
-                sl_price = c - atr * INITIAL_SL_ATR_MULT
-                position = {
-                    "side": "long", "entry_price": c, "size": size,
-                    "partial_taken": False, "trailing_active": False,
-                    "best_price": c, "sl_price": sl_price,
-                }
-            else:
-                sl_price = c + atr * INITIAL_SL_ATR_MULT
-                position = {
-                    "side": "short", "entry_price": c, "size": size,
-                    "partial_taken": False, "trailing_active": False,
-                    "best_price": c, "sl_price": sl_price,
-                }
 
-        equity.append(balance)
+def build_backtest(seed: int = None) -> tuple:
+    """현재 모듈 상수로 (전략, 청산 정책) 생성 - run_backtest / sweep 공용"""
+    policy = ExitPolicy(
+        partial_tp_pct=PARTIAL_TP_PCT,
+        partial_tp_ratio=PARTIAL_TP_RATIO,
+        trailing_atr_mult=TRAILING_STOP_ATR_MULT,
+    )
+    return RandomEntryStrategy(seed), policy
 
-    # 마지막 포지션 청산
-    if position is not None:
-        last = df.iloc[-1]
-        c = float(last["close"])
-        ts = last.get("timestamp", df.index[-1])
-        side = position["side"]
-        entry_price = position["entry_price"]
-        size = position["size"]
-        pnl = size * (c - entry_price) if side == "long" else size * (entry_price - c)
-        balance += pnl
-        trades.append({
-            "timestamp": ts, "side": side, "exit_reason": "END_OF_DATA",
-            "entry_price": entry_price, "exit_price": c, "pnl": pnl, "balance_after": balance
-        })
 
-    return trades, pd.Series(equity), balance
+def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE, seed: int = None) -> tuple:
+    strategy, policy = build_backtest(seed)
+    return run_strategy(strategy, policy, df, initial_balance)
 
 
 def fetch_ohlcv(symbol: str = SYMBOL, timeframe: str = TIMEFRAME, limit: int = 1000) -> pd.DataFrame:
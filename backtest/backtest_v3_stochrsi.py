@@ -12,12 +12,12 @@ import math
 from pathlib import Path
 
 import pandas as pd
-import numpy as np
 
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
 
-from modules.module_ema import calc_ema
+from modules.module_indicators import calc_ema_series, calc_stoch_rsi_series, calc_atr_series
+from backtest.engine import BarStrategy, ExitPolicy, atr_or_fallback, new_position, run_strategy
 
 # === 전략 상수 ===
 TIMEFRAME = "15m"
@@ -58,50 +58,14 @@ def calc_buy_unit(total_balance: float) -> int:
     return max(math.floor(base_amount), MIN_BUY_UNIT)
 
 
-def calc_stoch_rsi_series(close: pd.Series) -> pd.DataFrame:
-    """Stochastic RSI 계산 (K, D 반환)"""
-    period = STOCH_RSI_PERIOD
-    k_period = STOCH_RSI_K_PERIOD
-    d_period = STOCH_RSI_D_PERIOD
-
-    # RSI 계산
-    delta = close.diff(1)
-    gain = delta.where(delta > 0, 0.0)
-    loss = -delta.where(delta < 0, 0.0)
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-    rs = avg_gain / avg_loss.replace(0, np.nan)
-    rsi = 100 - (100 / (1 + rs))
-
-    # Stoch RSI (0~100)
-    rsi_min = rsi.rolling(window=period).min()
-    rsi_max = rsi.rolling(window=period).max()
-    stoch_rsi = (rsi - rsi_min) / (rsi_max - rsi_min).replace(0, np.nan) * 100
-
-    k = stoch_rsi.rolling(window=k_period).mean()
-    d = k.rolling(window=d_period).mean()
-
-    return pd.DataFrame({"K": k, "D": d})
-
-
-def calc_atr_series(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-    prev_close = close.shift(1)
-    tr1 = high - low
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.ewm(span=period, adjust=False).mean()
-    return atr
-
-
-def detect_trend(price: float, ema20: pd.Series, ema60: pd.Series, ema200: pd.Series, idx: int) -> str:
+def detect_trend(price: float, ema20, ema60, ema200, idx: int) -> str:
     if idx < SLOPE_PERIOD:
         return "NONE"
-    ema20_now = ema20.iloc[idx]
-    ema20_prev = ema20.iloc[idx - SLOPE_PERIOD]
-    ema60_now = ema60.iloc[idx]
-    ema60_prev = ema60.iloc[idx - SLOPE_PERIOD]
-    ema200_now = ema200.iloc[idx]
+    ema20_now = ema20[idx]
+    ema20_prev = ema20[idx - SLOPE_PERIOD]
+    ema60_now = ema60[idx]
+    ema60_prev = ema60[idx - SLOPE_PERIOD]
+    ema200_now = ema200[idx]
     slope_20 = (ema20_now - ema20_prev) / ema20_prev * 100 if ema20_prev else 0
     slope_60 = (ema60_now - ema60_prev) / ema60_prev * 100 if ema60_prev else 0
 
@@ -116,214 +80,58 @@ def detect_trend(price: float, ema20: pd.Series, ema60: pd.Series, ema200: pd.Se
     return "NONE"
 
 
-def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> tuple:
-    df = df.copy()
-    df.columns = [c.lower() for c in df.columns]
-    if "timestamp" not in df.columns and df.index.name != "timestamp":
-        df = df.reset_index()
-
-    close = df["close"].astype(float)
-    high_s = df["high"].astype(float)
-    low_s = df["low"].astype(float)
-
-    ema20 = calc_ema(close, EMA_MEDIUM)
-    ema60 = calc_ema(close, EMA_SLOW)
-    ema200 = calc_ema(close, EMA_HTF)
-    stochrsi_df = calc_stoch_rsi_series(close)
-    atr_series = calc_atr_series(high_s, low_s, close, ATR_PERIOD)
-
-    balance = initial_balance
-    position = None
-    trades = []
-    equity = [initial_balance]
-
-    # 워밍업: EMA200, Stoch RSI, ATR 중 가장 긴 것
-    stoch_warmup = STOCH_RSI_PERIOD * 2 + STOCH_RSI_K_PERIOD + STOCH_RSI_D_PERIOD
-    min_bars = max(EMA_HTF + SLOPE_PERIOD, stoch_warmup, ATR_PERIOD)
-
-    for i in range(min_bars, len(df)):
-        row = df.iloc[i]
-        ts = row.get("timestamp", df.index[i])
-        o, h, l, c = float(row["open"]), float(row["high"]), float(row["low"]), float(row["close"])
-
-        stoch_k = stochrsi_df["K"].iloc[i]
-        if pd.isna(stoch_k):
+class StochRsiTrendStrategy(BarStrategy):
+    indicator_params = ("EMA_MEDIUM", "EMA_SLOW", "EMA_HTF", "SLOPE_PERIOD", "STOCH_RSI_PERIOD",
+                         "STOCH_RSI_K_PERIOD", "STOCH_RSI_D_PERIOD", "ATR_PERIOD")
+
+    def buy_unit(self, balance: float) -> int:
+        return calc_buy_unit(balance)
+
+    def prepare(self, df: pd.DataFrame):
+        # 워밍업: EMA200, Stoch RSI, ATR 중 가장 긴 것
+        stoch_warmup = STOCH_RSI_PERIOD * 2 + STOCH_RSI_K_PERIOD + STOCH_RSI_D_PERIOD
+        self.warmup = max(EMA_HTF + SLOPE_PERIOD, stoch_warmup, ATR_PERIOD)
+        close = df["close"].astype(float)
+        self.ema20 = calc_ema_series(close, EMA_MEDIUM).tolist()
+        self.ema60 = calc_ema_series(close, EMA_SLOW).tolist()
+        self.ema200 = calc_ema_series(close, EMA_HTF).tolist()
+        stoch_k, _ = calc_stoch_rsi_series(close, STOCH_RSI_PERIOD, STOCH_RSI_K_PERIOD, STOCH_RSI_D_PERIOD)
+        self.stoch_k = stoch_k.tolist()
+        atr = calc_atr_series(df["high"].astype(float), df["low"].astype(float), close, ATR_PERIOD)
+        self.atr = atr_or_fallback(atr, close).tolist()
+
+    def entry(self, i, o, h, l, c, buy_unit):
+        trend = detect_trend(c, self.ema20, self.ema60, self.ema200, i)
+        if trend == "NONE":
+            return None
+
+        stoch_k = self.stoch_k[i]
+        if math.isnan(stoch_k):
             stoch_k = 50.0
 
-        atr = atr_series.iloc[i]
-        if pd.isna(atr) or atr <= 0:
-            atr = c * 0.01
-
-        buy_unit = calc_buy_unit(balance)
-
-        # ===== 포지션 관리 =====
-        if position is not None:
-            side = position["side"]
-            entry_price = position["entry_price"]
-            size = position["size"]
-            sl_price = position["sl_price"]
-
-            # 봉 카운트 증가
-            position["bars_open"] += 1
-
-            # 타임스탑: 일정 봉 동안 수익 없으면 강제 청산 (횡보 방지)
-            if not position["trailing_active"] and position["bars_open"] >= TIME_STOP_BARS:
-                if (side == "long" and c <= position["entry_price"]) or \
-                   (side == "short" and c >= position["entry_price"]):
-                    pnl = size * (c - entry_price) if side == "long" else size * (entry_price - c)
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "TIME_STOP",
-                        "entry_price": entry_price, "exit_price": c,
-                        "pnl": pnl, "balance_after": balance
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-
-            # 트레일링 최고/최저 갱신
-            if position["trailing_active"]:
-                if side == "long":
-                    position["best_price"] = max(position["best_price"], h)
-                else:
-                    position["best_price"] = min(position["best_price"], l)
-
-            # 손절 체크
-            if side == "long" and l <= sl_price:
-                pnl = size * (sl_price - entry_price)
-                balance += pnl
-                trades.append({
-                    "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                    "entry_price": entry_price, "exit_price": sl_price,
-                    "pnl": pnl, "balance_after": balance
-                })
-                position = None
-                equity.append(balance)
-                continue
-            elif side == "short" and h >= sl_price:
-                pnl = size * (entry_price - sl_price)
-                balance += pnl
-                trades.append({
-                    "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                    "entry_price": entry_price, "exit_price": sl_price,
-                    "pnl": pnl, "balance_after": balance
-                })
-                position = None
-                equity.append(balance)
-                continue
-
-            # 부분 익절 (+5%, 30%만 청산)
-            if not position["partial_taken"]:
-                if side == "long":
-                    partial_tp = entry_price * (1 + PARTIAL_TP_PCT)
-                    if h >= partial_tp:
-                        partial_size = size * PARTIAL_TP_RATIO
-                        pnl = partial_size * (partial_tp - entry_price)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "PARTIAL_TP",
-                            "entry_price": entry_price, "exit_price": partial_tp,
-                            "pnl": pnl, "balance_after": balance
-                        })
-                        position["size"] = size - partial_size
-                        position["partial_taken"] = True
-                        position["trailing_active"] = True
-                        position["best_price"] = h
-                        position["sl_price"] = entry_price  # 본전 보장
-                else:
-                    partial_tp = entry_price * (1 - PARTIAL_TP_PCT)
-                    if l <= partial_tp:
-                        partial_size = size * PARTIAL_TP_RATIO
-                        pnl = partial_size * (entry_price - partial_tp)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "PARTIAL_TP",
-                            "entry_price": entry_price, "exit_price": partial_tp,
-                            "pnl": pnl, "balance_after": balance
-                        })
-                        position["size"] = size - partial_size
-                        position["partial_taken"] = True
-                        position["trailing_active"] = True
-                        position["best_price"] = l
-                        position["sl_price"] = entry_price
-
-            # 트레일링 스탑
-            if position is not None and position["trailing_active"]:
-                trail_atr = atr * TRAILING_STOP_ATR_MULT
-                remaining_size = position["size"]
-                if side == "long":
-                    trail_sl = position["best_price"] - trail_atr
-                    if l <= trail_sl:
-                        pnl = remaining_size * (trail_sl - entry_price)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "TRAILING_STOP",
-                            "entry_price": entry_price, "exit_price": trail_sl,
-                            "pnl": pnl, "balance_after": balance
-                        })
-                        position = None
-                        equity.append(balance)
-                        continue
-                else:
-                    trail_sl = position["best_price"] + trail_atr
-                    if h >= trail_sl:
-                        pnl = remaining_size * (entry_price - trail_sl)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "TRAILING_STOP",
-                            "entry_price": entry_price, "exit_price": trail_sl,
-                            "pnl": pnl, "balance_after": balance
-                        })
-                        position = None
-                        equity.append(balance)
-                        continue
-
-            equity.append(balance)
-            continue
-
-        # ===== 진입 판단 =====
-        trend = detect_trend(c, ema20, ema60, ema200, i)
-        if trend == "NONE" or balance < buy_unit:
-            equity.append(balance)
-            continue
-
-        should_long = trend == "UPTREND" and stoch_k < STOCH_RSI_LONG_THRESHOLD
-        should_short = trend == "DOWNTREND" and stoch_k > STOCH_RSI_SHORT_THRESHOLD
-
-        if should_long:
-            size = buy_unit * LEVERAGE / c
-            sl_price = c - atr * INITIAL_SL_ATR_MULT
-            position = {
-                "side": "long", "entry_price": c, "size": size,
-                "partial_taken": False, "trailing_active": False,
-                "best_price": c, "sl_price": sl_price, "bars_open": 0,
-            }
-        elif should_short:
-            size = buy_unit * LEVERAGE / c
-            sl_price = c + atr * INITIAL_SL_ATR_MULT
-            position = {
-                "side": "short", "entry_price": c, "size": size,
-                "partial_taken": False, "trailing_active": False,
-                "best_price": c, "sl_price": sl_price, "bars_open": 0,
-            }
-        equity.append(balance)
-
-    # 마지막 포지션 청산
-    if position is not None:
-        last = df.iloc[-1]
-        c = float(last["close"])
-        ts = last.get("timestamp", df.index[-1])
-        side = position["side"]
-        entry_price = position["entry_price"]
-        size = position["size"]
-        pnl = size * (c - entry_price) if side == "long" else size * (entry_price - c)
-        balance += pnl
-        trades.append({
-            "timestamp": ts, "side": side, "exit_reason": "END_OF_DATA",
-            "entry_price": entry_price, "exit_price": c, "pnl": pnl, "balance_after": balance
-        })
-
-    return trades, pd.Series(equity), balance
+        size = buy_unit * LEVERAGE / c
+        atr = self.atr[i]
+        if trend == "UPTREND" and stoch_k < STOCH_RSI_LONG_THRESHOLD:
+            return new_position("long", c, size, c - atr * INITIAL_SL_ATR_MULT)
+        if trend == "DOWNTREND" and stoch_k > STOCH_RSI_SHORT_THRESHOLD:
+            return new_position("short", c, size, c + atr * INITIAL_SL_ATR_MULT)
+        return None
+
+
+def build_backtest() -> tuple:
+    """현재 모듈 상수로 (전략, 청산 정책) 생성 - run_backtest / sweep 공용"""
+    policy = ExitPolicy(
+        partial_tp_pct=PARTIAL_TP_PCT,
+        partial_tp_ratio=PARTIAL_TP_RATIO,
+        trailing_atr_mult=TRAILING_STOP_ATR_MULT,
+        time_stop_bars=TIME_STOP_BARS,
+    )
+    return StochRsiTrendStrategy(), policy
+
+
+def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> tuple:
+    strategy, policy = build_backtest()
+    return run_strategy(strategy, policy, df, initial_balance)
 
 
 def fetch_ohlcv(symbol: str = SYMBOL, timeframe: str = TIMEFRAME, limit: int = 1000) -> pd.DataFrame:
@@ -29,11 +29,13 @@ import math
 from pathlib import Path
 
 import pandas as pd
-import numpy as np
 
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
 
+from modules.module_indicators import calc_atr_series, calc_di_series
+from backtest.engine import BarStrategy, ExitPolicy, atr_or_fallback, new_position, run_strategy
+
 # === 타임프레임 ===
 TIMEFRAME = "1h"
 LEVERAGE = 3
@@ -68,278 +70,78 @@ def calc_buy_unit(total_balance: float) -> int:
     return max(math.floor(base_amount), MIN_BUY_UNIT)
 
 
-def calc_atr_series(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-    prev_close = close.shift(1)
-    tr = pd.concat([high - low,
-                    (high - prev_close).abs(),
-                    (low - prev_close).abs()], axis=1).max(axis=1)
-    return tr.ewm(span=period, adjust=False).mean()
-
+class VolumeContrarianStrategy(BarStrategy):
+    indicator_params = ("ATR_PERIOD", "ADX_PERIOD", "VOLUME_LOOKBACK")
 
-def calc_di_series(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14):
-    """DI+, DI- 반환 (ADX 구성 요소) — 추세 방향 필터용"""
-    prev_high = high.shift(1)
-    prev_low = low.shift(1)
-    prev_close = close.shift(1)
+    def buy_unit(self, balance: float) -> int:
+        return calc_buy_unit(balance)
 
-    tr = pd.concat([high - low,
-                    (high - prev_close).abs(),
-                    (low - prev_close).abs()], axis=1).max(axis=1)
+    def prepare(self, df: pd.DataFrame):
+        self.warmup = max(ATR_PERIOD * 2, VOLUME_LOOKBACK + 1)
+        close = df["close"].astype(float)
+        high_s = df["high"].astype(float)
+        low_s = df["low"].astype(float)
+        volume_s = df["volume"].astype(float)
 
-    up_move = high - prev_high
-    down_move = prev_low - low
-    dm_plus = pd.Series(
-        np.where((up_move > down_move) & (up_move > 0), up_move, 0.0),
-        index=close.index)
-    dm_minus = pd.Series(
-        np.where((down_move > up_move) & (down_move > 0), down_move, 0.0),
-        index=close.index)
+        self.atr = atr_or_fallback(calc_atr_series(high_s, low_s, close, ATR_PERIOD), close).tolist()
+        di_plus, di_minus = calc_di_series(high_s, low_s, close, ADX_PERIOD)
+        self.di_plus, self.di_minus = di_plus.tolist(), di_minus.tolist()
+        self.volume = volume_s.to_numpy().tolist()
+        self.vol_avg = volume_s.shift(1).rolling(VOLUME_LOOKBACK).mean().to_numpy().tolist()
 
-    atr_s = tr.ewm(span=period, adjust=False).mean()
-    di_plus = 100 * dm_plus.ewm(span=period, adjust=False).mean() / atr_s
-    di_minus = 100 * dm_minus.ewm(span=period, adjust=False).mean() / atr_s
-    return di_plus, di_minus
+    def entry(self, i, o, h, l, c, buy_unit):
+        v_avg = self.vol_avg[i]
+        if math.isnan(v_avg) or v_avg <= 0 or self.volume[i] <= v_avg * VOLUME_MULT:
+            return None
 
+        di_plus = self.di_plus[i]
+        di_minus = self.di_minus[i]
+        if math.isnan(di_plus) or math.isnan(di_minus):
+            return None
 
-def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> tuple:
-    df = df.copy()
-    df.columns = [c.lower() for c in df.columns]
-    if "timestamp" not in df.columns and df.index.name != "timestamp":
-        df = df.reset_index()
-
-    close = df["close"].astype(float)
-    high_s = df["high"].astype(float)
-    low_s = df["low"].astype(float)
-    open_s = df["open"].astype(float)
-    volume_s = df["volume"].astype(float)
-
-    atr_series = calc_atr_series(high_s, low_s, close, ATR_PERIOD)
-    di_plus_s, di_minus_s = calc_di_series(high_s, low_s, close, ADX_PERIOD)
-    vol_avg = volume_s.shift(1).rolling(VOLUME_LOOKBACK).mean()
-
-    balance = initial_balance
-    position = None
-    trades = []
-    equity = [initial_balance]
-
-    min_bars = max(ATR_PERIOD * 2, VOLUME_LOOKBACK + 1)
-
-    for i in range(min_bars, len(df)):
-        row = df.iloc[i]
-        ts = row.get("timestamp", df.index[i])
-        o = open_s.iloc[i]
-        h = high_s.iloc[i]
-        l = low_s.iloc[i]
-        c = close.iloc[i]
-        vol = volume_s.iloc[i]
-
-        atr = atr_series.iloc[i]
-        if pd.isna(atr) or atr <= 0:
-            atr = c * 0.01
-
-        di_plus = di_plus_s.iloc[i]
-        di_minus = di_minus_s.iloc[i]
-
-        buy_unit = calc_buy_unit(balance)
-
-        # ===== 포지션 관리 =====
-        if position is not None:
-            side = position["side"]
-            entry_price = position["entry_price"]
-            size = position["size"]
-            sl_price = position["sl_price"]
-            full_tp = position["full_tp"]
-            partial_tp = position["partial_tp"]
-
-            position["bars_open"] += 1
-
-            # ── 타임스탑 ──────────────────────────────────────────
-            if position["bars_open"] >= TIME_STOP_BARS:
-                if (side == "short" and c >= entry_price) or \
-                   (side == "long" and c <= entry_price):
-                    pnl = size * (entry_price - c) if side == "short" else size * (c - entry_price)
-                    pnl -= size * (entry_price + c) * COMMISSION_RATE
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "TIME_STOP",
-                        "entry_price": entry_price, "exit_price": c,
-                        "pnl": pnl, "balance_after": balance,
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-
-            if side == "short":
-                # 부분 익절 (캔들 시가까지 되돌림 - 빠른 50%)
-                if not position["partial_taken"] and l <= partial_tp:
-                    partial_size = size * PARTIAL_TP_RATIO
-                    pnl = partial_size * (entry_price - partial_tp)
-                    pnl -= partial_size * (entry_price + partial_tp) * COMMISSION_RATE
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "PARTIAL_TP",
-                        "entry_price": entry_price, "exit_price": partial_tp,
-                        "pnl": pnl, "balance_after": balance,
-                    })
-                    position["size"] = size - partial_size
-                    position["partial_taken"] = True
-                    position["sl_price"] = entry_price  # SL 본전 이동
-                    # size 갱신 후 바로 Full TP / SL 체크
-                    size = position["size"]
-                    sl_price = position["sl_price"]
-
-                # 전체 익절 (캔들 저가까지)
-                if l <= full_tp:
-                    pnl = size * (entry_price - full_tp)
-                    pnl -= size * (entry_price + full_tp) * COMMISSION_RATE
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "TAKE_PROFIT",
-                        "entry_price": entry_price, "exit_price": full_tp,
-                        "pnl": pnl, "balance_after": balance,
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-                # SL
-                elif h >= sl_price:
-                    pnl = size * (entry_price - sl_price)
-                    pnl -= size * (entry_price + sl_price) * COMMISSION_RATE
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                        "entry_price": entry_price, "exit_price": sl_price,
-                        "pnl": pnl, "balance_after": balance,
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-
-            else:  # long
-                # 부분 익절 (캔들 시가까지 되돌림)
-                if not position["partial_taken"] and h >= partial_tp:
-                    partial_size = size * PARTIAL_TP_RATIO
-                    pnl = partial_size * (partial_tp - entry_price)
-                    pnl -= partial_size * (entry_price + partial_tp) * COMMISSION_RATE
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "PARTIAL_TP",
-                        "entry_price": entry_price, "exit_price": partial_tp,
-                        "pnl": pnl, "balance_after": balance,
-                    })
-                    position["size"] = size - partial_size
-                    position["partial_taken"] = True
-                    position["sl_price"] = entry_price  # SL 본전 이동
-                    size = position["size"]
-                    sl_price = position["sl_price"]
-
-                # 전체 익절 (캔들 고가까지)
-                if h >= full_tp:
-                    pnl = size * (full_tp - entry_price)
-                    pnl -= size * (entry_price + full_tp) * COMMISSION_RATE
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "TAKE_PROFIT",
-                        "entry_price": entry_price, "exit_price": full_tp,
-                        "pnl": pnl, "balance_after": balance,
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-                # SL
-                elif l <= sl_price:
-                    pnl = size * (sl_price - entry_price)
-                    pnl -= size * (entry_price + sl_price) * COMMISSION_RATE
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                        "entry_price": entry_price, "exit_price": sl_price,
-                        "pnl": pnl, "balance_after": balance,
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-
-            equity.append(balance)
-            continue
-
-        # ===== 진입 판단 =====
-        if balance < buy_unit:
-            equity.append(balance)
-            continue
-
-        v_avg = vol_avg.iloc[i]
-        if pd.isna(v_avg) or v_avg <= 0 or vol <= v_avg * VOLUME_MULT:
-            equity.append(balance)
-            continue
-
-        if pd.isna(di_plus) or pd.isna(di_minus):
-            equity.append(balance)
-            continue
-
-        is_bullish = c > o
-        is_bearish = c < o
         size = buy_unit * LEVERAGE / c
+        atr = self.atr[i]
 
         # DI 방향 판단
         di_diff = di_plus - di_minus
         uptrend = di_diff > DI_DIFF_THRESHOLD    # DI+ 우세 → 상승 추세
         downtrend = di_diff < -DI_DIFF_THRESHOLD  # DI- 우세 → 하락 추세
 
-        if is_bullish:
+        if c > o:
             # 양봉 스파이크 → Short
             # 상승추세에선 추세 방향 스파이크 → 진입 스킵
             if uptrend:
-                equity.append(balance)
-                continue
-            full_tp = l       # 전체 TP: 캔들 저가
-            partial_tp = o    # 부분 TP: 캔들 시가 (절반 먼저)
-            sl_price = c + atr * SL_ATR_MULT
-            tp_dist = (c - full_tp) / c
-            if tp_dist <= MAX_TP_PCT and partial_tp < c:  # 시가가 종가보다 낮아야 의미있음
-                position = {
-                    "side": "short", "entry_price": c, "size": size,
-                    "full_tp": full_tp, "partial_tp": partial_tp,
-                    "sl_price": sl_price, "partial_taken": False, "bars_open": 0,
-                }
-
-        elif is_bearish:
+                return None
+            # 전체 TP: 캔들 저가 / 부분 TP: 캔들 시가 (절반 먼저)
+            if (c - l) / c <= MAX_TP_PCT and o < c:  # 시가가 종가보다 낮아야 의미있음
+                return new_position("short", c, size, c + atr * SL_ATR_MULT, tp_price=l, partial_tp=o)
+
+        elif c < o:
             # 음봉 스파이크 → Long
             # 하락추세에선 추세 방향 스파이크 → 진입 스킵
             if downtrend:
-                equity.append(balance)
-                continue
-            full_tp = h       # 전체 TP: 캔들 고가
-            partial_tp = o    # 부분 TP: 캔들 시가
-            sl_price = c - atr * SL_ATR_MULT
-            tp_dist = (full_tp - c) / c
-            if tp_dist <= MAX_TP_PCT and partial_tp > c:  # 시가가 종가보다 높아야 의미있음
-                position = {
-                    "side": "long", "entry_price": c, "size": size,
-                    "full_tp": full_tp, "partial_tp": partial_tp,
-                    "sl_price": sl_price, "partial_taken": False, "bars_open": 0,
-                }
-
-        equity.append(balance)
-
-    # 마지막 포지션 청산
-    if position is not None:
-        last = df.iloc[-1]
-        c = float(last["close"])
-        ts = last.get("timestamp", df.index[-1])
-        side = position["side"]
-        entry_price = position["entry_price"]
-        size = position["size"]
-        pnl = size * (entry_price - c) if side == "short" else size * (c - entry_price)
-        pnl -= size * (entry_price + c) * COMMISSION_RATE
-        balance += pnl
-        trades.append({
-            "timestamp": ts, "side": side, "exit_reason": "END_OF_DATA",
-            "entry_price": entry_price, "exit_price": c,
-            "pnl": pnl, "balance_after": balance,
-        })
-
-    return trades, pd.Series(equity), balance
+                return None
+            # 전체 TP: 캔들 고가 / 부분 TP: 캔들 시가
+            if (h - c) / c <= MAX_TP_PCT and o > c:  # 시가가 종가보다 높아야 의미있음
+                return new_position("long", c, size, c - atr * SL_ATR_MULT, tp_price=h, partial_tp=o)
+        return None
+
+
+def build_backtest() -> tuple:
+    """현재 모듈 상수로 (전략, 청산 정책) 생성 - run_backtest / sweep 공용"""
+    # 부분 익절(신호봉 시가) → 전체 익절(신호봉 저가/고가) → SL 순서, 트레일링 없음
+    policy = ExitPolicy(
+        stop_first=False,
+        partial_tp_ratio=PARTIAL_TP_RATIO,
+        time_stop_bars=TIME_STOP_BARS,
+        commission_rate=COMMISSION_RATE,
+    )
+    return VolumeContrarianStrategy(), policy
+
+
+def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> tuple:
+    strategy, policy = build_backtest()
+    return run_strategy(strategy, policy, df, initial_balance)
 
 
 def fetch_ohlcv(symbol: str = SYMBOL, timeframe: str = TIMEFRAME, limit: int = 300) -> pd.DataFrame:
@@ -24,12 +24,12 @@ import math
 from pathlib import Path
 
 import pandas as pd
-import numpy as np
 
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
 
-from modules.module_ema import calc_ema
+from modules.module_indicators import calc_ema_series, calc_atr_series
+from backtest.engine import BarStrategy, ExitPolicy, atr_or_fallback, new_position, run_strategy
 
 # === 타임프레임 ===
 TIMEFRAME = "1h"
@@ -66,274 +66,72 @@ def calc_buy_unit(total_balance: float) -> int:
     return max(math.floor(base_amount), MIN_BUY_UNIT)
 
 
-def calc_atr_series(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-    prev_close = close.shift(1)
-    tr1 = high - low
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    return tr.ewm(span=period, adjust=False).mean()
+class VolumeSlopeStrategy(BarStrategy):
+    trade_fields = ("entry_type",)
+    indicator_params = ("ATR_PERIOD", "MA_SHORT", "MA_MID", "MA_LONG", "SLOPE_PERIOD", "VOLUME_LOOKBACK")
 
+    def buy_unit(self, balance: float) -> int:
+        return calc_buy_unit(balance)
 
-def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> tuple:
-    df = df.copy()
-    df.columns = [c.lower() for c in df.columns]
-    if "timestamp" not in df.columns and df.index.name != "timestamp":
-        df = df.reset_index()
-
-    close = df["close"].astype(float)
-    high_s = df["high"].astype(float)
-    low_s = df["low"].astype(float)
-    open_s = df["open"].astype(float)
-    volume_s = df["volume"].astype(float)
-
-    # 지표 계산
-    atr_series = calc_atr_series(high_s, low_s, close, ATR_PERIOD)
-    ma5 = calc_ema(close, MA_SHORT)
-    ma20 = calc_ema(close, MA_MID)
-    ma99 = calc_ema(close, MA_LONG)
-    # 거래량: 현재 봉 제외한 직전 5봉 평균
-    vol_avg = volume_s.shift(1).rolling(VOLUME_LOOKBACK).mean()
-
-    balance = initial_balance
-    position = None
-    trades = []
-    equity = [initial_balance]
-
-    min_bars = max(MA_LONG + SLOPE_PERIOD, ATR_PERIOD, VOLUME_LOOKBACK + 1)
-
-    for i in range(min_bars, len(df)):
-        row = df.iloc[i]
-        ts = row.get("timestamp", df.index[i])
-        o = open_s.iloc[i]
-        h = high_s.iloc[i]
-        l = low_s.iloc[i]
-        c = close.iloc[i]
-        vol = volume_s.iloc[i]
-
-        atr = atr_series.iloc[i]
-        if pd.isna(atr) or atr <= 0:
-            atr = c * 0.01
-
-        buy_unit = calc_buy_unit(balance)
-
-        # ===== 포지션 관리 =====
-        if position is not None:
-            side = position["side"]
-            entry_price = position["entry_price"]
-            size = position["size"]
-            sl_price = position["sl_price"]
-
-            # 봉 카운트
-            position["bars_open"] += 1
-
-            # 타임스탑: 5봉 경과 + 수익 없으면 강제 청산
-            if not position["trailing_active"] and position["bars_open"] >= TIME_STOP_BARS:
-                if (side == "long" and c <= entry_price) or \
-                   (side == "short" and c >= entry_price):
-                    pnl = size * (c - entry_price) if side == "long" else size * (entry_price - c)
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "TIME_STOP",
-                        "entry_price": entry_price, "exit_price": c,
-                        "pnl": pnl, "balance_after": balance,
-                        "entry_type": position["entry_type"],
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-
-            # 트레일링 최고/최저 갱신
-            if position["trailing_active"]:
-                if side == "long":
-                    position["best_price"] = max(position["best_price"], h)
-                else:
-                    position["best_price"] = min(position["best_price"], l)
-
-            # 손절 체크
-            if side == "long" and l <= sl_price:
-                pnl = size * (sl_price - entry_price)
-                balance += pnl
-                trades.append({
-                    "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                    "entry_price": entry_price, "exit_price": sl_price,
-                    "pnl": pnl, "balance_after": balance,
-                    "entry_type": position["entry_type"],
-                })
-                position = None
-                equity.append(balance)
-                continue
-            elif side == "short" and h >= sl_price:
-                pnl = size * (entry_price - sl_price)
-                balance += pnl
-                trades.append({
-                    "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                    "entry_price": entry_price, "exit_price": sl_price,
-                    "pnl": pnl, "balance_after": balance,
-                    "entry_type": position["entry_type"],
-                })
-                position = None
-                equity.append(balance)
-                continue
-
-            # 부분 익절 (+5%, 25% 청산)
-            if not position["partial_taken"]:
-                if side == "long":
-                    partial_tp = entry_price * (1 + PARTIAL_TP_PCT)
-                    if h >= partial_tp:
-                        partial_size = size * PARTIAL_TP_RATIO
-                        pnl = partial_size * (partial_tp - entry_price)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "PARTIAL_TP",
-                            "entry_price": entry_price, "exit_price": partial_tp,
-                            "pnl": pnl, "balance_after": balance,
-                            "entry_type": position["entry_type"],
-                        })
-                        position["size"] = size - partial_size
-                        position["partial_taken"] = True
-                        position["trailing_active"] = True
-                        position["best_price"] = h
-                        position["sl_price"] = entry_price  # 본전 보장
-                else:
-                    partial_tp = entry_price * (1 - PARTIAL_TP_PCT)
-                    if l <= partial_tp:
-                        partial_size = size * PARTIAL_TP_RATIO
-                        pnl = partial_size * (entry_price - partial_tp)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "PARTIAL_TP",
-                            "entry_price": entry_price, "exit_price": partial_tp,
-                            "pnl": pnl, "balance_after": balance,
-                            "entry_type": position["entry_type"],
-                        })
-                        position["size"] = size - partial_size
-                        position["partial_taken"] = True
-                        position["trailing_active"] = True
-                        position["best_price"] = l
-                        position["sl_price"] = entry_price
-
-            # 트레일링 스탑
-            if position is not None and position["trailing_active"]:
-                trail_atr = atr * TRAILING_STOP_ATR_MULT
-                remaining_size = position["size"]
-                if side == "long":
-                    trail_sl = position["best_price"] - trail_atr
-                    if l <= trail_sl:
-                        pnl = remaining_size * (trail_sl - entry_price)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "TRAILING_STOP",
-                            "entry_price": entry_price, "exit_price": trail_sl,
-                            "pnl": pnl, "balance_after": balance,
-                            "entry_type": position["entry_type"],
-                        })
-                        position = None
-                        equity.append(balance)
-                        continue
-                else:
-                    trail_sl = position["best_price"] + trail_atr
-                    if h >= trail_sl:
-                        pnl = remaining_size * (entry_price - trail_sl)
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "TRAILING_STOP",
-                            "entry_price": entry_price, "exit_price": trail_sl,
-                            "pnl": pnl, "balance_after": balance,
-                            "entry_type": position["entry_type"],
-                        })
-                        position = None
-                        equity.append(balance)
-                        continue
-
-            equity.append(balance)
-            continue
-
-        # ===== 진입 판단 =====
-        if balance < buy_unit:
-            equity.append(balance)
-            continue
-
-        entered = False
+    def prepare(self, df: pd.DataFrame):
+        self.warmup = max(MA_LONG + SLOPE_PERIOD, ATR_PERIOD, VOLUME_LOOKBACK + 1)
+        close = df["close"].astype(float)
+        volume_s = df["volume"].astype(float)
 
-        # --- 조건 A: Volume Spike ---
-        v_avg = vol_avg.iloc[i]
-        if not pd.isna(v_avg) and v_avg > 0 and vol > v_avg * VOLUME_MULT:
-            is_bullish = c > o
-            is_bearish = c < o
-            size = buy_unit * LEVERAGE / c
+        self.atr = atr_or_fallback(
+            calc_atr_series(df["high"].astype(float), df["low"].astype(float), close, ATR_PERIOD), close
+        ).tolist()
+        self.ma5 = calc_ema_series(close, MA_SHORT).tolist()
+        self.ma20 = calc_ema_series(close, MA_MID).tolist()
+        self.ma99 = calc_ema_series(close, MA_LONG).tolist()
+        self.volume = volume_s.to_numpy().tolist()
+        # 거래량: 현재 봉 제외한 직전 5봉 평균
+        self.vol_avg = volume_s.shift(1).rolling(VOLUME_LOOKBACK).mean().to_numpy().tolist()
+
+    def entry(self, i, o, h, l, c, buy_unit):
+        size = buy_unit * LEVERAGE / c
 
-            if is_bullish:
+        # --- 조건 A: Volume Spike ---
+        v_avg = self.vol_avg[i]
+        if not math.isnan(v_avg) and v_avg > 0 and self.volume[i] > v_avg * VOLUME_MULT:
+            if c > o:
                 sl_price = l  # 신호 봉 low
-                sl_dist = (c - sl_price) / c
-                if sl_dist <= MAX_SL_PCT:
-                    position = {
-                        "side": "long", "entry_price": c, "size": size,
-                        "sl_price": sl_price, "partial_taken": False,
-                        "trailing_active": False, "best_price": c,
-                        "bars_open": 0, "entry_type": "VOLUME",
-                    }
-                    entered = True
-            elif is_bearish:
+                if (c - sl_price) / c <= MAX_SL_PCT:
+                    return new_position("long", c, size, sl_price, entry_type="VOLUME")
+            elif c < o:
                 sl_price = h  # 신호 봉 high
-                sl_dist = (sl_price - c) / c
-                if sl_dist <= MAX_SL_PCT:
-                    position = {
-                        "side": "short", "entry_price": c, "size": size,
-                        "sl_price": sl_price, "partial_taken": False,
-                        "trailing_active": False, "best_price": c,
-                        "bars_open": 0, "entry_type": "VOLUME",
-                    }
-                    entered = True
+                if (sl_price - c) / c <= MAX_SL_PCT:
+                    return new_position("short", c, size, sl_price, entry_type="VOLUME")
 
         # --- 조건 B: MA Triple Slope (조건 A 미진입 시) ---
-        if not entered and i >= SLOPE_PERIOD:
-            ma5_now = ma5.iloc[i];    ma5_prev = ma5.iloc[i - SLOPE_PERIOD]
-            ma20_now = ma20.iloc[i];  ma20_prev = ma20.iloc[i - SLOPE_PERIOD]
-            ma99_now = ma99.iloc[i];  ma99_prev = ma99.iloc[i - SLOPE_PERIOD]
+        if i >= SLOPE_PERIOD:
+            ma5, ma20, ma99 = self.ma5, self.ma20, self.ma99
+            prev = i - SLOPE_PERIOD
+            slope_up = (ma5[i] > ma5[prev]) and (ma20[i] > ma20[prev]) and (ma99[i] > ma99[prev])
+            slope_dn = (ma5[i] < ma5[prev]) and (ma20[i] < ma20[prev]) and (ma99[i] < ma99[prev])
 
-            slope_up = (ma5_now > ma5_prev) and (ma20_now > ma20_prev) and (ma99_now > ma99_prev)
-            slope_dn = (ma5_now < ma5_prev) and (ma20_now < ma20_prev) and (ma99_now < ma99_prev)
+            atr = self.atr[i]
+            if slope_up:
+                return new_position("long", c, size, c - atr * MA_SL_ATR_MULT, entry_type="MA_SLOPE")
+            if slope_dn:
+                return new_position("short", c, size, c + atr * MA_SL_ATR_MULT, entry_type="MA_SLOPE")
+        return None
 
-            size = buy_unit * LEVERAGE / c
 
-            if slope_up:
-                sl_price = c - atr * MA_SL_ATR_MULT
-                position = {
-                    "side": "long", "entry_price": c, "size": size,
-                    "sl_price": sl_price, "partial_taken": False,
-                    "trailing_active": False, "best_price": c,
-                    "bars_open": 0, "entry_type": "MA_SLOPE",
-                }
-            elif slope_dn:
-                sl_price = c + atr * MA_SL_ATR_MULT
-                position = {
-                    "side": "short", "entry_price": c, "size": size,
-                    "sl_price": sl_price, "partial_taken": False,
-                    "trailing_active": False, "best_price": c,
-                    "bars_open": 0, "entry_type": "MA_SLOPE",
-                }
-
-        equity.append(balance)
-
-    # 마지막 포지션 청산
-    if position is not None:
-        last = df.iloc[-1]
-        c = float(last["close"])
-        ts = last.get("timestamp", df.index[-1])
-        side = position["side"]
-        entry_price = position["entry_price"]
-        size = position["size"]
-        pnl = size * (c - entry_price) if side == "long" else size * (entry_price - c)
-        balance += pnl
-        trades.append({
-            "timestamp": ts, "side": side, "exit_reason": "END_OF_DATA",
-            "entry_price": entry_price, "exit_price": c,
-            "pnl": pnl, "balance_after": balance,
-            "entry_type": position["entry_type"],
-        })
-
-    return trades, pd.Series(equity), balance
+def build_backtest() -> tuple:
+    """현재 모듈 상수로 (전략, 청산 정책) 생성 - run_backtest / sweep 공용"""
+    policy = ExitPolicy(
+        partial_tp_pct=PARTIAL_TP_PCT,
+        partial_tp_ratio=PARTIAL_TP_RATIO,
+        trailing_atr_mult=TRAILING_STOP_ATR_MULT,
+        time_stop_bars=TIME_STOP_BARS,
+    )
+    return VolumeSlopeStrategy(), policy
+
+
+def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> tuple:
+    strategy, policy = build_backtest()
+    return run_strategy(strategy, policy, df, initial_balance)
 
 
 def fetch_ohlcv(symbol: str = SYMBOL, timeframe: str = TIMEFRAME, limit: int = 500) -> pd.DataFrame:
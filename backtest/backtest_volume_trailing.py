@@ -23,11 +23,13 @@ import math
 from pathlib import Path
 
 import pandas as pd
-import numpy as np
 
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
 
+from modules.module_indicators import calc_atr_series, calc_adx_series, calc_rolling_max, calc_rolling_min
+from backtest.engine import BarStrategy, ExitPolicy, atr_or_fallback, new_position, run_strategy
+
 # === 타임프레임 ===
 TIMEFRAME = "1h"
 LEVERAGE = 3
@@ -63,270 +65,65 @@ def calc_buy_unit(total_balance: float) -> int:
     return max(math.floor(base_amount), MIN_BUY_UNIT)
 
 
-def calc_atr_series(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-    prev_close = close.shift(1)
-    tr1 = high - low
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    return tr.ewm(span=period, adjust=False).mean()
-
-
-def calc_adx_series(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-    """ADX (Average Directional Index) 계산"""
-    prev_high = high.shift(1)
-    prev_low = low.shift(1)
-    prev_close = close.shift(1)
+class BreakoutAdxStrategy(BarStrategy):
+    indicator_params = ("ATR_PERIOD", "ADX_PERIOD", "BREAKOUT_PERIOD")
 
-    tr1 = high - low
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    def buy_unit(self, balance: float) -> int:
+        return calc_buy_unit(balance)
 
-    up_move = high - prev_high
-    down_move = prev_low - low
-    dm_plus = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
-    dm_minus = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    def prepare(self, df: pd.DataFrame):
+        self.warmup = max(ATR_PERIOD * 2, BREAKOUT_PERIOD + 1)
+        close = df["close"].astype(float)
+        high_s = df["high"].astype(float)
+        low_s = df["low"].astype(float)
 
-    dm_plus_s = pd.Series(dm_plus, index=close.index)
-    dm_minus_s = pd.Series(dm_minus, index=close.index)
+        self.atr = atr_or_fallback(calc_atr_series(high_s, low_s, close, ATR_PERIOD), close).tolist()
+        self.adx = calc_adx_series(high_s, low_s, close, ADX_PERIOD).tolist()
 
-    atr_s = tr.ewm(span=period, adjust=False).mean()
-    di_plus = 100 * dm_plus_s.ewm(span=period, adjust=False).mean() / atr_s
-    di_minus = 100 * dm_minus_s.ewm(span=period, adjust=False).mean() / atr_s
+        # 직전 N봉 최고/최저 (현재 봉 제외: i번째 값 = i-1번째 봉에서 끝나는 창)
+        self.breakout_high = [math.nan] + calc_rolling_max(high_s, BREAKOUT_PERIOD)[:-1].tolist()
+        self.breakout_low = [math.nan] + calc_rolling_min(low_s, BREAKOUT_PERIOD)[:-1].tolist()
 
-    dx = 100 * (di_plus - di_minus).abs() / (di_plus + di_minus).replace(0, np.nan)
-    adx = dx.ewm(span=period, adjust=False).mean()
-    return adx
-
-
-def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> tuple:
-    df = df.copy()
-    df.columns = [c.lower() for c in df.columns]
-    if "timestamp" not in df.columns and df.index.name != "timestamp":
-        df = df.reset_index()
-
-    close = df["close"].astype(float)
-    high_s = df["high"].astype(float)
-    low_s = df["low"].astype(float)
-    open_s = df["open"].astype(float)
-
-    atr_series = calc_atr_series(high_s, low_s, close, ATR_PERIOD)
-    adx_series = calc_adx_series(high_s, low_s, close, ADX_PERIOD)
-
-    # 직전 N봉 최고/최저 (현재 봉 제외: shift(1) 후 rolling)
-    breakout_high = high_s.shift(1).rolling(BREAKOUT_PERIOD).max()
-    breakout_low = low_s.shift(1).rolling(BREAKOUT_PERIOD).min()
-
-    balance = initial_balance
-    position = None
-    trades = []
-    equity = [initial_balance]
-
-    min_bars = max(ATR_PERIOD * 2, BREAKOUT_PERIOD + 1)
-
-    for i in range(min_bars, len(df)):
-        row = df.iloc[i]
-        ts = row.get("timestamp", df.index[i])
-        h = high_s.iloc[i]
-        l = low_s.iloc[i]
-        c = close.iloc[i]
-
-        atr = atr_series.iloc[i]
-        if pd.isna(atr) or atr <= 0:
-            atr = c * 0.01
-
-        adx = adx_series.iloc[i]
-        bo_high = breakout_high.iloc[i]
-        bo_low = breakout_low.iloc[i]
-
-        buy_unit = calc_buy_unit(balance)
-
-        # ===== 포지션 관리 =====
-        if position is not None:
-            side = position["side"]
-            entry_price = position["entry_price"]
-            size = position["size"]
-            sl_price = position["sl_price"]
-
-            position["bars_open"] += 1
-
-            # 트레일링 best_price 갱신
-            if position["trailing_active"]:
-                if side == "long":
-                    position["best_price"] = max(position["best_price"], h)
-                else:
-                    position["best_price"] = min(position["best_price"], l)
-
-            # 타임스탑: 24봉 경과 + 수익 없으면 강제 청산
-            if not position["trailing_active"] and position["bars_open"] >= TIME_STOP_BARS:
-                if (side == "long" and c <= entry_price) or \
-                   (side == "short" and c >= entry_price):
-                    pnl = size * (c - entry_price) if side == "long" else size * (entry_price - c)
-                    pnl -= size * (entry_price + c) * COMMISSION_RATE
-                    balance += pnl
-                    trades.append({
-                        "timestamp": ts, "side": side, "exit_reason": "TIME_STOP",
-                        "entry_price": entry_price, "exit_price": c,
-                        "pnl": pnl, "balance_after": balance,
-                    })
-                    position = None
-                    equity.append(balance)
-                    continue
-
-            # 손절 체크
-            if side == "long" and l <= sl_price:
-                pnl = size * (sl_price - entry_price)
-                pnl -= size * (entry_price + sl_price) * COMMISSION_RATE
-                balance += pnl
-                trades.append({
-                    "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                    "entry_price": entry_price, "exit_price": sl_price,
-                    "pnl": pnl, "balance_after": balance,
-                })
-                position = None
-                equity.append(balance)
-                continue
-            elif side == "short" and h >= sl_price:
-                pnl = size * (entry_price - sl_price)
-                pnl -= size * (entry_price + sl_price) * COMMISSION_RATE
-                balance += pnl
-                trades.append({
-                    "timestamp": ts, "side": side, "exit_reason": "STOP_LOSS",
-                    "entry_price": entry_price, "exit_price": sl_price,
-                    "pnl": pnl, "balance_after": balance,
-                })
-                position = None
-                equity.append(balance)
-                continue
-
-            # 부분 익절 (+5%, 25% 청산)
-            if not position["partial_taken"]:
-                if side == "long":
-                    partial_tp = entry_price * (1 + PARTIAL_TP_PCT)
-                    if h >= partial_tp:
-                        partial_size = size * PARTIAL_TP_RATIO
-                        pnl = partial_size * (partial_tp - entry_price)
-                        pnl -= partial_size * (entry_price + partial_tp) * COMMISSION_RATE
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "PARTIAL_TP",
-                            "entry_price": entry_price, "exit_price": partial_tp,
-                            "pnl": pnl, "balance_after": balance,
-                        })
-                        position["size"] = size - partial_size
-                        position["partial_taken"] = True
-                        position["trailing_active"] = True
-                        position["best_price"] = h
-                        position["sl_price"] = entry_price
-                else:
-                    partial_tp = entry_price * (1 - PARTIAL_TP_PCT)
-                    if l <= partial_tp:
-                        partial_size = size * PARTIAL_TP_RATIO
-                        pnl = partial_size * (entry_price - partial_tp)
-                        pnl -= partial_size * (entry_price + partial_tp) * COMMISSION_RATE
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "PARTIAL_TP",
-                            "entry_price": entry_price, "exit_price": partial_tp,
-                            "pnl": pnl, "balance_after": balance,
-                        })
-                        position["size"] = size - partial_size
-                        position["partial_taken"] = True
-                        position["trailing_active"] = True
-                        position["best_price"] = l
-                        position["sl_price"] = entry_price
-
-            # 트레일링 스탑
-            if position is not None and position["trailing_active"]:
-                trail_atr = atr * TRAILING_STOP_ATR_MULT
-                remaining_size = position["size"]
-                if side == "long":
-                    trail_sl = position["best_price"] - trail_atr
-                    if l <= trail_sl:
-                        pnl = remaining_size * (trail_sl - entry_price)
-                        pnl -= remaining_size * (entry_price + trail_sl) * COMMISSION_RATE
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "TRAILING_STOP",
-                            "entry_price": entry_price, "exit_price": trail_sl,
-                            "pnl": pnl, "balance_after": balance,
-                        })
-                        position = None
-                        equity.append(balance)
-                        continue
-                else:
-                    trail_sl = position["best_price"] + trail_atr
-                    if h >= trail_sl:
-                        pnl = remaining_size * (entry_price - trail_sl)
-                        pnl -= remaining_size * (entry_price + trail_sl) * COMMISSION_RATE
-                        balance += pnl
-                        trades.append({
-                            "timestamp": ts, "side": side, "exit_reason": "TRAILING_STOP",
-                            "entry_price": entry_price, "exit_price": trail_sl,
-                            "pnl": pnl, "balance_after": balance,
-                        })
-                        position = None
-                        equity.append(balance)
-                        continue
-
-            equity.append(balance)
-            continue
-
-        # ===== 진입 판단: 돌파 + ADX 필터 =====
-        if balance < buy_unit:
-            equity.append(balance)
-            continue
-
-        if pd.isna(adx) or adx < ADX_MIN:
-            equity.append(balance)
-            continue
-
-        if pd.isna(bo_high) or pd.isna(bo_low):
-            equity.append(balance)
-            continue
+    def entry(self, i, o, h, l, c, buy_unit):
+        # 돌파 + ADX 필터
+        adx = self.adx[i]
+        if math.isnan(adx) or adx < ADX_MIN:
+            return None
+        bo_high = self.breakout_high[i]
+        bo_low = self.breakout_low[i]
+        if math.isnan(bo_high) or math.isnan(bo_low):
+            return None
 
         size = buy_unit * LEVERAGE / c
-
+        atr = self.atr[i]
         if c > bo_high:
             # 상단 돌파 → Long
             sl_price = c - atr * INITIAL_SL_ATR_MULT
             if (c - sl_price) / c <= MAX_SL_PCT:
-                position = {
-                    "side": "long", "entry_price": c, "size": size,
-                    "sl_price": sl_price, "partial_taken": False,
-                    "trailing_active": False, "best_price": c, "bars_open": 0,
-                }
+                return new_position("long", c, size, sl_price)
         elif c < bo_low:
             # 하단 돌파 → Short
             sl_price = c + atr * INITIAL_SL_ATR_MULT
             if (sl_price - c) / c <= MAX_SL_PCT:
-                position = {
-                    "side": "short", "entry_price": c, "size": size,
-                    "sl_price": sl_price, "partial_taken": False,
-                    "trailing_active": False, "best_price": c, "bars_open": 0,
-                }
-
-        equity.append(balance)
-
-    # 마지막 포지션 청산
-    if position is not None:
-        last = df.iloc[-1]
-        c = float(last["close"])
-        ts = last.get("timestamp", df.index[-1])
-        side = position["side"]
-        entry_price = position["entry_price"]
-        size = position["size"]
-        pnl = size * (c - entry_price) if side == "long" else size * (entry_price - c)
-        pnl -= size * (entry_price + c) * COMMISSION_RATE
-        balance += pnl
-        trades.append({
-            "timestamp": ts, "side": side, "exit_reason": "END_OF_DATA",
-            "entry_price": entry_price, "exit_price": c,
-            "pnl": pnl, "balance_after": balance,
-        })
-
-    return trades, pd.Series(equity), balance
+                return new_position("short", c, size, sl_price)
+        return None
+
+
+def build_backtest() -> tuple:
+    """현재 모듈 상수로 (전략, 청산 정책) 생성 - run_backtest / sweep 공용"""
+    policy = ExitPolicy(
+        partial_tp_pct=PARTIAL_TP_PCT,
+        partial_tp_ratio=PARTIAL_TP_RATIO,
+        trailing_atr_mult=TRAILING_STOP_ATR_MULT,
+        time_stop_bars=TIME_STOP_BARS,
+        commission_rate=COMMISSION_RATE,
+    )
+    return BreakoutAdxStrategy(), policy
+
+
+def run_backtest(df: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> tuple:
+    strategy, policy = build_backtest()
+    return run_strategy(strategy, policy, df, initial_balance)
 
 
 def fetch_ohlcv(symbol: str = SYMBOL, timeframe: str = TIMEFRAME, limit: int = 500) -> pd.DataFrame:
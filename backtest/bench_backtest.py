@@ -0,0 +1,117 @@
+"""
+백테스트 봉 루프 벤치마크 (봉/초)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+비교 대상:
+  - iloc  : 봉마다 row = df.iloc[i] 로 OHLC/timestamp를 읽는 기존 방식
+  - array : 루프 전에 OHLC를 float64 배열로 한 번 추출하는 현재 엔진 (BacktestEngine)
+두 방식의 거래 내역/잔고가 같은지도 함께 확인
+
+실행:
+  python backtest/bench_backtest.py --bars 50000 --repeat 3
+  python backtest/bench_backtest.py --csv data.csv
+"""
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backtest import engine
+from backtest.bench_indicators import synthetic_ohlcv
+
+STRATEGIES = [
+    "backtest_bb_scalp",
+    "backtest_random_entry",
+    "backtest_v3_stochrsi",
+    "backtest_volume_trailing",
+    "backtest_volume_slope",
+    "backtest_volume_contrarian",
+    "trailing_atr",
+]
+
+
+class IlocEngine(engine.BacktestEngine):
+    """기존 방식: 봉마다 df.iloc 행 접근 (비교 기준)"""
+
+    def run(self, df: pd.DataFrame) -> tuple:
+        strategy = self.strategy
+        strategy.prepare(df)
+        self._timestamps = df["timestamp"] if "timestamp" in df.columns else df.index.to_series()
+
+        for i in range(strategy.warmup, len(df)):
+            row = df.iloc[i]
+            row.get("timestamp", df.index[i])
+            o, h, l, c = float(row["open"]), float(row["high"]), float(row["low"]), float(row["close"])
+
+            buy_unit = strategy.buy_unit(self.balance)
+            if self.position is not None:
+                self._manage(i, h, l, c, buy_unit)
+            elif self.balance >= buy_unit:
+                self.position = strategy.entry(i, o, h, l, c, buy_unit)
+            self.equity.append(self.balance)
+
+        if self.position is not None:
+            self.close(len(df) - 1, "END_OF_DATA", float(df.iloc[-1]["close"]))
+        return self.trades, pd.Series(self.equity), self.balance
+
+
+def _run(module_name: str, df: pd.DataFrame, engine_cls) -> tuple:
+    """engine_cls로 바꿔 끼운 상태에서 run_backtest 1회 실행 → (결과, 소요 시간)"""
+    module = __import__(f"backtest.{module_name}", fromlist=["run_backtest"])
+    original = engine.BacktestEngine
+    engine.BacktestEngine = engine_cls
+    try:
+        t0 = time.perf_counter()
+        result = module.run_backtest(df)
+        return result, time.perf_counter() - t0
+    finally:
+        engine.BacktestEngine = original
+
+
+def run_bench(df: pd.DataFrame, repeat: int = 3):
+    bars = len(df)
+    print("\n" + "=" * 60)
+    print(f"  백테스트 봉 루프 벤치마크: {bars:,} bars, best of {repeat}")
+    print("=" * 60)
+    print(f"  {'strategy':28s}{'iloc':>12s}{'array':>12s}{'speedup':>9s}")
+    total = {"iloc": 0.0, "array": 0.0}
+    for name in STRATEGIES:
+        _run(name, df, engine.BacktestEngine)   # numba JIT 워밍업
+        best = {}
+        results = {}
+        for label, engine_cls in (("iloc", IlocEngine), ("array", engine.BacktestEngine)):
+            best[label] = float("inf")
+            for _ in range(repeat):
+                results[label], elapsed = _run(name, df, engine_cls)
+                best[label] = min(best[label], elapsed)
+            total[label] += best[label]
+        same = results["iloc"][0] == results["array"][0] and results["iloc"][2] == results["array"][2]
+        print(f"  {name:28s}{bars / best['iloc'] / 1e3:>8.1f} k/s{bars / best['array'] / 1e3:>8.1f} k/s"
+              f"{best['iloc'] / best['array']:>8.1f}x" + ("" if same else "  (결과 불일치!)"))
+    print(f"  {'total':28s}{bars * len(STRATEGIES) / total['iloc'] / 1e3:>8.1f} k/s"
+          f"{bars * len(STRATEGIES) / total['array'] / 1e3:>8.1f} k/s{total['iloc'] / total['array']:>8.1f}x")
+    print("=" * 60 + "\n")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="백테스트 봉 루프 벤치마크 (df.iloc vs float64 배열)")
+    parser.add_argument("--bars", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--csv", type=str, default="", help="CSV 파일 경로 (open,high,low,close,volume 컬럼)")
+    args = parser.parse_args()
+
+    if args.csv:
+        df = pd.read_csv(args.csv)
+        if "timestamp" in df.columns:
+            df["timestamp"] = pd.to_datetime(df["timestamp"])
+    else:
+        df = synthetic_ohlcv(args.bars)
+    run_bench(df, repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
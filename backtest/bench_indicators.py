@@ -0,0 +1,329 @@
+"""
+지표 계산 벤치마크 (봉/초)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+비교 대상:
+  - pandas  : 기존 모듈 방식 (module_ema / module_rsi, ATR/ADX는 pd.concat + ewm)
+  - numpy   : module_indicators NumPy 커널 (블록 선형 점화식)
+  - numba   : module_indicators JIT 루프 (numba 설치 시에만)
+
+유니버스 모드 (--symbols N): 심볼별 pandas 호출 반복 vs (심볼 × 봉) 행렬 1회 계산
+스트리밍 검증 (--streaming): module_stream_indicators 증분 지표(update / revise_last / peek) vs pandas 기준값
+
+실행:
+  python backtest/bench_indicators.py --bars 20000 --repeat 20
+  python backtest/bench_indicators.py --csv data.csv
+  python backtest/bench_indicators.py --symbols 100 --bars 200
+  python backtest/bench_indicators.py --streaming --bars 5000
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from modules import module_indicators as ind
+from modules import module_stream_indicators as stream
+from modules.module_ema import calc_ema
+from modules.module_ma import calc_ma, calc_ma_slope_series
+
+EMA_FAST = 20
+EMA_SLOW = 120
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+ADX_PERIOD = 14
+STREAM_WINDOWS = (1, 3, 14, 50)   # 스트리밍 rolling 극값 검증 창 길이
+STREAM_MA_SLOPES = ((40, 5), (120, 5))   # 스트리밍 MA 기울기 검증 (period, lookback) - get_ma_signals와 동일
+STREAM_NAN_RATE = 0.01            # 스트리밍 검증용 NaN 주입 비율 (창 안 NaN → NaN 전파 확인)
+
+
+# =========================================================
+#  pandas 기준 구현 (기존 모듈/백테스트에 있던 계산 그대로)
+# =========================================================
+def _pd_true_range(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    prev_close = close.shift(1)
+    tr1 = high - low
+    tr2 = (high - prev_close).abs()
+    tr3 = (low - prev_close).abs()
+    return pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+
+
+def pd_rsi(close: pd.Series, period: int = RSI_PERIOD) -> pd.Series:
+    delta = close.diff()
+    gains = delta.clip(lower=0)
+    losses = (-delta).clip(lower=0)
+    _gain = gains.ewm(com=(period - 1), min_periods=period).mean()
+    _loss = losses.ewm(com=(period - 1), min_periods=period).mean()
+    rs = _gain / _loss.replace(0, np.nan)
+    return 100 - (100 / (1 + rs))
+
+
+def pd_atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = ATR_PERIOD) -> pd.Series:
+    return _pd_true_range(high, low, close).ewm(span=period, adjust=False).mean()
+
+
+def pd_adx(high: pd.Series, low: pd.Series, close: pd.Series, period: int = ADX_PERIOD) -> pd.Series:
+    up_move = high - high.shift(1)
+    down_move = low.shift(1) - low
+    dm_plus = pd.Series(np.where((up_move > down_move) & (up_move > 0), up_move, 0.0), index=high.index)
+    dm_minus = pd.Series(np.where((down_move > up_move) & (down_move > 0), down_move, 0.0), index=high.index)
+    atr = pd_atr(high, low, close, period)
+    di_plus = 100 * dm_plus.ewm(span=period, adjust=False).mean() / atr
+    di_minus = 100 * dm_minus.ewm(span=period, adjust=False).mean() / atr
+    dx = 100 * (di_plus - di_minus).abs() / (di_plus + di_minus).replace(0, np.nan)
+    return dx.ewm(span=period, adjust=False).mean()
+
+
+def pandas_suite(df: pd.DataFrame) -> dict:
+    close, high, low = df["close"], df["high"], df["low"]
+    return {
+        "ema20": calc_ema(close, EMA_FAST).to_numpy(),
+        "ema120": calc_ema(close, EMA_SLOW).to_numpy(),
+        "rsi": pd_rsi(close).to_numpy(),
+        "atr": pd_atr(high, low, close).to_numpy(),
+        "adx": pd_adx(high, low, close).to_numpy(),
+    }
+
+
+def array_suite(df: pd.DataFrame) -> dict:
+    close, high, low = df["close"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy()
+    return {
+        "ema20": ind.calc_ema_series(close, EMA_FAST),
+        "ema120": ind.calc_ema_series(close, EMA_SLOW),
+        "rsi": ind.calc_rsi_series(close, RSI_PERIOD),
+        "atr": ind.calc_atr_series(high, low, close, ATR_PERIOD),
+        "adx": ind.calc_adx_series(high, low, close, ADX_PERIOD),
+    }
+
+
+# =========================================================
+#  측정
+# =========================================================
+def synthetic_ohlcv(bars: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, bars)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.003, bars)) * close
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.lognormal(10, 1, bars),
+    })
+
+
+def _best_time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _timed(df: pd.DataFrame, names, suite, repeat: int) -> dict:
+    """지표별 최소 소요 시간 (초)"""
+    close, high, low = df["close"], df["high"], df["low"]
+    arrays = close.to_numpy(), high.to_numpy(), low.to_numpy()
+    if suite == "pandas":
+        calls = {
+            "ema20": lambda: calc_ema(close, EMA_FAST),
+            "ema120": lambda: calc_ema(close, EMA_SLOW),
+            "rsi": lambda: pd_rsi(close),
+            "atr": lambda: pd_atr(high, low, close),
+            "adx": lambda: pd_adx(high, low, close),
+        }
+    else:
+        c, h, l = arrays
+        calls = {
+            "ema20": lambda: ind.calc_ema_series(c, EMA_FAST),
+            "ema120": lambda: ind.calc_ema_series(c, EMA_SLOW),
+            "rsi": lambda: ind.calc_rsi_series(c, RSI_PERIOD),
+            "atr": lambda: ind.calc_atr_series(h, l, c, ATR_PERIOD),
+            "adx": lambda: ind.calc_adx_series(h, l, c, ADX_PERIOD),
+        }
+    return {name: _best_time(calls[name], repeat) for name in names}
+
+
+def _max_rel_diff(a: np.ndarray, b: np.ndarray) -> float:
+    both = ~np.isnan(a) & ~np.isnan(b)
+    if (np.isnan(a) != np.isnan(b)).any():
+        return float("inf")
+    if not both.any():
+        return 0.0
+    return float(np.max(np.abs(a[both] - b[both]) / np.maximum(np.abs(b[both]), 1e-12)))
+
+
+def _max_scaled_diff(a: np.ndarray, b: np.ndarray) -> float:
+    """기준값 최대 크기 대비 최대 오차 (기울기처럼 0 근처 값이 많아 원소별 상대 오차가 무의미한 지표용)"""
+    if (np.isnan(a) != np.isnan(b)).any():
+        return float("inf")
+    both = ~np.isnan(b)
+    if not both.any():
+        return 0.0
+    return float(np.max(np.abs(a[both] - b[both])) / max(np.max(np.abs(b[both])), 1e-12))
+
+
+def _polyfit_slopes(y: np.ndarray, lookback: int) -> np.ndarray:
+    """봉마다 np.polyfit(range(lookback), 최근 lookback개, 1)[0] (module_ma 기존 구현과 같은 정의)"""
+    out = np.full(len(y), np.nan)
+    windows = np.lib.stride_tricks.sliding_window_view(y, lookback)
+    valid = ~np.isnan(windows).any(axis=1)
+    out[lookback - 1:][valid] = np.polyfit(np.arange(lookback), windows[valid].T, 1)[0]
+    return out
+
+
+def run_bench(df: pd.DataFrame, repeat: int = 20):
+    names = ["ema20", "ema120", "rsi", "atr", "adx"]
+    backends = ["numpy"] + (["numba"] if ind.numba is not None else [])
+    reference = pandas_suite(df)
+    timings = {"pandas": _timed(df, names, "pandas", repeat)}
+    diffs = {}
+    original = ind.BACKEND
+    try:
+        for backend in backends:
+            ind.set_backend(backend)
+            result = array_suite(df)   # 결과 비교 + numba JIT 워밍업
+            diffs[backend] = max(_max_rel_diff(result[n], reference[n]) for n in names)
+            timings[backend] = _timed(df, names, backend, repeat)
+    finally:
+        ind.set_backend(original)
+
+    bars = len(df)
+    print("\n" + "=" * 60)
+    print(f"  지표 계산 벤치마크: {bars:,} bars, best of {repeat}")
+    print("=" * 60)
+    header = f"  {'indicator':10s}" + "".join(f"{b:>16s}" for b in timings) + f"{'speedup':>10s}"
+    print(header)
+    for name in names:
+        row = f"  {name:10s}"
+        for backend in timings:
+            row += f"{bars / timings[backend][name] / 1e6:>12.2f} M/s"
+        best = min(timings[b][name] for b in backends)
+        row += f"{timings['pandas'][name] / best:>9.1f}x"
+        print(row)
+    total = {b: sum(t.values()) for b, t in timings.items()}
+    row = f"  {'total':10s}"
+    for backend in timings:
+        row += f"{bars / total[backend] / 1e6:>12.2f} M/s"
+    row += f"{total['pandas'] / min(total[b] for b in backends):>9.1f}x"
+    print(row)
+    for backend, diff in diffs.items():
+        print(f"  {backend} vs pandas 최대 상대 오차: {diff:.2e}")
+    if ind.numba is None:
+        print("  (numba 미설치 → numba 백엔드 생략: pip install numba)")
+    print("=" * 60 + "\n")
+    return timings
+
+
+def run_universe_bench(symbols: int, bars: int, repeat: int = 20):
+    """EMA20/EMA120/RSI/ATR (라이브 전략 지표 세트): 심볼별 pandas 반복 vs 2-D 일괄 계산"""
+    frames = [synthetic_ohlcv(bars, seed=i) for i in range(symbols)]
+
+    def per_symbol():
+        for df in frames:
+            close, high, low = df["close"], df["high"], df["low"]
+            calc_ema(close, EMA_FAST), calc_ema(close, EMA_SLOW)
+            pd_rsi(close), pd_atr(high, low, close)
+
+    def batched():
+        close = ind.stack_aligned([df["close"].to_numpy() for df in frames])
+        high = ind.stack_aligned([df["high"].to_numpy() for df in frames])
+        low = ind.stack_aligned([df["low"].to_numpy() for df in frames])
+        ind.calc_ema_series(close, EMA_FAST), ind.calc_ema_series(close, EMA_SLOW)
+        ind.calc_rsi_series(close, RSI_PERIOD), ind.calc_atr_series(high, low, close, ATR_PERIOD)
+
+    batched()   # numba JIT 워밍업
+    t_loop = _best_time(per_symbol, repeat)
+    t_batch = _best_time(batched, repeat)
+    print("\n" + "=" * 60)
+    print(f"  유니버스 벤치마크: {symbols} symbols x {bars} bars, best of {repeat} ({ind.BACKEND})")
+    print("=" * 60)
+    print(f"  심볼별 pandas : {t_loop * 1000:8.2f} ms")
+    print(f"  2-D 일괄 계산 : {t_batch * 1000:8.2f} ms  ({t_loop / t_batch:.1f}x)")
+    print("=" * 60 + "\n")
+
+
+def _stream_paths(make, bars: np.ndarray, noise: np.ndarray) -> tuple:
+    """
+    봉마다 진행 중 값(noise)으로 update → 마감 값으로 revise_last 한 결과와,
+    다음 봉을 peek으로 미리 계산한 결과 (둘 다 마감 값 기준 시리즈와 같아야 함)
+    """
+    indicator = make()
+    revised, peeked = [], []
+    for bar, forming in zip(bars, noise):
+        peeked.append(indicator.peek(bar)[-1])
+        indicator.update(forming)
+        revised.append(indicator.revise_last(bar))
+    return np.array(revised), np.array(peeked)
+
+
+def run_streaming_check(df: pd.DataFrame, seed: int = 0) -> bool:
+    """스트리밍 지표 vs pandas: 봉 단위 경로(update/revise_last/peek) 결과가 기준값과 일치하는지"""
+    rng = np.random.default_rng(seed)
+    bars = df[["open", "high", "low", "close"]].to_numpy(dtype=float)
+    bars = np.column_stack([np.arange(len(bars)), bars, np.zeros(len(bars))])   # [ts, o, h, l, c, v]
+    bars[rng.random(len(bars)) < STREAM_NAN_RATE, stream.HIGH] = np.nan
+    bars[rng.random(len(bars)) < STREAM_NAN_RATE, stream.LOW] = np.nan
+    noise = bars.copy()
+    noise[:, 1:5] *= 1 + rng.normal(0, 0.01, (len(bars), 4))
+    high, low = pd.Series(bars[:, stream.HIGH]), pd.Series(bars[:, stream.LOW])
+
+    checks = []
+    for window in STREAM_WINDOWS:
+        checks.append((f"rolling_max({window})", lambda w=window: stream.StreamingRollingMax(w),
+                       high.rolling(window).max().to_numpy()))
+        checks.append((f"rolling_min({window})", lambda w=window: stream.StreamingRollingMin(w),
+                       low.rolling(window).min().to_numpy()))
+    frame = pd.DataFrame({"close": bars[:, stream.CLOSE]})
+    for period, lookback in STREAM_MA_SLOPES:
+        make = lambda p=period, lb=lookback: stream.StreamingMaSlope(p, lb)
+        checks.append((f"ma_slope({period},{lookback})", make,
+                       calc_ma_slope_series(frame, period, lookback).to_numpy()))
+        checks.append((f"  vs np.polyfit", make, _polyfit_slopes(calc_ma(frame, period).to_numpy(), lookback)))
+
+    print("\n" + "=" * 60)
+    print(f"  스트리밍 지표 검증: {len(bars):,} bars (고가/저가 NaN {STREAM_NAN_RATE:.0%} 주입, 오차는 기준값 최대 크기 대비)")
+    print("=" * 60)
+    ok = True
+    for name, make, expected in checks:
+        t0 = time.perf_counter()
+        revised, peeked = _stream_paths(make, bars, noise)
+        elapsed = time.perf_counter() - t0
+        diff = max(_max_scaled_diff(revised, expected), _max_scaled_diff(peeked, expected))
+        ok &= diff <= 1e-9
+        print(f"  {name:18s} 최대 오차 {diff:.2e}  {len(bars) / elapsed / 1e3:8.1f} k bars/s")
+    print(f"  결과: {'OK' if ok else '불일치!'}")
+    print("=" * 60 + "\n")
+    return ok
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="지표 계산 벤치마크 (pandas vs NumPy vs numba)")
+    parser.add_argument("--bars", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--csv", type=str, default="", help="CSV 파일 경로 (open,high,low,close 컬럼)")
+    parser.add_argument("--symbols", type=int, default=0, help="N > 0이면 N개 심볼 유니버스 일괄 계산 벤치마크")
+    parser.add_argument("--streaming", action="store_true", help="스트리밍 증분 지표 vs pandas 결과 검증")
+    args = parser.parse_args()
+
+    if args.symbols > 0:
+        run_universe_bench(args.symbols, args.bars, repeat=args.repeat)
+        return
+
+    if args.csv:
+        df = pd.read_csv(args.csv)
+    else:
+        df = synthetic_ohlcv(args.bars)
+    if args.streaming:
+        sys.exit(0 if run_streaming_check(df[["open", "high", "low", "close"]].astype(float)) else 1)
+    run_bench(df[["open", "high", "low", "close"]].astype(float), repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+백테스트 공용 엔진 (봉 단위 이벤트 루프 + 공용 청산 정책)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+전략 플러그인 (BarStrategy 상속):
+  - buy_unit(balance)        : 진입 증거금 (USDT)
+  - prepare(df)              : 지표/신호 배열을 한 번에 계산 (루프 전 1회)
+                               봉 루프에서 읽는 배열은 .tolist()로 변환해 둠 (ndarray 원소 접근보다 빠름)
+  - entry(i, o, h, l, c, buy_unit) : 포지션 없을 때 봉마다 호출 → 포지션 dict 또는 None
+  - manage(engine, i, h, l, c, buy_unit) : (선택) 청산 정책 중간에 끼우는 전략 고유 관리 (물타기 등)
+                                          → 청산 시 (사유, 가격), 아니면 None
+
+청산 정책 (ExitPolicy) 봉마다 적용 순서:
+  1. 타임스탑     : time_stop_bars 경과 + 트레일링 전 + 수익 없음 → 종가 청산
+  2. 트레일링 갱신 : best_price = max(high) / min(low)
+  3. strategy.manage
+  4. 손절 (stop_first=True일 때)
+  5. 부분 익절    : position["partial_tp"] 가격 또는 진입가 ± partial_tp_pct → 일부 청산 + SL 본전
+  6. 전체 익절    : position["tp_price"]
+  7. 손절 (stop_first=False일 때 - 익절 우선)
+  8. 트레일링 스탑 : best_price ∓ ATR × trailing_atr_mult
+
+포지션 dict 키:
+  side, entry_price, size, sl_price, partial_taken, trailing_active, best_price, bars_open
+  (선택) tp_price, partial_tp, sl_reason(손절 사유 이름), 그 외 전략 필드
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class ExitPolicy:
+    stop_first: bool = True                      # False면 같은 봉에서 익절을 손절보다 먼저 확인
+    partial_tp_pct: Optional[float] = None       # 진입가 대비 부분 익절 거리 (position["partial_tp"]가 있으면 그 가격 우선)
+    partial_tp_ratio: float = 0.5                # 부분 익절 비율
+    trailing_atr_mult: Optional[float] = None    # 부분 익절 후 트레일링 스탑 (None이면 트레일링 없음)
+    time_stop_bars: Optional[int] = None         # N봉 경과 후 수익 없으면 강제 청산
+    commission_rate: float = 0.0                 # 편도 수수료 (진입 + 청산 양쪽 차감)
+
+
+class BarStrategy:
+    """백테스트 전략 플러그인 기본 클래스"""
+    warmup = 0             # 루프 시작 봉 index
+    trade_fields = ()      # 포지션에서 거래 기록으로 복사할 추가 필드
+    indicator_params = ()  # prepare()가 읽는 모듈 상수 이름 (sweep이 같은 값 조합끼리 지표를 공유하는 기준)
+    atr = None             # 트레일링 스탑용 ATR 리스트 (prepare에서 설정)
+
+    def prepare(self, df: pd.DataFrame):
+        pass
+
+    def buy_unit(self, balance: float) -> int:
+        raise NotImplementedError
+
+    def entry(self, i: int, o: float, h: float, l: float, c: float, buy_unit: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    def manage(self, engine, i: int, h: float, l: float, c: float, buy_unit: int):
+        return None
+
+
+def new_position(side: str, price: float, size: float, sl_price: float, **fields) -> dict:
+    position = {
+        "side": side, "entry_price": price, "size": size, "sl_price": sl_price,
+        "partial_taken": False, "trailing_active": False, "best_price": price, "bars_open": 0,
+    }
+    position.update(fields)
+    return position
+
+
+def atr_or_fallback(atr: np.ndarray, close) -> np.ndarray:
+    """ATR이 NaN/0 이하인 봉은 가격의 1%로 대체"""
+    close = np.asarray(close, dtype=float)
+    return np.where(np.isnan(atr) | (atr <= 0), close * 0.01, atr)
+
+
+def normalize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df.columns = [c.lower() for c in df.columns]
+    if "timestamp" not in df.columns and df.index.name != "timestamp":
+        df = df.reset_index()
+    return df
+
+
+class BacktestEngine:
+    def __init__(self, strategy: BarStrategy, policy: ExitPolicy, initial_balance: float):
+        self.strategy = strategy
+        self.policy = policy
+        self.balance = initial_balance
+        self.position: Optional[dict] = None
+        self.trades: list = []
+        self.equity: list = [initial_balance]
+
+    def run(self, df: pd.DataFrame, prepared: bool = False) -> tuple:
+        """
+        prepared=True면 strategy.prepare 생략 (sweep에서 미리 계산한 지표 상태를 주입한 경우)
+        Returns: (trades list, equity curve series, final_balance)
+        """
+        strategy = self.strategy
+        if not prepared:
+            strategy.prepare(df)
+
+        # OHLC는 루프 전에 float64 배열 → 파이썬 float 리스트로 한 번만 추출 (봉마다 df.iloc 접근 없음)
+        opens, highs, lows, closes = (df[col].to_numpy(dtype=np.float64).tolist()
+                                      for col in ("open", "high", "low", "close"))
+        # timestamp는 거래 기록 시에만 조회
+        self._timestamps = df["timestamp"] if "timestamp" in df.columns else df.index.to_series()
+
+        for i in range(strategy.warmup, len(closes)):
+            h, l, c = highs[i], lows[i], closes[i]
+            buy_unit = strategy.buy_unit(self.balance)
+
+            if self.position is not None:
+                self._manage(i, h, l, c, buy_unit)
+            elif self.balance >= buy_unit:
+                self.position = strategy.entry(i, opens[i], h, l, c, buy_unit)
+            self.equity.append(self.balance)
+
+        # 마지막 포지션 청산
+        if self.position is not None:
+            self.close(len(closes) - 1, "END_OF_DATA", closes[-1])
+
+        return self.trades, pd.Series(self.equity), self.balance
+
+    # =========================================================
+    #  청산 기록
+    # =========================================================
+    def _record(self, i: int, reason: str, exit_price: float, size: float):
+        position = self.position
+        side = position["side"]
+        entry_price = position["entry_price"]
+        pnl = size * (exit_price - entry_price) if side == "long" else size * (entry_price - exit_price)
+        if self.policy.commission_rate:
+            pnl -= size * (entry_price + exit_price) * self.policy.commission_rate
+        self.balance += pnl
+        trade = {
+            "timestamp": self._timestamps.iloc[i], "side": side, "exit_reason": reason,
+            "entry_price": entry_price, "exit_price": exit_price,
+            "pnl": pnl, "balance_after": self.balance,
+        }
+        for field in self.strategy.trade_fields:
+            trade[field] = position[field]
+        self.trades.append(trade)
+
+    def close(self, i: int, reason: str, exit_price: float):
+        self._record(i, reason, exit_price, self.position["size"])
+        self.position = None
+
+    def take_partial(self, i: int, exit_price: float, ratio: float):
+        position = self.position
+        partial_size = position["size"] * ratio
+        self._record(i, "PARTIAL_TP", exit_price, partial_size)
+        position["size"] = position["size"] - partial_size
+        position["partial_taken"] = True
+        position["sl_price"] = position["entry_price"]   # 본전 보장
+
+    # =========================================================
+    #  청산 정책
+    # =========================================================
+    def _manage(self, i: int, h: float, l: float, c: float, buy_unit: int):
+        policy = self.policy
+        position = self.position
+        long = position["side"] == "long"
+
+        position["bars_open"] += 1
+
+        # 1. 타임스탑: 일정 봉 동안 수익 없으면 강제 청산 (횡보 방지)
+        if policy.time_stop_bars is not None and not position["trailing_active"] \
+                and position["bars_open"] >= policy.time_stop_bars:
+            entry_price = position["entry_price"]
+            if (long and c <= entry_price) or (not long and c >= entry_price):
+                self.close(i, "TIME_STOP", c)
+                return
+
+        # 2. 트레일링 최고/최저 갱신
+        if position["trailing_active"]:
+            position["best_price"] = max(position["best_price"], h) if long else min(position["best_price"], l)
+
+        # 3. 전략 고유 관리
+        exit_ = self.strategy.manage(self, i, h, l, c, buy_unit)
+        if exit_ is not None:
+            self.close(i, *exit_)
+            return
+
+        # 4. 손절 (기본: 익절보다 먼저)
+        if policy.stop_first and self._stop_hit(i, long, h, l):
+            return
+
+        # 5. 부분 익절
+        if not position["partial_taken"]:
+            partial_tp = position.get("partial_tp")
+            if partial_tp is None and policy.partial_tp_pct is not None:
+                entry_price = position["entry_price"]
+                partial_tp = entry_price * (1 + policy.partial_tp_pct) if long \
+                    else entry_price * (1 - policy.partial_tp_pct)
+            if partial_tp is not None and ((long and h >= partial_tp) or (not long and l <= partial_tp)):
+                self.take_partial(i, partial_tp, policy.partial_tp_ratio)
+                if policy.trailing_atr_mult is not None:
+                    position["trailing_active"] = True
+                    position["best_price"] = h if long else l
+
+        # 6. 전체 익절
+        tp_price = position.get("tp_price")
+        if tp_price is not None and ((long and h >= tp_price) or (not long and l <= tp_price)):
+            self.close(i, "TAKE_PROFIT", tp_price)
+            return
+
+        # 7. 손절 (익절 우선 전략)
+        if not policy.stop_first and self._stop_hit(i, long, h, l):
+            return
+
+        # 8. 트레일링 스탑
+        if position["trailing_active"]:
+            trail_atr = self.strategy.atr[i] * policy.trailing_atr_mult
+            if long:
+                trail_sl = position["best_price"] - trail_atr
+                if l <= trail_sl:
+                    self.close(i, "TRAILING_STOP", trail_sl)
+            else:
+                trail_sl = position["best_price"] + trail_atr
+                if h >= trail_sl:
+                    self.close(i, "TRAILING_STOP", trail_sl)
+
+    def _stop_hit(self, i: int, long: bool, h: float, l: float) -> bool:
+        position = self.position
+        sl_price = position["sl_price"]
+        if (long and l <= sl_price) or (not long and h >= sl_price):
+            self.close(i, position.get("sl_reason", "STOP_LOSS"), sl_price)
+            return True
+        return False
+
+
+def run_strategy(strategy: BarStrategy, policy: ExitPolicy, df: pd.DataFrame, initial_balance: float) -> tuple:
+    return BacktestEngine(strategy, policy, initial_balance).run(normalize_ohlcv(df))
+
+
+def prepared_state(strategy: BarStrategy, df: pd.DataFrame) -> dict:
+    """prepare()가 새로 만든 속성만 반환 (같은 지표 파라미터의 다른 전략 인스턴스에 주입용)"""
+    before = set(vars(strategy))
+    strategy.prepare(df)
+    return {k: v for k, v in vars(strategy).items() if k not in before}
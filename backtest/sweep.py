@@ -0,0 +1,227 @@
+"""
+백테스트 파라미터 스윕 (프로세스 풀 병렬 실행)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+- 전략 모듈의 상수(모듈 전역)를 그리드로 바꿔가며 build_backtest() + 엔진 실행
+- 지표는 서로 다른 indicator_params 값 조합마다 1번만 계산 (부모 프로세스)
+  → 워커 초기화 때 한 번 전달, 같은 지표 조합의 모든 변형이 공유
+- 결과는 끝나는 대로 한 줄씩 출력 (현재 순위 포함), 마지막에 순위표 출력
+
+실행:
+  python backtest/sweep.py trailing_atr --csv data.csv \\
+      --grid PARTIAL_TP_PCT=0.02,0.03,0.05 --grid TRAILING_STOP_ATR_MULT=1.5,2,3 --grid RSI_PERIOD=9,14
+  python backtest/sweep.py backtest_v3_stochrsi --limit 1500 --grid STOCH_RSI_LONG_THRESHOLD=10,15,20 --sort mdd
+"""
+import importlib
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backtest.engine import BacktestEngine, normalize_ohlcv, prepared_state
+
+SWEEP_WORKERS = os.cpu_count() or 1
+SORT_KEYS = {                      # 정렬 기준 → 클수록 좋은지
+    "return": True,
+    "win_rate": True,
+    "mdd": True,                   # MDD는 음수 → 0에 가까울수록 좋음
+    "trades": True,
+}
+TOP_N = 20
+
+
+# =========================================================
+#  그리드
+# =========================================================
+def _cast(module, name: str, raw: str):
+    """문자열 값을 현재 모듈 상수와 같은 타입으로 변환"""
+    current = getattr(module, name)
+    if isinstance(current, bool):
+        return raw.lower() in ("1", "true", "yes")
+    if isinstance(current, int):
+        return int(raw)
+    if isinstance(current, float):
+        return float(raw)
+    return raw
+
+
+def parse_grid(module, specs: list) -> dict:
+    """["NAME=v1,v2", ...] → {NAME: [v1, v2]}"""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        if not name.isupper() or not hasattr(module, name):
+            raise ValueError(f"{module.__name__}에 없는 상수: {name}")
+        grid[name] = [_cast(module, name, v.strip()) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def expand_grid(grid: dict) -> list:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def indicator_key(module, strategy_cls, overrides: dict) -> tuple:
+    return tuple(overrides.get(name, getattr(module, name)) for name in strategy_cls.indicator_params)
+
+
+def _apply(module, overrides: dict):
+    for name, value in overrides.items():
+        setattr(module, name, value)
+
+
+# =========================================================
+#  실행 (워커)
+# =========================================================
+_worker: dict = {}
+
+
+def _init_worker(module_name: str, df: pd.DataFrame, states: dict, initial_balance: float):
+    module = importlib.import_module(f"backtest.{module_name}")
+    _worker.update(
+        module=module, df=df, states=states, initial_balance=initial_balance,
+        defaults={name: getattr(module, name) for name in dir(module) if name.isupper()},
+    )
+
+
+def summarize(trades: list, equity: pd.Series, initial: float, final: float) -> dict:
+    pnls = [t["pnl"] for t in trades]
+    wins = [p for p in pnls if p > 0]
+    peak = equity.cummax()
+    return {
+        "final_balance": final,
+        "return": (final - initial) / initial * 100,
+        "trades": len(trades),
+        "win_rate": len(wins) / len(pnls) * 100 if pnls else 0.0,
+        "mdd": float(((equity - peak) / peak * 100).min()),
+    }
+
+
+def _run_variant(overrides: dict) -> tuple:
+    module = _worker["module"]
+    _apply(module, _worker["defaults"])
+    _apply(module, overrides)
+    strategy, policy = module.build_backtest()
+    vars(strategy).update(_worker["states"][indicator_key(module, type(strategy), overrides)])
+    engine = BacktestEngine(strategy, policy, _worker["initial_balance"])
+    trades, equity, final = engine.run(_worker["df"], prepared=True)
+    return overrides, summarize(trades, equity, _worker["initial_balance"], final)
+
+
+# =========================================================
+#  스윕
+# =========================================================
+def _format(overrides: dict, summary: dict) -> str:
+    params = " ".join(f"{k}={v}" for k, v in overrides.items())
+    return (f"{summary['final_balance']:>10,.2f} {summary['return']:>+8.2f}% {summary['trades']:>6d} "
+            f"{summary['win_rate']:>6.1f}% {summary['mdd']:>8.2f}%  {params}")
+
+
+def _rank(results: list, sort: str) -> list:
+    return sorted(results, key=lambda r: r[1][sort], reverse=SORT_KEYS[sort])
+
+
+def run_sweep(module_name: str, df: pd.DataFrame, grid: dict, initial_balance: float,
+              workers: int = SWEEP_WORKERS, sort: str = "return", top: int = TOP_N) -> list:
+    module = importlib.import_module(f"backtest.{module_name}")
+    df = normalize_ohlcv(df)
+    combos = expand_grid(grid)
+
+    # 지표 조합별 1회 계산 (모듈 상수는 계산 후 원래 값으로 복원)
+    defaults = {name: getattr(module, name) for name in grid}
+    states = {}
+    t0 = time.perf_counter()
+    try:
+        for overrides in combos:
+            strategy, _ = module.build_backtest()
+            key = indicator_key(module, type(strategy), overrides)
+            if key not in states:
+                _apply(module, overrides)
+                states[key] = prepared_state(strategy, df)
+                _apply(module, defaults)
+    finally:
+        _apply(module, defaults)
+    print(f"{module_name}: {len(combos)}개 조합, 지표 조합 {len(states)}개 계산 "
+          f"({time.perf_counter() - t0:.2f}s), workers={workers}")
+    width = len(str(len(combos)))
+    print(f"{'':{2 * width + 8}s}{'balance':>10s} {'return':>9s} {'trades':>6s} {'win':>7s} {'mdd':>9s}  params")
+
+    results = []
+    initargs = (module_name, df, states, initial_balance)
+    t0 = time.perf_counter()
+
+    def _report(result):
+        results.append(result)
+        rank = _rank(results, sort).index(result) + 1
+        print(f"[{len(results):>{width}}/{len(combos)}] #{rank:<3d} {_format(*result)}", flush=True)
+
+    if workers <= 1:
+        _init_worker(*initargs)
+        for overrides in combos:
+            _report(_run_variant(overrides))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            futures = [pool.submit(_run_variant, overrides) for overrides in combos]
+            for future in as_completed(futures):
+                _report(future.result())
+
+    ranked = _rank(results, sort)
+    elapsed = time.perf_counter() - t0
+    print("\n" + "=" * 80)
+    print(f"  {module_name} 스윕 결과 (정렬: {sort}, {len(combos)}개 조합, {elapsed:.1f}s)")
+    print("=" * 80)
+    print(f"  {'rank':>4s} {'balance':>10s} {'return':>9s} {'trades':>6s} {'win':>7s} {'mdd':>9s}  params")
+    for rank, result in enumerate(ranked[:top], 1):
+        print(f"  {rank:>4d} {_format(*result)}")
+    print("=" * 80 + "\n")
+    return ranked
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="백테스트 파라미터 스윕")
+    parser.add_argument("strategy", help="backtest/ 아래 전략 모듈 이름 (예: trailing_atr, backtest_v3_stochrsi)")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=v1,v2,...",
+                        help="스윕할 모듈 상수와 값 목록 (여러 번 지정 가능)")
+    parser.add_argument("--csv", type=str, default="")
+    parser.add_argument("--symbol", default=None)
+    parser.add_argument("--limit", type=int, default=1500)
+    parser.add_argument("--balance", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS)
+    parser.add_argument("--sort", choices=list(SORT_KEYS), default="return")
+    parser.add_argument("--top", type=int, default=TOP_N)
+    parser.add_argument("--out", type=str, default="", help="전체 결과 CSV 저장 경로")
+    args = parser.parse_args()
+
+    module = importlib.import_module(f"backtest.{args.strategy}")
+    try:
+        grid = parse_grid(module, args.grid)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.csv:
+        df = pd.read_csv(args.csv)
+        if "timestamp" in df.columns:
+            df["timestamp"] = pd.to_datetime(df["timestamp"])
+    else:
+        symbol = args.symbol or module.SYMBOL
+        print(f"Fetching {args.limit} x {module.TIMEFRAME} candles for {symbol}...")
+        df = module.fetch_ohlcv(symbol=symbol, timeframe=module.TIMEFRAME, limit=args.limit)
+
+    balance = args.balance if args.balance is not None else module.INITIAL_BALANCE
+    ranked = run_sweep(args.strategy, df, grid, balance, workers=args.workers, sort=args.sort, top=args.top)
+
+    if args.out:
+        pd.DataFrame([{**overrides, **summary} for overrides, summary in ranked]).to_csv(args.out, index=False)
+        print(f"결과 저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
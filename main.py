@@ -1,6 +1,17 @@
-from config import exchange, logging
+from config import exchange as raw_exchange, logging
 import asyncio
-from strategies.trailing_atr import TrailingAtrStrategy
+import os
+from strategies.trailing_atr import TrailingAtrStrategy, prepare_indicators
+from modules.module_account import AccountService
+from modules.module_candles import KlineStream, RestCandleFeed
+from modules.module_scheduler import BarCloseScheduler
+from modules.module_user_stream import UserDataStream
+from modules.module_stop_engine import StopEngine
+from modules.module_markets import load_markets_cached
+from modules.module_ratelimit import WeightBudget, RateLimitedExchange
+from modules.module_supervisor import supervise, connect_shared_state
+from modules.module_compute import IndicatorExecutor
+from modules.module_indicator_cache import IndicatorCache
 
 # === 심볼 설정 ===
 SYMBOLS = [
@@ -12,32 +23,210 @@ SYMBOLS = [
     "KAVA/USDT:USDT",
     "AR/USDT:USDT",
 ]
-INTERVAL = 60  # 1분 (15분봉 전략이라 자주 체크해도 됨)
+INTERVAL = 20  # 포지션 관리 주기 (진입 판단은 봉 마감 시각에 정렬해 별도 실행)
+MAX_CONCURRENCY = 10  # 동시에 run_once를 실행할 심볼 수 상한
+SYMBOL_TIMEOUT = 30   # 심볼당 run_once 최대 소요 시간 (초)
 
+# === 스트리밍 모드 (ccxt.pro watch_ohlcv) ===
+USE_KLINE_STREAM = True     # False면 REST 델타 조회(RestCandleFeed)로 폴백
+STREAM_MIN_INTERVAL = 1.0   # 캔들 업데이트 반응 시 심볼당 run_once 최소 간격 (초)
+USE_USER_STREAM = True      # 체결/포지션/잔고를 watch_orders/positions/balance로 수신 (폴링 생략)
+USE_STOP_ENGINE = True      # 거래소 SL 없는 포지션(코드 SL/트레일링)을 호가 스트림으로 실시간 감시
 
-async def main():
+# === 지표 계산 실행기 (pandas 경로를 이벤트 루프 밖에서 실행) ===
+INDICATOR_POOL = "thread"   # "thread" | "process" | "inline"
+INDICATOR_CACHE_BYTES = 8 * 1024 * 1024   # 지표 캐시 메모리 예산 (REST 경로 마감 봉 구간 재사용)
+LOOP_LAG_CHECK = 1.0        # 이벤트 루프 지연 측정 주기 (초)
+LOOP_LAG_WARN = 0.05        # 이 이상 늦게 깨어나면 경고 (초)
+
+# === supervisor 모드 (WORKERS > 1이면 심볼을 워커 프로세스로 분산) ===
+WORKERS = int(os.environ.get("WORKERS", "1"))
+
+# === 요청 가중치 예산 (모든 REST 호출이 공유) ===
+budget = WeightBudget(raw_exchange)
+exchange = RateLimitedExchange(raw_exchange, budget)
+
+
+async def run_symbol(strategy, sem: asyncio.Semaphore, snapshot=None, wait=False, **kwargs):
+    """
+    심볼 1개의 run_once를 세마포어/타임아웃으로 감싸 실행.
+    한 심볼이 느리거나 예외를 던져도 다른 심볼 처리에 영향을 주지 않는다.
+    (타임아웃으로 중단된 주문 흐름은 다음 틱의 상태 복원 로직이 수습)
+    wait=False면 같은 심볼이 실행 중일 때 건너뛰고, True면(봉 마감 진입 판단) 끝날 때까지 대기.
+    """
+    if not wait and strategy.lock.locked():
+        return  # 같은 심볼의 이전 run_once가 아직 진행 중 (틱/스트림 중복 실행 방지)
+    async with sem, strategy.lock:
+        try:
+            await asyncio.wait_for(strategy.run_once(snapshot, **kwargs), timeout=SYMBOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logging.warning(f"[{strategy.symbol}] run_once timed out ({SYMBOL_TIMEOUT}s)")
+        except Exception as e:
+            logging.error(f"[{strategy.symbol}] Error: {type(e).__name__}: {e}")
+
+
+async def run_tick(strategies, sem: asyncio.Semaphore, account: AccountService, **kwargs):
+    """
+    전 심볼 run_once를 동시에 실행 (틱 지연 = 가장 느린 심볼, 최대 SYMBOL_TIMEOUT)
+    잔고/포지션은 틱 시작 시 1회만 조회해 모든 전략이 같은 스냅샷을 공유.
+    """
+    try:
+        snapshot = await account.get()
+    except Exception as e:
+        # 스냅샷 실패 시 각 전략이 account.get()으로 재시도
+        logging.error(f"[ACCOUNT] Snapshot failed: {type(e).__name__}: {e}")
+        snapshot = None
+    await asyncio.gather(*(run_symbol(s, sem, snapshot, **kwargs) for s in strategies))
+
+
+async def entry_loop(strategies, sem: asyncio.Semaphore, account: AccountService,
+                     scheduler: BarCloseScheduler, executor: IndicatorExecutor = None):
+    """
+    봉 마감 시각마다 마감된 봉 기준으로 진입 판단 (+ 관리)
+    캔들 피드가 아직 준비되지 않은 심볼들은 지표를 (심볼 × 봉) 행렬로 한 번에 계산해 둠
+    """
+    while True:
+        bar_close = await scheduler.wait_next_close()
+        logging.debug(f"Bar close {bar_close} → entry check")
+        try:
+            await prepare_indicators(strategies, bar_close, executor)
+        except Exception as e:
+            # 일괄 계산 실패 시 각 전략이 단독 조회/계산으로 진행
+            logging.error(f"[INDICATORS] Batch computation failed: {type(e).__name__}: {e}")
+        await run_tick(strategies, sem, account, wait=True, bar_close=bar_close)
+
+
+async def manage_loop(strategies, sem: asyncio.Semaphore, account: AccountService):
+    """
+    INTERVAL 주기로 포지션 관리만 실행 (손절/부분익절/트레일링)
+    가중치 예산이 빠듯하면 포지션 없는 심볼은 건너뜀 (봉 마감 진입 판단 때만 실행)
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        targets = strategies
+        if budget.tight:
+            targets = [s for s in strategies if s.entry_price is not None]
+            logging.info(
+                f"[RATELIMIT] Weight {budget.used_weight}/{budget.weight_limit} → "
+                f"managing {len(targets)}/{len(strategies)} symbols with positions only"
+            )
+        await run_tick(targets, sem, account, allow_entry=False)
+
+        elapsed = loop.time() - started
+        if elapsed > INTERVAL:
+            logging.warning(f"Tick took {elapsed:.1f}s (> {INTERVAL}s)")
+        await asyncio.sleep(max(0.0, INTERVAL - elapsed))
+
+
+async def stream_symbol(strategy, sem: asyncio.Semaphore, account: AccountService):
+    """
+    스트리밍 모드: 캔들 업데이트가 올 때마다 포지션 관리 (최소 STREAM_MIN_INTERVAL 간격).
+    잔고는 마지막 틱 스냅샷을 재사용하고, 포지션은 공유 캐시에서 읽으므로 REST 호출 없음.
+    """
+    while True:
+        await strategy.candles.wait_update()
+        await run_symbol(strategy, sem, account.snapshot, allow_entry=False)
+        await asyncio.sleep(STREAM_MIN_INTERVAL)
+
+
+async def event_symbol(strategy, sem: asyncio.Semaphore, account: AccountService):
+    """유저 데이터 이벤트(체결/취소/포지션 변화) 도착 즉시 포지션 관리 실행"""
+    while True:
+        await strategy.changed.wait()
+        strategy.changed.clear()
+        await run_symbol(strategy, sem, account.snapshot, wait=True, allow_entry=False)
+
+
+async def loop_lag_monitor():
+    """이벤트 루프 지연 감시: sleep이 예정보다 늦게 끝난 만큼이 루프를 막은 시간"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LOOP_LAG_CHECK)
+        lag = loop.time() - started - LOOP_LAG_CHECK
+        if lag > LOOP_LAG_WARN:
+            logging.warning(f"Event loop lag {lag * 1000:.0f}ms")
+
+
+async def main(symbols=SYMBOLS, shared=None):
+    """shared: supervisor 코디네이터의 SharedState 프록시 (워커 프로세스에서만 전달)"""
+    if shared is not None:
+        budget.share(shared)
     logging.info("=" * 50)
     logging.info("Trailing ATR Strategy - PRODUCTION")
-    logging.info(f"Symbols: {SYMBOLS}")
-    logging.info(f"Interval: {INTERVAL}s")
+    logging.info(f"Symbols: {symbols}")
+    logging.info(f"Interval: {INTERVAL}s | Concurrency: {MAX_CONCURRENCY} | Timeout: {SYMBOL_TIMEOUT}s")
+    logging.info(
+        f"Kline stream: {USE_KLINE_STREAM} | User data stream: {USE_USER_STREAM} | "
+        f"Stop engine: {USE_STOP_ENGINE} | Indicator pool: {INDICATOR_POOL}"
+    )
     logging.info("=" * 50)
 
-    await exchange.load_markets()
-    strategies = [TrailingAtrStrategy(exchange, symbol) for symbol in SYMBOLS]
-
+    await load_markets_cached(exchange)
+    account = AccountService(exchange, symbols, shared=shared)
+    stop_engine = StopEngine(exchange) if USE_STOP_ENGINE else None
+    executor = IndicatorExecutor(INDICATOR_POOL)
+    indicator_cache = IndicatorCache(INDICATOR_CACHE_BYTES)
+    strategies = [
+        TrailingAtrStrategy(
+            exchange, symbol, account=account, stop_engine=stop_engine, executor=executor,
+            cache=indicator_cache,
+        )
+        for symbol in symbols
+    ]
+    feed_cls = KlineStream if USE_KLINE_STREAM else RestCandleFeed
     for s in strategies:
-        await s.setup()
+        s.candles = feed_cls(exchange, s.symbol, s.timeframe)
+
+    # 현재 레버리지/마진 모드를 한 번에 조회 → 다른 심볼만 변경 (병렬)
+    try:
+        current = await exchange.fetch_leverages(symbols)
+    except Exception as e:
+        logging.warning(f"Leverage/margin mode bulk fetch failed: {type(e).__name__}: {e}")
+        current = {}
+    await asyncio.gather(*(s.setup(current.get(s.symbol)) for s in strategies))
     logging.info("=== All strategies initialized ===")
 
-    while True:
-        for s in strategies:
-            await s.run_once()
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    stream_tasks = []  # 태스크 참조 유지 (GC 방지)
+    if USE_KLINE_STREAM:
+        await asyncio.gather(*(s.candles.start() for s in strategies))
+        stream_tasks = [asyncio.create_task(stream_symbol(s, sem, account)) for s in strategies]
+        logging.info("=== Kline streams started ===")
+    if USE_USER_STREAM:
+        user_stream = UserDataStream(exchange, account, strategies)
+        await account.refresh()  # 스트림 이전 상태를 REST로 1회 동기화
+        await user_stream.start()
+        stream_tasks += [asyncio.create_task(event_symbol(s, sem, account)) for s in strategies]
+        logging.info("=== User data stream started ===")
+
+    scheduler = BarCloseScheduler(exchange, strategies[0].timeframe)
+    try:
+        await asyncio.gather(
+            entry_loop(strategies, sem, account, scheduler, executor),
+            manage_loop(strategies, sem, account),
+            loop_lag_monitor(),
+        )
+    finally:
+        executor.shutdown()
+
 
-        await asyncio.sleep(INTERVAL)
+def worker_main(worker_id: int, symbols, address, authkey: bytes):
+    """supervisor 워커 프로세스 진입점"""
+    logging.info(f"[WORKER {worker_id}] pid={os.getpid()} symbols={symbols}")
+    shared = connect_shared_state(address, authkey)
+    try:
+        asyncio.run(main(symbols, shared))
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if WORKERS > 1:
+            supervise(SYMBOLS, WORKERS, worker_main)
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logging.info("\nStopped by user")
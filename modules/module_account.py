@@ -0,0 +1,209 @@
+# modules/module_account.py
+"""
+계정 스냅샷 서비스
+- 틱마다 fetch_balance / fetch_positions 를 1회씩만 호출해 모든 전략이 공유
+- 전략은 불변 스냅샷(AccountSnapshot)만 읽으므로 같은 틱 안의 사이징 판단이 일관됨
+- 체결 후 invalidate() → 다음 get()에서 즉시 재조회
+  (since=주문 전송 시각: 응답보다 먼저 도착한 푸시가 있으면 그 값을 유지, 다시 무효화하지 않음)
+- PositionCache: 전 심볼 포지션을 1회 조회해 심볼별로 인덱싱, 주문 후 해당 심볼만 무효화
+- 유저 데이터 스트림 연결 중(streaming)에는 apply_*()로 푸시된 값을 그대로 사용 (REST 생략)
+- supervisor 모드: 잔고는 코디네이터(shared)를 통해 워커 간 공유 (한 워커가 조회하면 나머지는 재사용)
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+QUOTE = "USDT"
+SNAPSHOT_MAX_AGE = 5.0  # 초: 이 시간 안에 다시 get() 하면 캐시된 스냅샷 반환
+PUSH_WAIT = 2.0         # 초: 스트리밍 중 무효화된 포지션의 푸시 이벤트를 기다리는 최대 시간
+
+
+def _open_positions(positions) -> dict:
+    return {p["symbol"]: p for p in positions or [] if (p.get("contracts") or 0) > 0}
+
+
+@dataclass(frozen=True)
+class AccountSnapshot:
+    timestamp: float                 # 조회 시각 (time.time())
+    total_balance: float             # USDT total
+    free_balance: float              # USDT free (avbl)
+    positions: Mapping[str, dict]    # symbol → position (contracts > 0 만)
+
+    @classmethod
+    def from_raw(cls, balance: dict, positions, quote: str = QUOTE) -> "AccountSnapshot":
+        if not isinstance(positions, Mapping):
+            positions = _open_positions(positions)
+        return cls(
+            timestamp=time.time(),
+            total_balance=float(balance[quote]["total"] or 0),
+            free_balance=float(balance[quote]["free"] or 0),
+            positions=MappingProxyType(dict(positions)),
+        )
+
+    def position(self, symbol: str) -> Optional[dict]:
+        return self.positions.get(symbol)
+
+
+class PositionCache:
+    """
+    심볼 → 포지션 인덱스.
+    refresh()는 fetch_positions 1회로 전 심볼을 채우고,
+    invalidate(symbol) 된 심볼만 get() 시점에 단독 재조회한다.
+    streaming=True면 재조회 전에 apply()로 푸시될 포지션을 PUSH_WAIT 동안 먼저 기다린다.
+    """
+    def __init__(self, exchange, symbols):
+        self.exchange = exchange
+        self.symbols = list(symbols)
+        self.streaming = False
+        self._by_symbol: dict = {}
+        self._dirty: set = set(self.symbols)
+        self._pushed: dict = {}   # symbol → asyncio.Event (푸시 도착 알림)
+        self._pushed_at: dict = {}   # symbol → 마지막 푸시 시각 (time.monotonic)
+
+    def _event(self, symbol: str) -> asyncio.Event:
+        if symbol not in self._pushed:
+            self._pushed[symbol] = asyncio.Event()
+        return self._pushed[symbol]
+
+    def invalidate(self, symbol: str = None, since: float = None):
+        """since(time.monotonic)가 주어지면 그 이후 푸시를 받은 심볼은 건너뜀 (이미 최신)"""
+        for sym in (self.symbols if symbol is None else [symbol]):
+            if since is not None and self._pushed_at.get(sym, since - 1) >= since:
+                continue
+            self._dirty.add(sym)
+            self._event(sym).clear()
+
+    def apply(self, position: dict):
+        """유저 데이터 스트림으로 받은 포지션 반영 (contracts 0이면 제거)"""
+        symbol = position["symbol"]
+        if (position.get("contracts") or 0) > 0:
+            self._by_symbol[symbol] = position
+        else:
+            self._by_symbol.pop(symbol, None)
+        self._dirty.discard(symbol)
+        self._pushed_at[symbol] = time.monotonic()
+        self._event(symbol).set()
+
+    def view(self) -> Mapping[str, dict]:
+        return MappingProxyType(dict(self._by_symbol))
+
+    async def refresh(self) -> Mapping[str, dict]:
+        positions = await self.exchange.fetch_positions(symbols=self.symbols)
+        self._by_symbol = _open_positions(positions)
+        self._dirty.clear()
+        return self.view()
+
+    async def get(self, symbol: str) -> Optional[dict]:
+        if symbol in self._dirty and self.streaming:
+            try:
+                await asyncio.wait_for(self._event(symbol).wait(), timeout=PUSH_WAIT)
+            except asyncio.TimeoutError:
+                pass
+        if symbol in self._dirty:
+            positions = await self.exchange.fetch_positions(symbols=[symbol])
+            pos = _open_positions(positions).get(symbol)
+            if pos is None:
+                self._by_symbol.pop(symbol, None)
+            else:
+                self._by_symbol[symbol] = pos
+            self._dirty.discard(symbol)
+        return self._by_symbol.get(symbol)
+
+
+class AccountService:
+    def __init__(self, exchange, symbols, quote: str = QUOTE, max_age: float = SNAPSHOT_MAX_AGE,
+                 shared=None):
+        self.exchange = exchange
+        self.shared = shared   # 코디네이터 SharedState 프록시 (단일 프로세스면 None)
+        self.symbols = list(symbols)
+        self.quote = quote
+        self.max_age = max_age
+        self.positions = PositionCache(exchange, self.symbols)
+        self._snapshot: Optional[AccountSnapshot] = None
+        self._stale = True
+        self._invalidated_at = 0.0   # 이 시각 이전에 조회된 공유 잔고는 사용하지 않음
+        self._balance_pushed_at = None   # 마지막 잔고 푸시 시각 (time.monotonic)
+        self._lock = asyncio.Lock()
+
+    @property
+    def snapshot(self) -> Optional[AccountSnapshot]:
+        return self._snapshot
+
+    @property
+    def streaming(self) -> bool:
+        return self.positions.streaming
+
+    @streaming.setter
+    def streaming(self, on: bool):
+        self.positions.streaming = on
+
+    def apply_balance(self, balance: dict):
+        """유저 데이터 스트림 잔고 반영 (free/total 중 하나라도 없으면 다음 get()에서 REST 재조회)"""
+        quote = balance.get(self.quote) or {}
+        if self._snapshot is None or quote.get("total") is None or quote.get("free") is None:
+            self._stale = True
+            return
+        self._snapshot = AccountSnapshot.from_raw(balance, self.positions.view(), self.quote)
+        self._stale = False
+        self._balance_pushed_at = time.monotonic()
+
+    def apply_position(self, position: dict):
+        """유저 데이터 스트림 포지션 반영"""
+        self.positions.apply(position)
+        snap = self._snapshot
+        if snap is not None:
+            self._snapshot = AccountSnapshot(
+                timestamp=snap.timestamp,
+                total_balance=snap.total_balance,
+                free_balance=snap.free_balance,
+                positions=self.positions.view(),
+            )
+
+    def invalidate(self, symbol: str = None, since: float = None):
+        """
+        체결/주문 직후 호출 → 다음 get()에서 재조회 (symbol 포지션은 즉시 단독 재조회 대상)
+        since: 주문 전송 시각 (time.monotonic) - 그 이후 스트림 푸시로 이미 갱신된 잔고/포지션은 유지
+        """
+        if since is None or self._balance_pushed_at is None or self._balance_pushed_at < since:
+            self._stale = True
+            self._invalidated_at = time.time()
+        self.positions.invalidate(symbol, since)
+
+    async def get(self) -> AccountSnapshot:
+        """캐시가 유효하면 그대로, 아니면 refresh (동시 호출은 1회 조회로 합쳐짐)"""
+        async with self._lock:
+            snap = self._snapshot
+            if snap is not None and not self._stale:
+                if self.streaming or time.time() - snap.timestamp < self.max_age:
+                    return snap
+            return await self._refresh()
+
+    async def refresh(self) -> AccountSnapshot:
+        async with self._lock:
+            return await self._refresh()
+
+    async def _refresh(self) -> AccountSnapshot:
+        balance, positions = await asyncio.gather(
+            self._fetch_balance(),
+            self.positions.refresh(),
+        )
+        self._snapshot = AccountSnapshot.from_raw(balance, positions, self.quote)
+        self._stale = False
+        logging.debug(
+            f"[ACCOUNT] total={self._snapshot.total_balance:.2f} "
+            f"free={self._snapshot.free_balance:.2f} positions={len(self._snapshot.positions)}"
+        )
+        return self._snapshot
+
+    async def _fetch_balance(self) -> dict:
+        if self.shared is not None:
+            cached = await asyncio.to_thread(self.shared.get_balance, self._invalidated_at, self.max_age)
+            if cached is not None:
+                return cached
+        balance = await self.exchange.fetch_balance()
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.put_balance, {self.quote: dict(balance[self.quote])})
+        return balance
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from modules.module_indicators import calc_atr_series
+
 
 def calc_atr(df: pd.DataFrame, period: int = 14) -> float:
     """
@@ -12,14 +14,5 @@ def calc_atr(df: pd.DataFrame, period: int = 14) -> float:
     Returns:
         현재(마지막 봉) ATR 값
     """
-    high = df["high"].astype(float)
-    low = df["low"].astype(float)
-    close = df["close"].astype(float)
-    prev_close = close.shift(1)
-
-    tr1 = high - low
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.ewm(span=period, adjust=False).mean()
-    return float(atr.iloc[-1])
+    atr = calc_atr_series(df["high"], df["low"], df["close"], period)
+    return float(atr[-1])
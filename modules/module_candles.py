@@ -0,0 +1,231 @@
+# modules/module_candles.py
+"""
+캔들(OHLCV) 공급 모듈
+- CandleRingBuffer: (symbol, timeframe)별 고정 용량 NumPy OHLCV 링버퍼
+- KlineStream: ccxt.pro watch_ohlcv 기반 실시간 캔들 버퍼
+  - 시작 시 / 재연결 후에만 REST(fetch_ohlcv)로 백필
+  - 타임스탬프 간격이 timeframe보다 크면 gap으로 판단 → REST로 메움
+- RestCandleFeed: 스트리밍 불가 시 REST 폴백 (since=마지막 봉, 소량 limit 델타 조회)
+"""
+import asyncio
+import logging
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+CANDLE_LIMIT = 200          # 버퍼 유지 봉 수 (기존 REST limit=200과 동일)
+DELTA_LIMIT = 3             # 델타 조회 기본 봉 수 (진행 중인 봉 + 새 봉 여유분)
+RECONNECT_DELAY = 1.0       # 재연결 대기 시작값 (초)
+RECONNECT_DELAY_MAX = 30.0  # 재연결 대기 최대값 (초)
+
+
+class CandleRingBuffer:
+    """
+    고정 용량 OHLCV 링버퍼.
+    각 행을 i, i+capacity 두 곳에 기록해 view()가 항상 복사 없는 연속 배열을 반환한다.
+    """
+    def __init__(self, capacity: int = CANDLE_LIMIT):
+        self.capacity = capacity
+        self._data = np.zeros((capacity * 2, len(OHLCV_COLUMNS)), dtype=np.float64)
+        self._start = 0   # 가장 오래된 봉 위치
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_timestamp(self):
+        if self._size == 0:
+            return None
+        return int(self._data[self._start + self._size - 1, 0])
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def _write(self, pos: int, row):
+        self._data[pos] = row
+        self._data[(pos + self.capacity) % (self.capacity * 2)] = row
+
+    def upsert(self, row):
+        """새 봉이면 추가(가득 차면 가장 오래된 봉 덮어씀), 같은/과거 타임스탬프면 해당 봉 갱신"""
+        ts = row[0]
+        last_ts = self.last_timestamp
+        if last_ts is None or ts > last_ts:
+            if self._size < self.capacity:
+                self._write((self._start + self._size) % self.capacity, row)
+                self._size += 1
+            else:
+                self._write(self._start, row)
+                self._start = (self._start + 1) % self.capacity
+        else:
+            window = self.view()
+            idx = np.searchsorted(window[:, 0], ts)
+            if idx < self._size and window[idx, 0] == ts:
+                self._write((self._start + idx) % self.capacity, row)
+
+    def extend(self, rows):
+        for row in rows:
+            self.upsert(row)
+
+    def view(self) -> np.ndarray:
+        """(size, 6) 시간순 연속 배열 (복사 없음, 읽기 전용으로 사용)"""
+        return self._data[self._start:self._start + self._size]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.view()[:, OHLCV_COLUMNS.index(name)]
+
+    def frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.view(), columns=OHLCV_COLUMNS)
+        df["timestamp"] = df["timestamp"].astype(np.int64)
+        return df
+
+
+class KlineStream:
+    def __init__(self, exchange, symbol, timeframe, limit=CANDLE_LIMIT):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.limit = limit
+        self.tf_ms = exchange.parse_timeframe(timeframe) * 1000
+        self.buffer = CandleRingBuffer(limit)
+        self._updated = asyncio.Event()
+        self._needs_backfill = True
+        self._backfill_from = None  # gap 감지 시 백필 시작 시각 (gap 직전 봉)
+        self._task = None
+
+    @property
+    def ready(self) -> bool:
+        return len(self.buffer) > 0 and not self._needs_backfill
+
+    @property
+    def last_timestamp(self):
+        return self.buffer.last_timestamp
+
+    # =========================================================
+    #  시작/종료
+    # =========================================================
+    async def start(self):
+        await self._backfill()
+        self._task = asyncio.create_task(self._run(), name=f"kline:{self.symbol}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def wait_update(self):
+        """새 캔들 데이터가 들어올 때까지 대기"""
+        await self._updated.wait()
+        self._updated.clear()
+
+    async def update(self):
+        """푸시 방식이라 할 일 없음 (RestCandleFeed와 인터페이스 통일)"""
+
+    def frame(self) -> pd.DataFrame:
+        return self.buffer.frame()
+
+    # =========================================================
+    #  스트림 루프
+    # =========================================================
+    async def _run(self):
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                if self._needs_backfill:
+                    since = self._backfill_from if self._backfill_from is not None else self.last_timestamp
+                    await self._backfill(since=since)
+                candles = await self.exchange.watch_ohlcv(self.symbol, self.timeframe)
+                for candle in candles:
+                    self._merge(candle)
+                self._updated.set()
+                delay = RECONNECT_DELAY
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 연결 끊김 → 재연결 후 REST 백필
+                self._needs_backfill = True
+                logging.warning(
+                    f"[{self.symbol}] Kline stream error: {type(e).__name__}: {e} "
+                    f"→ retry in {delay:.0f}s"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    def _merge(self, candle):
+        ts = candle[0]
+        last_ts = self.last_timestamp
+        if last_ts is not None and ts - last_ts > self.tf_ms:
+            # gap 이후 봉은 버퍼에 넣지 않음 → 백필(last_ts부터)이 빈 구간과 함께 채움
+            if not self._needs_backfill:
+                logging.warning(
+                    f"[{self.symbol}] Kline gap detected: {last_ts} → {ts} → REST backfill"
+                )
+            self._needs_backfill = True
+            if self._backfill_from is None:
+                self._backfill_from = last_ts
+            return
+        self.buffer.upsert(candle)
+
+    async def _backfill(self, since=None):
+        """since=None: 전체 limit 봉, 아니면 since 이후 봉만 받아 병합"""
+        ohlcv = await self.exchange.fetch_ohlcv(
+            self.symbol, timeframe=self.timeframe, since=since, limit=self.limit
+        )
+        if since is None:
+            self.buffer.clear()
+        self.buffer.extend(ohlcv)
+        self._needs_backfill = False
+        self._backfill_from = None
+        self._updated.set()
+        logging.info(f"[{self.symbol}] Kline backfill: {len(ohlcv)} bars (since={since})")
+
+
+class RestCandleFeed:
+    """
+    스트리밍 없이 REST만 쓰는 캔들 피드.
+    최초 1회만 limit 봉 전체를 받고, 이후엔 since=마지막 봉으로 바뀐 봉만 받아 링버퍼에 반영.
+    """
+    def __init__(self, exchange, symbol, timeframe, limit=CANDLE_LIMIT, delta_limit=DELTA_LIMIT):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.limit = limit
+        self.delta_limit = delta_limit
+        self.tf_ms = exchange.parse_timeframe(timeframe) * 1000
+        self.buffer = CandleRingBuffer(limit)
+
+    @property
+    def ready(self) -> bool:
+        return len(self.buffer) > 0
+
+    @property
+    def last_timestamp(self):
+        return self.buffer.last_timestamp
+
+    async def update(self):
+        last_ts = self.buffer.last_timestamp
+        if last_ts is None:
+            ohlcv = await self.exchange.fetch_ohlcv(self.symbol, timeframe=self.timeframe, limit=self.limit)
+            self.buffer.extend(ohlcv)
+            return
+
+        # 마지막 봉 이후 놓친 봉 수만큼만 조회 (버퍼보다 많이 놓쳤으면 전체 재조회)
+        missed = (self.exchange.milliseconds() - last_ts) // self.tf_ms
+        if missed >= self.limit:
+            self.buffer.clear()
+            await self.update()
+            return
+        limit = max(self.delta_limit, int(missed) + 2)
+        ohlcv = await self.exchange.fetch_ohlcv(
+            self.symbol, timeframe=self.timeframe, since=last_ts, limit=limit
+        )
+        self.buffer.extend(ohlcv)
+
+    def frame(self) -> pd.DataFrame:
+        return self.buffer.frame()
@@ -0,0 +1,81 @@
+# modules/module_compute.py
+"""
+지표 계산 실행기 (이벤트 루프 밖에서 pandas/NumPy 계산)
+- pool: "thread" (ThreadPoolExecutor) | "process" (ProcessPoolExecutor) | "inline" (루프 안에서 바로 실행)
+- submit(fn, *args): 같은 루프 반복 안에 들어온 작업을 모아 워커 수만큼의 배치로 풀에 전달 → 결과는 각 호출자에게 비동기로 반환
+- process 풀에 넘기는 fn/인자는 pickle 가능해야 함 (모듈 최상위 함수 + ndarray/list)
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+INDICATOR_POOL = "thread"
+INDICATOR_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def _run_jobs(jobs):
+    """풀 워커에서 배치 실행 → 작업별 (성공 여부, 결과 또는 예외)"""
+    results = []
+    for fn, args in jobs:
+        try:
+            results.append((True, fn(*args)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+
+class IndicatorExecutor:
+    def __init__(self, pool: str = INDICATOR_POOL, max_workers: int = INDICATOR_WORKERS):
+        self.pool = pool
+        self.max_workers = max_workers
+        if pool == "process":
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        elif pool == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="indicator")
+        elif pool == "inline":
+            self._executor = None
+        else:
+            raise ValueError(f"unknown indicator pool: {pool}")
+        self._pending: list = []   # (fn, args, future) - 다음 flush 때 한 배치로 전달
+
+    async def submit(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._flush)
+        self._pending.append((fn, args, future))
+        return await future
+
+    def _flush(self):
+        """대기 작업을 워커 수만큼의 배치로 나눠 전달 (작업별 제출 대비 IPC/스케줄링 오버헤드 감소)"""
+        pending, self._pending = self._pending, []
+        loop = asyncio.get_running_loop()
+        for i in range(min(self.max_workers, len(pending))):
+            batch = pending[i::self.max_workers]
+            done = loop.run_in_executor(self._executor, _run_jobs, [(fn, args) for fn, args, _ in batch])
+            done.add_done_callback(lambda f, batch=batch: self._deliver(batch, f))
+
+    @staticmethod
+    def _deliver(batch, done):
+        if done.cancelled():
+            # 풀 종료(shutdown cancel_futures) 등으로 배치 취소 → 호출자도 CancelledError
+            for _, _, future in batch:
+                future.cancel()
+            return
+        if done.exception() is not None:
+            results = [(False, done.exception())] * len(batch)
+        else:
+            results = done.result()
+        for (_, _, future), (ok, value) in zip(batch, results):
+            if future.done():
+                continue   # 호출 측 타임아웃 등으로 취소됨
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,104 @@
+# modules/module_indicator_cache.py
+"""
+지표 결과 캐시 (캔들 지문 기준 메모이제이션)
+- 키: (symbol, timeframe, 지표, 파라미터, history, 마지막 마감 봉 timestamp)
+  → 마감 봉이 그대로면 몇 번을 조회해도 같은 값이므로 재계산하지 않음
+- 값: 마지막 마감 봉까지 적용된 스트리밍 지표(prefix 상태)
+  → 진행 중인 봉만 바뀐 조회는 prefix 상태에 그 봉 1개만 적용(peek)해서 반환
+- LRU + 메모리 예산(max_bytes): 예산을 넘으면 가장 오래 안 쓴 항목부터 제거
+  같은 (symbol, timeframe, 지표, 파라미터)의 이전 마감 봉 항목은 새 항목이 들어오면 바로 제거
+- 전략 인스턴스 간 공유 (같은 심볼/지표를 쓰는 전략은 한 번만 계산)
+- 미스 시 prefix 계산은 build_indicators로 분리 → 호출 측이 IndicatorExecutor(풀)에서 실행 후 store
+"""
+from collections import OrderedDict
+
+CACHE_MAX_BYTES = 8 * 1024 * 1024   # 기본 메모리 예산 (8MB)
+ENTRY_OVERHEAD = 512                # 항목당 키/지표 객체/상태 튜플 추정 크기 (bytes)
+
+
+def _entry_size(indicator) -> int:
+    return ENTRY_OVERHEAD + 8 * len(indicator.values)
+
+
+def build_indicators(specs, rows) -> list:
+    """
+    specs: [(지표 클래스, 파라미터, history), ...] → rows 전체를 적용한 스트리밍 지표 리스트.
+    계산 전용 (캐시 접근 없음) - IndicatorExecutor(thread/process 풀)에서 실행되므로 모듈 최상위 함수로 유지.
+    """
+    indicators = [indicator_cls(*params, history=history) for indicator_cls, params, history in specs]
+    for bar in rows:
+        for indicator in indicators:
+            indicator.update(bar)
+    return indicators
+
+
+class IndicatorCache:
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()   # key → (지표, 추정 크기)
+        self._latest: dict = {}                       # key[:-1] → 가장 최근 마감 봉 key
+
+    def __len__(self):
+        return len(self._entries)
+
+    def series(self, symbol: str, timeframe: str, indicator_cls, params: tuple, history: int,
+               rows, forming: bool) -> list:
+        """
+        rows: OHLCV 행 시퀀스 (timestamp 오름차순, REST 응답 list 또는 CandleRingBuffer 행)
+        forming=True면 마지막 행은 진행 중인 봉 → 마감 봉 구간만 캐시하고 마지막 행은 매번 적용.
+        반환: 최근 history개 출력값 (마지막 = rows[-1])
+        미스면 이 자리에서 prefix를 계산 (루프 밖에서 계산하려면 lookup / build_indicators / store 사용)
+        """
+        closed = rows[:-1] if forming else rows
+        indicator = self.lookup(symbol, timeframe, indicator_cls, params, history, closed)
+        if indicator is None:
+            indicator = build_indicators([(indicator_cls, params, history)], closed)[0]
+            self.store(symbol, timeframe, indicator_cls, params, history, closed, indicator)
+        if forming:
+            return indicator.peek(rows[-1])
+        return list(indicator.values)
+
+    def lookup(self, symbol: str, timeframe: str, indicator_cls, params: tuple, history: int, closed):
+        """closed(마감 봉 행)까지 적용된 지표 또는 None(미스). 마감 봉이 없으면 빈 지표 (캐시 안 함)"""
+        if len(closed) == 0:
+            return indicator_cls(*params, history=history)
+        return self._get((symbol, timeframe, indicator_cls.__name__, params, history, int(closed[-1][0])))
+
+    def store(self, symbol: str, timeframe: str, indicator_cls, params: tuple, history: int, closed, indicator):
+        if len(closed) == 0:
+            return
+        self._put((symbol, timeframe, indicator_cls.__name__, params, history, int(closed[-1][0])), indicator)
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _put(self, key, indicator):
+        prev = self._latest.get(key[:-1])
+        if prev is not None and prev != key:
+            self._remove(prev)   # 같은 지표의 이전 마감 봉 상태는 다시 쓰이지 않음
+        self._latest[key[:-1]] = key
+        size = _entry_size(indicator)
+        self._entries[key] = (indicator, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.nbytes -= entry[1]
+        if self._latest.get(key[:-1]) == key:
+            del self._latest[key[:-1]]
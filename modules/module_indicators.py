@@ -0,0 +1,400 @@
+# modules/module_indicators.py
+"""
+NumPy 지표 라이브러리 (배열 입력 → 배열 출력)
+- 백테스트마다 복사돼 있던 calc_*_series(pandas)를 한 곳으로 통합
+- pandas 버전과 같은 정의/NaN 처리 (ewm adjust/min_periods, rolling min_periods=window, 0 → NaN 치환)
+- EWM은 블록 단위 선형 점화식 커널로 벡터화 (블록 안은 cumsum, 블록 사이만 파이썬 반복)
+  adjust=False에서 중간 NaN이 있으면 pandas 점화식을 그대로 도는 루프로 폴백
+- 롤링 합/표준편차는 밀린 연속 슬라이스 누적 (창 길이만큼의 벡터 연산, 중간 DataFrame 없음)
+  롤링 최대/최소는 긴 창에서 블록 누적(van Herk/Gil-Werman)으로 창 길이와 무관한 O(n)
+- 입력은 ndarray / pd.Series 모두 가능, 출력은 float64 ndarray
+- 모든 함수는 마지막 축을 봉으로 계산 → (심볼 × 봉) 2-D 행렬을 넣으면 유니버스 전체를 한 번에 계산
+  길이가 다른 심볼은 stack_aligned()로 오른쪽 정렬 + 앞쪽 NaN 패딩 (결과는 심볼별 1-D 계산과 같음)
+- 백엔드: numba가 설치돼 있으면 EWM 점화식을 JIT 컴파일한 단일 루프로 계산 (없으면 NumPy 커널)
+  set_backend("numpy" | "numba")로 강제 가능 (벤치마크/결과 비교용)
+"""
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:   # 선택 의존성: 없으면 NumPy 커널 사용
+    numba = None
+
+_BLOCK_LOG_RANGE = 50.0   # 블록 안 a^-k 최대 크기 (e^50): 오버플로/정밀도 여유
+_EXTREME_SLICE_MAX = 32   # 이 창 길이까지는 롤링 최대/최소도 밀린 슬라이스 누적이 더 빠름 (벡터 연산 w회)
+_SLOPE_SLICE_MAX = 32     # 이 창 길이까지는 회귀 기울기의 Σy·Σxy를 밀린 슬라이스로 직접 합산 (누적합 오차 없음)
+
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def stack_aligned(arrays, bars: int = None) -> np.ndarray:
+    """
+    길이가 다른 1-D 배열(심볼별 히스토리) → (심볼 × 봉) 행렬.
+    마지막 봉 기준 오른쪽 정렬, 모자란 앞쪽은 NaN. bars가 주어지면 최근 bars개만 사용.
+    """
+    arrays = [_as_float(a) for a in arrays]
+    if bars is None:
+        bars = max((len(a) for a in arrays), default=0)
+    out = np.full((len(arrays), bars), np.nan)
+    for i, a in enumerate(arrays):
+        a = a[len(a) - min(len(a), bars):]
+        if len(a):
+            out[i, bars - len(a):] = a
+    return out
+
+
+# =========================================================
+#  선형 점화식 커널: y[t] = a * y[t-1] + b[t]
+# =========================================================
+def linear_recurrence(b: np.ndarray, a: float, y0=0.0) -> np.ndarray:
+    """
+    y[t] = a * y[t-1] + b[t] (y[-1] = y0), 0 <= a < 1. 마지막 축(봉)을 따라 계산, y0는 스칼라 또는 행별 배열.
+    블록 길이 B 안에서 y[s+j] = a^j * (a * y[s-1] + Σ_{k<=j} a^-k * b[s+k]) 로 한 번에 계산.
+    """
+    b = _as_float(b)
+    n = b.shape[-1]
+    out = np.empty(b.shape)
+    if n == 0:
+        return out
+    if a == 0.0:
+        out[...] = b
+        return out
+    block = min(n, max(1, int(_BLOCK_LOG_RANGE / -math.log(a))))
+    k = np.arange(block)
+    pow_a = a ** k          # a^0 .. a^(B-1)
+    inv_a = a ** -k         # a^0 .. a^-(B-1)
+    prev = np.broadcast_to(np.asarray(y0, dtype=np.float64), b.shape[:-1])
+    for s in range(0, n, block):
+        m = min(block, n - s)
+        acc = np.cumsum(b[..., s:s + m] * inv_a[:m], axis=-1)
+        acc += (a * prev)[..., None]
+        out[..., s:s + m] = pow_a[:m] * acc
+        prev = out[..., s + m - 1]
+    return out
+
+
+def _ewm_loop(x: np.ndarray, alpha: float, adjust: bool, min_periods: int) -> np.ndarray:
+    """pandas ewm().mean() (ignore_na=False) 점화식 그대로 - 중간 NaN 폴백용, numba 백엔드에서는 JIT 컴파일해 항상 사용"""
+    n = len(x)
+    out = np.full(n, np.nan)
+    old_wt_factor = 1.0 - alpha
+    new_wt = 1.0 if adjust else alpha
+    minp = max(min_periods, 1)
+    weighted = x[0]
+    nobs = 1 if weighted == weighted else 0
+    old_wt = 1.0
+    if nobs >= minp:
+        out[0] = weighted
+    for i in range(1, n):
+        cur = x[i]
+        is_obs = cur == cur
+        if is_obs:
+            nobs += 1
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_obs:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+                old_wt = old_wt + new_wt if adjust else 1.0
+        elif is_obs:
+            weighted = cur
+        if nobs >= minp:
+            out[i] = weighted
+    return out
+
+
+def _ewm_rows(rows: np.ndarray, alpha: float, adjust: bool, min_periods: int) -> np.ndarray:
+    """(심볼 × 봉) 행렬을 행마다 _ewm_loop - numba 백엔드 전용 (행 반복까지 컴파일)"""
+    out = np.empty(rows.shape)
+    for i in range(rows.shape[0]):
+        out[i] = _ewm_loop_jit(rows[i], alpha, adjust, min_periods)
+    return out
+
+
+if numba is not None:
+    _ewm_loop_jit = numba.njit(cache=True, nogil=True)(_ewm_loop)
+    _ewm_rows_jit = numba.njit(cache=True, nogil=True)(_ewm_rows)
+BACKEND = "numba" if numba is not None else "numpy"
+
+
+def set_backend(name: str):
+    """EWM 계산 백엔드 선택 ("numba"는 numba 설치 시에만 가능)"""
+    global BACKEND
+    if name not in ("numpy", "numba"):
+        raise ValueError(f"unknown indicator backend: {name}")
+    if name == "numba" and numba is None:
+        raise ImportError("numba required: pip install numba")
+    BACKEND = name
+
+
+def calc_ewm(x, alpha: float, adjust: bool = False, min_periods: int = 0) -> np.ndarray:
+    """
+    pd.Series(x).ewm(alpha=alpha, adjust=adjust, min_periods=min_periods).mean() 과 동일.
+    2-D (심볼 × 봉) 입력이면 행마다 독립 계산 (앞쪽 NaN 패딩은 봉이 없는 것과 같음).
+    """
+    x = _as_float(x)
+    if x.size == 0:
+        return np.full(x.shape, np.nan)
+    rows = x.reshape(-1, x.shape[-1])
+    if BACKEND == "numba":
+        return _ewm_rows_jit(np.ascontiguousarray(rows), alpha, adjust, min_periods).reshape(x.shape)
+    valid = ~np.isnan(rows)
+    decay = 1.0 - alpha
+    if not adjust and valid.all():
+        # y[0] = x[0], y[t] = (1-α) y[t-1] + α x[t]
+        b = alpha * rows
+        b[:, 0] = rows[:, 0]
+        return linear_recurrence(b, decay).reshape(x.shape)
+    seen = np.logical_or.accumulate(valid, axis=-1)   # 첫 관측 이후 구간
+    if adjust:
+        # 가중합 S와 가중치 합 W 모두 선형 점화식 (NaN 봉은 더하지 않고 감쇠만, 첫 관측 전은 W=0 → NaN)
+        num = linear_recurrence(np.where(valid, rows, 0.0), decay)
+        den = linear_recurrence(valid.astype(np.float64), decay)
+        with np.errstate(invalid="ignore"):
+            out = num / den
+    else:
+        # 행마다 첫 관측 위치에서 시작 (앞쪽 NaN 패딩은 0 → 출력 NaN)
+        first = seen & ~np.concatenate([np.zeros((len(rows), 1), dtype=bool), seen[:, :-1]], axis=-1)
+        out = linear_recurrence(np.where(first, rows, np.where(seen, alpha * rows, 0.0)), decay)
+        out[~seen] = np.nan
+        gaps = (seen & ~valid).any(axis=-1)   # 중간 NaN이 있는 행은 pandas 점화식 루프로 폴백
+        for i in np.flatnonzero(gaps):
+            out[i] = _ewm_loop(rows[i], alpha, adjust, min_periods)
+    minp = max(min_periods, 1)
+    if minp > 1:
+        nobs = np.cumsum(valid, axis=-1)
+        out[nobs < minp] = np.nan
+    return out.reshape(x.shape)
+
+
+# =========================================================
+#  롤링 (pandas rolling(window) 기본값: 창 안에 NaN 있으면 NaN)
+# =========================================================
+def _rolling(x, window: int, ufunc) -> np.ndarray:
+    """창 길이만큼 밀린 연속 슬라이스를 ufunc로 누적 - NaN은 그대로 전파"""
+    x = _as_float(x)
+    n = x.shape[-1]
+    out = np.full(x.shape, np.nan)
+    if n < window:
+        return out
+    acc = x[..., window - 1:].copy()
+    for k in range(1, window):
+        ufunc(acc, x[..., window - 1 - k:n - k], out=acc)
+    out[..., window - 1:] = acc
+    return out
+
+
+def calc_sma(x, window: int) -> np.ndarray:
+    return _rolling(x, window, np.add) / window
+
+
+def calc_rolling_std(x, window: int) -> np.ndarray:
+    """표본 표준편차 (ddof=1, pandas rolling().std() 기본값)"""
+    x = _as_float(x)
+    n = x.shape[-1]
+    mean = calc_sma(x, window)
+    out = np.full(x.shape, np.nan)
+    if n < window:
+        return out
+    m = mean[..., window - 1:]
+    acc = np.zeros(m.shape)
+    for k in range(window):
+        dev = x[..., window - 1 - k:n - k] - m
+        acc += dev * dev
+    out[..., window - 1:] = np.sqrt(acc / (window - 1))
+    return out
+
+
+def _rolling_extreme(x, window: int, ufunc) -> np.ndarray:
+    """
+    롤링 최대/최소 (van Herk / Gil-Werman): 창 길이 블록마다 앞→뒤, 뒤→앞 누적 ufunc 후 비교 1회.
+    창 [i-w+1, i] = (i-w+1이 속한 블록의 뒤쪽 누적) ∪ (i가 속한 블록의 앞쪽 누적) → 창 길이와 무관하게 O(n).
+    단조 덱 1회 통과와 같은 결과를 벡터 연산으로 계산 (NaN은 np.maximum/minimum이 그대로 전파).
+    짧은 창(<= _EXTREME_SLICE_MAX)은 상수항이 작은 밀린 슬라이스 누적 사용 (결과 동일).
+    """
+    if window <= _EXTREME_SLICE_MAX:
+        return _rolling(x, window, ufunc)
+    x = _as_float(x)
+    n = x.shape[-1]
+    out = np.full(x.shape, np.nan)
+    if n < window:
+        return out
+    nblocks = -(-n // window)
+    padded = np.full(x.shape[:-1] + (nblocks * window,), np.nan)   # 마지막 불완전 블록의 뒤쪽 누적은 읽지 않음
+    padded[..., :n] = x
+    blocks = padded.reshape(x.shape[:-1] + (nblocks, window))
+    prefix = ufunc.accumulate(blocks, axis=-1).reshape(padded.shape)
+    suffix = ufunc.accumulate(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+    out[..., window - 1:] = ufunc(suffix[..., :n - window + 1], prefix[..., window - 1:n])
+    return out
+
+
+def calc_rolling_min(x, window: int) -> np.ndarray:
+    return _rolling_extreme(x, window, np.minimum)
+
+
+def calc_rolling_max(x, window: int) -> np.ndarray:
+    return _rolling_extreme(x, window, np.maximum)
+
+
+def _block_cumsums(x: np.ndarray, window: int):
+    """창 길이 블록마다 앞→뒤 / 뒤→앞 누적합 (마지막 축, 길이는 블록 배수로 0 패딩)"""
+    n = x.shape[-1]
+    nblocks = -(-n // window)
+    padded = np.zeros(x.shape[:-1] + (nblocks * window,))
+    padded[..., :n] = x
+    blocks = padded.reshape(x.shape[:-1] + (nblocks, window))
+    prefix = np.cumsum(blocks, axis=-1).reshape(padded.shape)
+    suffix = np.cumsum(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+    return prefix, suffix
+
+
+def calc_rolling_slope(y, lookback: int) -> np.ndarray:
+    """
+    최근 lookback개 값의 최소제곱 회귀 기울기 (x = 0..L-1) - 봉마다 np.polyfit(x, 창, 1)[0] 한 것과 같음.
+    slope = (L·Σxy − Σx·Σy) / (L·Σx² − (Σx)²), Σx·Σx²는 상수, Σy·Σxy는 롤링 합 (창 안에 NaN 있으면 NaN).
+    짧은 창은 밀린 슬라이스로 직접 합산, 긴 창은 블록 누적합(창 = 시작 블록 뒤쪽 + 끝 블록 앞쪽)으로 O(n).
+    블록 안 위치 j 기준으로 합산하므로 전 구간 누적합과 달리 히스토리 길이에 따라 오차가 커지지 않음.
+    """
+    y = _as_float(y)
+    n = y.shape[-1]
+    out = np.full(y.shape, np.nan)
+    if lookback < 2 or n < lookback:
+        return out
+    sum_x = lookback * (lookback - 1) / 2
+    sum_x2 = (lookback - 1) * lookback * (2 * lookback - 1) / 6
+    m = n - lookback + 1   # 완성된 창 수
+    if lookback <= _SLOPE_SLICE_MAX:
+        sum_y = np.zeros(y.shape[:-1] + (m,))
+        sum_xy = np.zeros(y.shape[:-1] + (m,))
+        for k in range(lookback):
+            seg = y[..., k:k + m]
+            sum_y += seg
+            sum_xy += k * seg
+    else:
+        missing = np.isnan(y)
+        values = np.where(missing, 0.0, y)
+        j = np.arange(lookback)
+        pre_y, suf_y = _block_cumsums(values, lookback)
+        pre_jy, suf_jy = _block_cumsums((values.reshape(-1, n) * np.resize(j, n)).reshape(y.shape), lookback)
+        pre_nan, suf_nan = _block_cumsums(missing.astype(np.float64), lookback)
+        js = np.arange(m) % lookback          # 창 시작의 블록 안 위치 (0이면 창 = 블록 1개)
+        split = js != 0
+        head = slice(0, m)                    # 창 시작 위치
+        tail = slice(lookback - 1, n)         # 창 끝 위치
+        sum_y = suf_y[..., head] + np.where(split, pre_y[..., tail], 0.0)
+        sum_xy = (suf_jy[..., head] - js * suf_y[..., head]
+                  + np.where(split, pre_jy[..., tail] + (lookback - js) * pre_y[..., tail], 0.0))
+        nan_count = suf_nan[..., head] + np.where(split, pre_nan[..., tail], 0.0)
+        sum_y = np.where(nan_count > 0, np.nan, sum_y)
+    out[..., lookback - 1:] = (lookback * sum_xy - sum_x * sum_y) / (lookback * sum_x2 - sum_x * sum_x)
+    return out
+
+
+def _nan_if_zero(x: np.ndarray) -> np.ndarray:
+    return np.where(x == 0, np.nan, x)
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    out = np.empty_like(x)
+    out[..., :1] = np.nan
+    out[..., 1:] = x[..., :-1]
+    return out
+
+
+# =========================================================
+#  지표
+# =========================================================
+def calc_ema_series(close, window: int) -> np.ndarray:
+    """EMA (ewm(span, adjust=False)) - module_ema.calc_ema 배열 버전"""
+    return calc_ewm(close, 2.0 / (window + 1))
+
+
+def calc_true_range(high, low, close) -> np.ndarray:
+    """TR = max(H-L, |H-prevC|, |L-prevC|), 첫 봉은 H-L"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = _shift(close)
+    tr = np.fmax(high - low, np.abs(high - prev_close))
+    return np.fmax(tr, np.abs(low - prev_close))
+
+
+def calc_atr_series(high, low, close, period: int = 14) -> np.ndarray:
+    return calc_ewm(calc_true_range(high, low, close), 2.0 / (period + 1))
+
+
+def calc_rsi_series(close, period: int = 14, zero_loss_nan: bool = True) -> np.ndarray:
+    """
+    Wilder 계열 RSI (ewm(com=period-1, min_periods=period)), 평균 손실 0 → NaN (백테스트 기준).
+    zero_loss_nan=False면 module_rsi.calc_rsi / StreamingRsi와 같이 평균 손실 0 → 100 (이익도 0이면 NaN).
+    """
+    close = _as_float(close)
+    delta = close - _shift(close)
+    gains = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+    losses = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+    alpha = 1.0 / period
+    avg_gain = calc_ewm(gains, alpha, adjust=True, min_periods=period)
+    avg_loss = calc_ewm(losses, alpha, adjust=True, min_periods=period)
+    if zero_loss_nan:
+        avg_loss = _nan_if_zero(avg_loss)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def calc_stoch_rsi_line(close, period: int = 14, zero_loss_nan: bool = True) -> np.ndarray:
+    """
+    Stochastic RSI 원선 (SMA RSI 기반, 0~100). RSI 창 최소/최대는 각각 1회만 계산.
+    zero_loss_nan=False면 module_stochrsi(pandas)와 같이 평균 손실 0 → RSI 100.
+    """
+    close = _as_float(close)
+    delta = close - _shift(close)
+    pad = np.isnan(close)   # NaN 종가(stack_aligned 패딩)는 봉이 없는 것으로 취급 → 창이 일찍 차지 않게 NaN 유지
+    gain = np.where(delta > 0, delta, np.where(pad, np.nan, 0.0))
+    loss = np.where(delta < 0, -delta, np.where(pad, np.nan, 0.0))
+    avg_loss = calc_sma(loss, period)
+    if zero_loss_nan:
+        avg_loss = _nan_if_zero(avg_loss)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = calc_sma(gain, period) / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+    rsi_min = calc_rolling_min(rsi, period)
+    rsi_max = calc_rolling_max(rsi, period)
+    return (rsi - rsi_min) / _nan_if_zero(rsi_max - rsi_min) * 100
+
+
+def calc_stoch_rsi_series(close, period: int = 14, k_period: int = 3, d_period: int = 3):
+    """Stochastic RSI (SMA RSI 기반, 0~100) → (K, D)"""
+    k = calc_sma(calc_stoch_rsi_line(close, period), k_period)
+    d = calc_sma(k, d_period)
+    return k, d
+
+
+def calc_di_series(high, low, close, period: int = 14):
+    """DI+, DI- (ADX 구성 요소)"""
+    high, low = _as_float(high), _as_float(low)
+    up_move = high - _shift(high)
+    down_move = _shift(low) - low
+    dm_plus = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    dm_minus = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    alpha = 2.0 / (period + 1)
+    atr = calc_ewm(calc_true_range(high, low, close), alpha)
+    di_plus = 100 * calc_ewm(dm_plus, alpha) / atr
+    di_minus = 100 * calc_ewm(dm_minus, alpha) / atr
+    return di_plus, di_minus
+
+
+def calc_adx_series(high, low, close, period: int = 14) -> np.ndarray:
+    di_plus, di_minus = calc_di_series(high, low, close, period)
+    dx = 100 * np.abs(di_plus - di_minus) / _nan_if_zero(di_plus + di_minus)
+    return calc_ewm(dx, 2.0 / (period + 1))
+
+
+def calc_bb_series(close, period: int = 20, std: float = 2.0):
+    """볼린저 밴드 (중앙선, 상단, 하단)"""
+    mid = calc_sma(close, period)
+    sigma = calc_rolling_std(close, period)
+    return mid, mid + std * sigma, mid - std * sigma
@@ -1,6 +1,7 @@
 # modules/module_ma.py
 import pandas as pd
-import numpy as np
+
+from modules.module_indicators import calc_rolling_slope
 
 def calc_ma(df, period):
     """이동평균 계산"""
@@ -11,13 +12,17 @@ def calc_ma_slope(df, period, lookback=5):
     ma = calc_ma(df, period)
     
     # 최근 lookback 기간의 MA 값들
-    recent_ma = ma.tail(lookback).values
+    recent_ma = ma.tail(lookback).to_numpy()
     
-    # 선형 회귀로 기울기 계산
-    x = np.arange(len(recent_ma))
-    slope = np.polyfit(x, recent_ma, 1)[0]
+    # 선형 회귀로 기울기 계산 (np.polyfit과 같은 최소제곱 닫힌 식, MA가 아직 없으면 NaN)
+    slope = calc_rolling_slope(recent_ma, len(recent_ma))[-1]
     
-    return slope
+    return float(slope)
+
+def calc_ma_slope_series(df, period, lookback=5):
+    """봉별 MA 기울기 시리즈 (i번째 값 = df.iloc[:i+1]로 calc_ma_slope 한 값, 롤링 Σy·Σxy로 O(n))"""
+    ma = calc_ma(df, period)
+    return pd.Series(calc_rolling_slope(ma, lookback), index=ma.index)
 
 def get_ma_signals(df):
     """MA 기반 신호 생성"""
@@ -48,3 +53,23 @@ def get_ma_signals(df):
     
     return signals
 
+def get_ma_signals_series(df):
+    """get_ma_signals를 전 봉에 대해 계산 (행 i = df.iloc[:i+1]로 get_ma_signals 한 결과, 백테스트용)"""
+    ma40 = calc_ma(df, 40)
+    ma120 = calc_ma(df, 120)
+    ma40_slope = calc_ma_slope_series(df, 40, 5)
+    ma120_slope = calc_ma_slope_series(df, 120, 5)
+    current_price = df['close']
+    
+    return pd.DataFrame({
+        'ma40': ma40,
+        'ma120': ma120,
+        'ma40_slope': ma40_slope,
+        'ma120_slope': ma120_slope,
+        'current_price': current_price,
+        'price_above_ma40': current_price > ma40,
+        'price_above_ma120': current_price > ma120,
+        'ma40_above_ma120': ma40 > ma120,
+        'ma40_slope_positive': ma40_slope > 0,
+        'ma120_slope_positive': ma120_slope > 0,
+    })
@@ -0,0 +1,46 @@
+# modules/module_markets.py
+"""
+마켓 정보 디스크 캐시
+- load_markets() 결과(markets/currencies)를 JSON으로 저장, TTL 이내면 set_markets()로 복원
+- 캐시 복원 시에도 adjustForTimeDifference용 서버 시간 오차는 다시 계산
+"""
+import json
+import logging
+import os
+import time
+
+MARKETS_CACHE_DIR = "cache"
+MARKETS_CACHE_TTL = 6 * 60 * 60   # 6시간 (상장/필터 변경 반영 주기)
+
+
+def _cache_path(exchange, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"markets_{exchange.id}.json")
+
+
+async def load_markets_cached(exchange, cache_dir: str = MARKETS_CACHE_DIR,
+                              ttl: float = MARKETS_CACHE_TTL):
+    path = _cache_path(exchange, cache_dir)
+    try:
+        if time.time() - os.path.getmtime(path) < ttl:
+            with open(path, encoding="utf-8") as f:
+                cached = json.load(f)
+            exchange.set_markets(cached["markets"], cached.get("currencies"))
+            if exchange.options.get("adjustForTimeDifference"):
+                await exchange.load_time_difference()
+            logging.info(f"[MARKETS] Loaded {len(exchange.markets)} markets from cache")
+            return exchange.markets
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.warning(f"[MARKETS] Cache read failed: {type(e).__name__}: {e}")
+
+    markets = await exchange.load_markets()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"markets": exchange.markets, "currencies": exchange.currencies}, f)
+        os.replace(tmp, path)
+    except Exception as e:
+        logging.warning(f"[MARKETS] Cache write failed: {type(e).__name__}: {e}")
+    return markets
@@ -0,0 +1,128 @@
+# modules/module_orders.py
+"""
+심볼별 주문 관리자
+- 주문 응답 + 유저 데이터 이벤트로 미체결 주문(SL/트레일링 등)을 로컬 추적
+- 정리할 주문이 있을 때만 ID로 취소 (빈 cancel_all_orders 호출 제거)
+- create_batch: 시장가 청산 + 새 스탑을 batchOrders 1회 요청으로 전송
+"""
+import logging
+import time
+
+import ccxt.pro as ccxt
+
+OPEN_STATUSES = (None, "open")   # 응답 직후에는 status가 비어 있을 수 있음
+BATCH_MAX = 5                    # Binance batchOrders 1회 최대 주문 수
+
+
+class OrderManager:
+    def __init__(self, exchange, symbol, account=None):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.account = account   # AccountService (주문 후 캐시 무효화)
+        self.open_orders: dict = {}   # order id → order
+
+    @property
+    def has_open(self) -> bool:
+        return bool(self.open_orders)
+
+    # =========================================================
+    #  추적
+    # =========================================================
+    async def sync(self):
+        """거래소 미체결 주문으로 로컬 상태 재구성 (시작 시 1회)"""
+        orders = await self.exchange.fetch_open_orders(self.symbol)
+        self.open_orders = {o["id"]: o for o in orders if o.get("id") is not None}
+
+    def track(self, order: dict):
+        """주문 응답/이벤트 반영: 미체결이면 추가, 종료 상태면 제거 (시장가는 추적하지 않음)"""
+        order_id = order.get("id")
+        if order_id is None:
+            return
+        if order.get("type") != "market" and order.get("status") in OPEN_STATUSES:
+            self.open_orders[order_id] = order
+        else:
+            self.open_orders.pop(order_id, None)
+
+    def on_order(self, order: dict):
+        if order.get("symbol") in (None, self.symbol):
+            self.track(order)
+
+    def _invalidate(self, order_types, sent_at: float):
+        """
+        유저 데이터 스트림 연결 중에는 포지션이 바뀌는 시장가 주문만 무효화 (나머지는 푸시로 충분).
+        sent_at(전송 시각) 이후 이미 도착한 푸시(체결 ACCOUNT_UPDATE가 REST 응답보다 빠른 경우)는 유지.
+        """
+        if self.account is not None and (not self.account.streaming or "market" in order_types):
+            self.account.invalidate(self.symbol, since=sent_at)
+
+    # =========================================================
+    #  주문 생성
+    # =========================================================
+    async def create(self, order_type, side, amount, price=None, params=None) -> dict:
+        sent_at = time.monotonic()
+        order = await self.exchange.create_order(
+            self.symbol, order_type, side, amount, price, params or {}
+        )
+        order.setdefault("type", order_type)
+        self.track(order)
+        self._invalidate([order_type], sent_at)
+        return order
+
+    async def create_batch(self, requests: list) -> list:
+        """
+        requests: [{"type", "side", "amount", "price"(선택), "params"(선택)}, ...]
+        개별 주문 실패는 예외 대신 id=None 인 결과로 반환 (info에 거래소 에러 코드/메시지)
+        """
+        sent_at = time.monotonic()
+        orders = await self.exchange.create_orders([
+            {
+                "symbol": self.symbol,
+                "type": r["type"],
+                "side": r["side"],
+                "amount": r["amount"],
+                "price": r.get("price"),
+                "params": r.get("params") or {},
+            }
+            for r in requests[:BATCH_MAX]
+        ])
+        for request, order in zip(requests, orders):
+            if order.get("id") is not None:
+                order["type"] = request["type"]
+                self.track(order)
+        self._invalidate([r["type"] for r in requests], sent_at)
+        return orders
+
+    # =========================================================
+    #  취소
+    # =========================================================
+    async def cancel(self, order_id):
+        try:
+            await self.exchange.cancel_order(order_id, self.symbol)
+        except ccxt.OrderNotFound:
+            pass   # 이미 체결/취소됨
+        self.open_orders.pop(order_id, None)
+
+    async def cancel_all(self, keep=()) -> int:
+        """추적 중인 미체결 주문을 ID로 취소 (keep 제외). 취소 요청한 주문 수 반환 (0이면 REST 호출 없음)"""
+        ids = [order_id for order_id in self.open_orders if order_id not in keep]
+        if not ids:
+            return 0
+        try:
+            if len(ids) == 1:
+                await self.exchange.cancel_order(ids[0], self.symbol)
+            else:
+                await self.exchange.cancel_orders(ids, self.symbol)
+        except ccxt.OrderNotFound:
+            pass   # 이미 체결/취소됨 (스트림 미연결 시 로컬 상태가 늦을 수 있음)
+        except Exception as e:
+            if keep:
+                # 남겨야 할 주문(방금 배치한 스탑)이 있으면 전체 취소 폴백 불가 → 다음 정리 때 재시도
+                logging.warning(f"[{self.symbol}] Cancel by id failed: {e}")
+                return 0
+            logging.warning(f"[{self.symbol}] Cancel by id failed: {e} → cancel_all_orders")
+            await self.exchange.cancel_all_orders(symbol=self.symbol)
+            self.open_orders.clear()
+            return len(ids)
+        for order_id in ids:
+            self.open_orders.pop(order_id, None)
+        return len(ids)
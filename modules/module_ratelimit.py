@@ -0,0 +1,227 @@
+# modules/module_ratelimit.py
+"""
+Binance 요청 가중치(weight) 예산 관리
+- 응답 헤더 X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-10S 로 실제 사용량 추적 (헤더 없으면 로컬 추정)
+  헤더는 exchange.on_rest_response 훅에서 호출별로 수집 (공유 last_response_headers는 다른 요청 값일 수 있음)
+- 엔드포인트별 비용표로 호출 전 예산 확인 → 초과 시 다음 분(10초) 창까지 대기
+- 보호 주문(SL/청산/취소)은 정보 조회(OHLCV/잔고)보다 높은 한도까지 허용 → 예산이 빠듯해도 먼저 나감
+- 418/429 응답 시 Retry-After 동안 전체 요청 보류
+- BudgetState: 집계 상태 (supervisor 모드에서는 코디네이터 프로세스가 보유, 워커는 IPC로 공유)
+- RateLimitedExchange: 비용표에 있는 REST 메서드만 예산을 거치는 exchange 프록시 (watch_*, 속성은 그대로)
+"""
+import asyncio
+import contextvars
+import logging
+
+import ccxt.pro as ccxt
+
+WEIGHT_LIMIT_1M = 2400        # USDⓈ-M REQUEST_WEIGHT / 1분
+ORDER_LIMIT_10S = 300         # USDⓈ-M ORDERS / 10초
+INFO_CAP = 0.80               # 정보 조회는 한도의 80%까지
+PROTECTIVE_CAP = 0.95         # 보호 주문은 95%까지
+TIGHT_RATIO = 0.60            # 이 비율 이상이면 tight → 포지션 없는 심볼 관리 주기 축소
+BAN_DEFAULT_SECONDS = 60
+
+# 메서드 → (weight, 주문 수). fetch_ohlcv / fetch_open_orders 는 인자에 따라 _request_cost에서 계산
+ENDPOINT_COSTS = {
+    "fetch_ohlcv": (2, 0),
+    "fetch_balance": (5, 0),
+    "fetch_positions": (5, 0),
+    "fetch_open_orders": (1, 0),
+    "fetch_leverages": (5, 0),
+    "fetch_time": (1, 0),
+    "load_time_difference": (1, 0),
+    "load_markets": (1, 0),
+    "set_leverage": (1, 0),
+    "set_margin_mode": (1, 0),
+    "create_order": (0, 1),
+    "create_orders": (5, 5),
+    "cancel_order": (1, 0),
+    "cancel_orders": (1, 0),
+    "cancel_all_orders": (1, 0),
+}
+PROTECTIVE = {"create_order", "create_orders", "cancel_order", "cancel_orders", "cancel_all_orders"}
+
+
+def _ohlcv_weight(limit) -> int:
+    limit = limit or 500
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def _request_cost(name: str, args, kwargs):
+    weight, orders = ENDPOINT_COSTS[name]
+    if name == "fetch_ohlcv":
+        limit = kwargs.get("limit", args[3] if len(args) > 3 else None)
+        weight = _ohlcv_weight(limit)
+    elif name == "fetch_open_orders":
+        symbol = kwargs.get("symbol", args[0] if args else None)
+        weight = 1 if symbol else 40
+    elif name == "create_orders":
+        requests = kwargs.get("orders", args[0] if args else [])
+        orders = len(requests)
+    return weight, orders
+
+
+# 현재 WeightBudget.call 의 응답 헤더 수집 리스트 (태스크별 컨텍스트 → 동시 요청끼리 섞이지 않음)
+_call_headers: contextvars.ContextVar = contextvars.ContextVar("call_headers", default=None)
+
+
+def capture_response_headers(exchange):
+    """exchange.on_rest_response(REST 응답마다 그 응답의 헤더로 호출되는 ccxt 훅)를 감싸 호출별로 헤더 수집"""
+    original = exchange.on_rest_response
+
+    def on_rest_response(code, reason, url, method, headers, *args):
+        sink = _call_headers.get()
+        if sink is not None:
+            sink.append(headers)
+        return original(code, reason, url, method, headers, *args)
+
+    exchange.on_rest_response = on_rest_response
+
+
+def _header(headers, key: str):
+    for k, v in (headers or {}).items():
+        if k.lower() == key:
+            return v
+    return None
+
+
+class BudgetState:
+    """
+    가중치/주문 수 집계 (동기, await 없음).
+    단일 프로세스에서는 WeightBudget이 직접 보유하고,
+    supervisor 모드에서는 코디네이터 프로세스 1곳에 두고 워커들이 IPC로 공유한다.
+    """
+    def __init__(self, weight_limit: int = WEIGHT_LIMIT_1M, order_limit: int = ORDER_LIMIT_10S):
+        self.weight_limit = weight_limit
+        self.order_limit = order_limit
+        self.used_weight = 0
+        self.order_count = 0
+        self._weight_window = None   # 현재 1분 창 (서버 시각 // 60000)
+        self._order_window = None    # 현재 10초 창
+        self._banned_until = 0
+
+    def _roll(self, now_ms: int):
+        if now_ms // 60000 != self._weight_window:
+            self._weight_window = now_ms // 60000
+            self.used_weight = 0
+        if now_ms // 10000 != self._order_window:
+            self._order_window = now_ms // 10000
+            self.order_count = 0
+
+    def try_reserve(self, weight: int, orders: int, protective: bool, now_ms: int):
+        """예산 차감 시도 → (대기 초, 현재 사용 weight). 대기 초가 0이면 차감 완료"""
+        self._roll(now_ms)
+        cap = PROTECTIVE_CAP if protective else INFO_CAP
+        if now_ms < self._banned_until:
+            return (self._banned_until - now_ms) / 1000, self.used_weight
+        if self.used_weight + weight > self.weight_limit * cap:
+            return (60000 - now_ms % 60000) / 1000, self.used_weight
+        if orders and self.order_count + orders > self.order_limit * cap:
+            return (10000 - now_ms % 10000) / 1000, self.used_weight
+        self.used_weight += weight
+        self.order_count += orders
+        return 0.0, self.used_weight
+
+    def observe(self, used, count, now_ms: int) -> int:
+        """응답 헤더의 실제 사용량 반영 (같은 IP의 다른 프로세스 사용량 포함, 로컬 추정보다 작으면 무시)"""
+        self._roll(now_ms)
+        if used is not None:
+            self.used_weight = max(self.used_weight, int(used))
+        if count is not None:
+            self.order_count = max(self.order_count, int(count))
+        return self.used_weight
+
+    def ban(self, seconds: float, now_ms: int):
+        self._banned_until = max(self._banned_until, now_ms + seconds * 1000)
+
+
+class WeightBudget:
+    def __init__(self, exchange, weight_limit: int = WEIGHT_LIMIT_1M, order_limit: int = ORDER_LIMIT_10S):
+        self.exchange = exchange
+        capture_response_headers(exchange)
+        self.weight_limit = weight_limit
+        self.state = BudgetState(weight_limit, order_limit)
+        self.shared = False
+        self.used_weight = 0   # 마지막으로 확인한 사용량 (tight 판단용)
+
+    def share(self, state):
+        """코디네이터의 BudgetState 프록시로 교체 (IPC 호출은 스레드에서 실행해 이벤트 루프 비차단)"""
+        self.state = state
+        self.shared = True
+
+    async def _state_call(self, method: str, *args):
+        fn = getattr(self.state, method)
+        if self.shared:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _now_ms(self) -> int:
+        return self.exchange.milliseconds() - self.exchange.options.get("timeDifference", 0)
+
+    @property
+    def tight(self) -> bool:
+        return self.used_weight >= self.weight_limit * TIGHT_RATIO
+
+    async def acquire(self, weight: int, orders: int = 0, protective: bool = False):
+        while True:
+            wait, self.used_weight = await self._state_call(
+                "try_reserve", weight, orders, protective, self._now_ms()
+            )
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def observe(self, headers):
+        used = _header(headers, "x-mbx-used-weight-1m")
+        count = _header(headers, "x-mbx-order-count-10s")
+        if used is None and count is None:
+            return
+        self.used_weight = await self._state_call("observe", used, count, self._now_ms())
+
+    async def ban(self, headers):
+        retry_after = _header(headers, "retry-after")
+        seconds = int(retry_after) if retry_after else BAN_DEFAULT_SECONDS
+        await self._state_call("ban", seconds, self._now_ms())
+        logging.error(f"[RATELIMIT] Rate limited by exchange → holding requests for {seconds}s")
+
+    async def call(self, name: str, method, *args, **kwargs):
+        weight, orders = _request_cost(name, args, kwargs)
+        await self.acquire(weight, orders, protective=name in PROTECTIVE)
+        headers = []   # 이 호출이 받은 REST 응답 헤더 (마지막 = 최종 응답)
+        token = _call_headers.set(headers)
+        try:
+            result = await method(*args, **kwargs)
+        except (ccxt.DDoSProtection, ccxt.RateLimitExceeded):
+            await self.ban(headers[-1] if headers else None)
+            raise
+        finally:
+            _call_headers.reset(token)
+        # 성공 응답만 사용량 보정에 반영 (보정 실패가 호출 결과를 가리지 않도록)
+        try:
+            await self.observe(headers[-1] if headers else None)
+        except Exception as e:
+            logging.warning(f"[RATELIMIT] Failed to read weight headers: {type(e).__name__}: {e}")
+        return result
+
+
+class RateLimitedExchange:
+    """exchange 프록시: ENDPOINT_COSTS에 있는 메서드만 WeightBudget을 거쳐 호출"""
+    def __init__(self, exchange, budget: WeightBudget):
+        self._exchange = exchange
+        self.budget = budget
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if name not in ENDPOINT_COSTS:
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.budget.call(name, attr, *args, **kwargs)
+        return call
@@ -0,0 +1,31 @@
+# modules/module_scheduler.py
+"""
+봉 마감 정렬 스케줄러
+- 로컬 시계 + 거래소 시간 오차(options["timeDifference"])로 서버 기준 현재 시각 계산
+- 다음 봉 마감 시각까지 정확히 대기 후 마감 시각(ms)을 반환
+"""
+import asyncio
+
+BAR_CLOSE_DELAY = 1.5  # 봉 마감 후 대기 (초) - 거래소가 마감 봉/새 봉을 반영할 시간
+
+
+class BarCloseScheduler:
+    def __init__(self, exchange, timeframe, delay: float = BAR_CLOSE_DELAY):
+        self.exchange = exchange
+        self.timeframe = timeframe
+        self.delay = delay
+        self.tf_ms = exchange.parse_timeframe(timeframe) * 1000
+
+    def server_ms(self) -> int:
+        """서버 기준 현재 시각 (adjustForTimeDifference 로 계산된 오차 반영)"""
+        return self.exchange.milliseconds() - self.exchange.options.get("timeDifference", 0)
+
+    def next_close_ms(self, now_ms: int = None) -> int:
+        now_ms = self.server_ms() if now_ms is None else now_ms
+        return (now_ms // self.tf_ms + 1) * self.tf_ms
+
+    async def wait_next_close(self) -> int:
+        """다음 봉 마감(+delay)까지 대기 → 마감 시각(ms, 새 봉의 open timestamp) 반환"""
+        close_ms = self.next_close_ms()
+        await asyncio.sleep(max(0.0, (close_ms - self.server_ms()) / 1000 + self.delay))
+        return close_ms
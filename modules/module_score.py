@@ -1,5 +1,7 @@
 import numpy as np
 
+from modules.module_indicators import calc_rolling_max
+
 def calculate_score(df, rsi, stoch_rsi, ema_10, ema_20, ema_50):
     long_score = 0
     short_score = 0
@@ -48,4 +50,51 @@ def calculate_score(df, rsi, stoch_rsi, ema_10, ema_20, ema_50):
     elif price_diff_percent >= 5:
         short_score += int(price_diff_percent) - 4
     
-    return long_score, short_score
\ No newline at end of file
+    return long_score, short_score
+
+def _rolling_max_partial(x, window):
+    """iloc[-window:].max() 를 봉마다 (창이 덜 찬 앞부분은 있는 봉까지만)"""
+    x = np.asarray(x, dtype=np.float64)
+    out = calc_rolling_max(x, window)
+    head = min(window - 1, len(x))
+    out[:head] = np.maximum.accumulate(x[:head])
+    return out
+
+
+def calculate_score_series(df, rsi, stoch_rsi, ema_10, ema_20, ema_50):
+    """
+    calculate_score를 전 봉에 대해 한 번에 계산 (백테스트/유니버스 스캔용, 파이썬 루프 없음).
+    rsi / ema_*: 봉별 시리즈(또는 배열), stoch_rsi: 'K', 'D' 컬럼 DataFrame (calc_stoch_rsi 결과)
+    i번째 결과 = df.iloc[:i+1]과 i번째 지표 값으로 calculate_score 한 값 → (long_score, short_score) 정수 배열
+    """
+    rsi = np.asarray(rsi, dtype=np.float64)
+    k = np.asarray(stoch_rsi['K'], dtype=np.float64)
+    d = np.asarray(stoch_rsi['D'], dtype=np.float64)
+    ema_10 = np.asarray(ema_10, dtype=np.float64)
+    ema_20 = np.asarray(ema_20, dtype=np.float64)
+    ema_50 = np.asarray(ema_50, dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+
+    # RSI 점수 (구간별 첫 번째로 맞는 조건만, NaN은 0점 - 롱/숏 구간은 겹치지 않음)
+    long_score = np.select([rsi >= 90, rsi >= 80, rsi >= 70], [30, 25, 20], 0)
+    short_score = np.select([rsi <= 10, rsi <= 20, rsi <= 30], [30, 25, 20], 0)
+
+    # Stoch RSI 점수
+    long_score += np.select([(k <= 20) & (d <= 20), (k <= 30) & (d <= 30)], [20, 10], 0)
+    short_score += np.select([(k >= 80) & (d >= 80), (k >= 70) & (d >= 70)], [20, 10], 0)
+
+    # EMA 점수
+    long_score += np.where((ema_50 < ema_20) & (ema_20 < ema_10) & (ema_10 < close), 10, 0)
+    short_score += np.where((ema_50 > ema_20) & (ema_20 > ema_10) & (ema_10 > close), 10, 0)
+
+    # 최근 40개 봉 기준 점수 (롤링 최대값은 한 번만 계산)
+    last_40_high = _rolling_max_partial(df['high'].to_numpy(dtype=np.float64), 40)
+    last_40_close = _rolling_max_partial(close, 40)
+    middle_price = (last_40_high + last_40_close) / 2
+    price_diff_percent = (close - middle_price) / middle_price * 100
+    with np.errstate(invalid="ignore"):
+        truncated = np.trunc(price_diff_percent)
+        long_score += np.where(price_diff_percent <= -5, np.abs(truncated) - 4, 0).astype(np.int64)
+        short_score += np.where(price_diff_percent >= 5, truncated - 4, 0).astype(np.int64)
+
+    return long_score, short_score
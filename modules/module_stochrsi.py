@@ -1,5 +1,8 @@
 import pandas as pd
 
+from modules.module_indicators import calc_sma, calc_stoch_rsi_line
+
+
 def calc_stoch_rsi(close_prices, period=14, k_period=3, d_period=3):
     """
     Stochastic RSI를 계산하는 함수.
@@ -13,28 +16,16 @@ def calc_stoch_rsi(close_prices, period=14, k_period=3, d_period=3):
     Returns:
     pd.DataFrame: Stochastic RSI와 K, D 값을 포함한 데이터프레임
     """
-    # RSI 계산
-    delta = close_prices.diff(1)
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-
-    # Stochastic RSI 계산
-    stoch_rsi = (rsi - rsi.rolling(window=period).min()) / (rsi.rolling(window=period).max() - rsi.rolling(window=period).min())
-    stoch_rsi = stoch_rsi * 100  # 0~100 범위로 변환
+    # RSI 창 최소/최대는 module_indicators에서 한 번씩만 계산 (평균 손실 0 → RSI 100, 기존과 동일)
+    stoch_rsi = calc_stoch_rsi_line(close_prices, period, zero_loss_nan=False)
 
     # K, D 라인 계산
-    k = stoch_rsi.rolling(window=k_period).mean()
-    d = k.rolling(window=d_period).mean()
+    k = calc_sma(stoch_rsi, k_period)
+    d = calc_sma(k, d_period)
 
     # 결과를 데이터프레임으로 반환
     return pd.DataFrame({
         'StochRSI': stoch_rsi,
         'K': k,
         'D': d
-    })
+    }, index=close_prices.index)
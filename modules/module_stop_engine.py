@@ -0,0 +1,97 @@
+# modules/module_stop_engine.py
+"""
+로컬 인트라바 스탑 엔진
+- 거래소 STOP_MARKET으로 보호되지 않는 포지션(코드 기반 SL, 트레일링 구간)을 실시간 가격 스트림으로 감시
+- 가격 소스: "mark" (watch_mark_price) / "bidask" (watch_bids_asks, 롱=bid / 숏=ask)
+- 손절가 또는 트레일링 스탑 이탈 즉시 콜백 1회 호출 (콜백이 reduce-only 시장가 청산 담당)
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+PRICE_SOURCE = "bidask"    # "mark" | "bidask"
+RECONNECT_DELAY = 1.0
+
+
+@dataclass
+class StopLevel:
+    side: str                          # "long" | "short"
+    stop_price: Optional[float]        # 고정 손절가 (본전 SL 포함)
+    trail_distance: Optional[float]    # 트레일링 거리 (ATR * 배수), None이면 트레일링 없음
+    best_price: Optional[float]        # 트레일링 기준 최고/최저가
+    on_trigger: Callable[[str, float], Awaitable]
+
+    def check(self, price: float) -> Optional[str]:
+        """가격 반영 후 이탈 사유 반환 (없으면 None)"""
+        long = self.side == "long"
+        if self.trail_distance is not None:
+            if self.best_price is None:
+                self.best_price = price
+            self.best_price = max(self.best_price, price) if long else min(self.best_price, price)
+        if self.stop_price is not None:
+            if (long and price <= self.stop_price) or (not long and price >= self.stop_price):
+                return "STOP_LOSS"
+        if self.trail_distance is not None:
+            trail = self.best_price - self.trail_distance if long else self.best_price + self.trail_distance
+            if (long and price <= trail) or (not long and price >= trail):
+                return "TRAILING_STOP"
+        return None
+
+
+class StopEngine:
+    def __init__(self, exchange, price_source: str = PRICE_SOURCE):
+        self.exchange = exchange
+        self.price_source = price_source
+        self.levels: dict = {}    # symbol → StopLevel
+        self._tasks: dict = {}    # symbol → 감시 태스크
+
+    def arm(self, symbol: str, side: str, stop_price, trail_distance, best_price, on_trigger):
+        """감시 시작 또는 레벨 갱신 (best_price는 기존 값과 비교해 더 유리한 쪽 유지)"""
+        level = self.levels.get(symbol)
+        if level is not None and level.side == side:
+            level.stop_price = stop_price
+            level.trail_distance = trail_distance
+            if best_price is not None and level.best_price is not None:
+                best_price = max(best_price, level.best_price) if side == "long" else min(best_price, level.best_price)
+            level.best_price = best_price if best_price is not None else level.best_price
+            level.on_trigger = on_trigger
+        else:
+            self.levels[symbol] = StopLevel(side, stop_price, trail_distance, best_price, on_trigger)
+        if symbol not in self._tasks:
+            self._tasks[symbol] = asyncio.create_task(self._watch(symbol), name=f"stop:{symbol}")
+
+    def disarm(self, symbol: str):
+        self.levels.pop(symbol, None)
+        task = self._tasks.pop(symbol, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    async def _price(self, symbol: str, side: str) -> float:
+        if self.price_source == "mark":
+            ticker = await self.exchange.watch_mark_price(symbol)
+            return float(ticker.get("markPrice") or ticker["info"]["p"])
+        tickers = await self.exchange.watch_bids_asks([symbol])
+        ticker = tickers[symbol]
+        return float(ticker["bid"] if side == "long" else ticker["ask"])
+
+    async def _watch(self, symbol: str):
+        while symbol in self.levels:
+            try:
+                level = self.levels[symbol]
+                price = await self._price(symbol, level.side)
+                level = self.levels.get(symbol)
+                if level is None:
+                    break
+                reason = level.check(price)
+                if reason is None:
+                    continue
+                logging.warning(f"[{symbol}] Intrabar {reason} triggered @ {price}")
+                self.disarm(symbol)   # 1회만 발동 (청산 실패 시 전략이 다음 관리 때 재무장)
+                await level.on_trigger(reason, price)
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"[{symbol}] Stop engine price error: {type(e).__name__}: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
@@ -0,0 +1,339 @@
+# modules/module_stream_indicators.py
+"""
+스트리밍(증분) 지표 - 봉 1개당 O(1) 갱신
+- update(bar): 새 봉 추가 / revise_last(bar): 진행 중인 마지막 봉 값 수정 / peek(bar): 상태 변경 없이 미리 계산
+- bar 형식: [timestamp, open, high, low, close, volume] (CandleRingBuffer 행과 동일)
+- 같은 입력이면 pandas 버전(module_ema / module_rsi / module_atr)과 부동소수 오차 내 일치
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+
+class _StreamingIndicator:
+    """update/revise_last 공통 처리: 마지막 봉 적용 직전 상태를 보관해 두고 재적용"""
+    def __init__(self, history: int = 1):
+        self._state = self._initial_state()
+        self._prev_state = self._state
+        self.values = deque(maxlen=history)   # 최근 출력값 (values[-1] = 현재 봉)
+
+    @property
+    def value(self) -> float:
+        return self.values[-1] if self.values else math.nan
+
+    def update(self, bar) -> float:
+        self._prev_state = self._state
+        self._state, out = self._step(self._prev_state, bar)
+        self.values.append(out)
+        return out
+
+    def revise_last(self, bar) -> float:
+        if not self.values:
+            return self.update(bar)
+        self._state, out = self._step(self._prev_state, bar)
+        self.values[-1] = out
+        return out
+
+    def peek(self, bar) -> list:
+        """bar를 다음 봉으로 적용했을 때의 values (상태는 그대로) - 캐시된 마감 봉 상태 + 진행 중인 봉"""
+        _, out = self._step(self._state, bar)
+        return self._peek_values(out)
+
+    def _peek_values(self, out: float) -> list:
+        values = list(self.values)
+        if len(values) == self.values.maxlen:
+            values.pop(0)
+        values.append(out)
+        return values
+
+    def _initial_state(self):
+        raise NotImplementedError
+
+    def _step(self, state, bar):
+        raise NotImplementedError
+
+
+class StreamingEma(_StreamingIndicator):
+    """calc_ema (ewm(span, adjust=False)) 증분 버전"""
+    def __init__(self, window: int, history: int = 1):
+        self.alpha = 2.0 / (window + 1)
+        super().__init__(history)
+
+    def _initial_state(self):
+        return None
+
+    def _step(self, state, bar):
+        x = float(bar[CLOSE])
+        if state is None:
+            return x, x
+        y = ((1 - self.alpha) * state + self.alpha * x) / ((1 - self.alpha) + self.alpha)
+        return y, y
+
+
+class StreamingRsi(_StreamingIndicator):
+    """calc_rsi (ewm(com=period-1, adjust=True, min_periods=period)) 증분 버전"""
+    def __init__(self, period: int = 14, history: int = 1):
+        self.period = period
+        self.decay = 1 - 1.0 / period
+        super().__init__(history)
+
+    def _initial_state(self):
+        # (직전 종가, gain 가중합, loss 가중합, 가중치 합, 관측 수)
+        return (None, 0.0, 0.0, 0.0, 0)
+
+    def _step(self, state, bar):
+        prev_close, gain_sum, loss_sum, weight, nobs = state
+        close = float(bar[CLOSE])
+        if prev_close is None:
+            return (close, gain_sum, loss_sum, weight, nobs), math.nan
+        delta = close - prev_close
+        gain_sum = gain_sum * self.decay + max(delta, 0.0)
+        loss_sum = loss_sum * self.decay + max(-delta, 0.0)
+        weight = weight * self.decay + 1.0
+        nobs += 1
+        state = (close, gain_sum, loss_sum, weight, nobs)
+        if nobs < self.period:
+            return state, math.nan
+        avg_gain, avg_loss = gain_sum / weight, loss_sum / weight
+        if avg_loss == 0:
+            return state, (math.nan if avg_gain == 0 else 100.0)
+        return state, 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+class StreamingAtr(_StreamingIndicator):
+    """calc_atr (TR의 ewm(span, adjust=False)) 증분 버전"""
+    def __init__(self, period: int = 14, history: int = 1):
+        self.alpha = 2.0 / (period + 1)
+        super().__init__(history)
+
+    def _initial_state(self):
+        return (None, None)   # (직전 종가, ATR)
+
+    def _step(self, state, bar):
+        prev_close, atr = state
+        high, low, close = float(bar[HIGH]), float(bar[LOW]), float(bar[CLOSE])
+        tr = high - low
+        if prev_close is not None:
+            tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+        if atr is None:
+            atr = tr
+        else:
+            atr = ((1 - self.alpha) * atr + self.alpha * tr) / ((1 - self.alpha) + self.alpha)
+        return (close, atr), atr
+
+
+class StreamingRollingMax(_StreamingIndicator):
+    """
+    rolling(window).max() 증분 버전 (단조 덱: 창 안에서 이후 값보다 작지 않은 후보만 유지, 앞쪽 = 창 최대값).
+    - 마지막 봉은 덱에 넣지 않고 따로 보관 → revise_last / peek은 덱을 건드리지 않고 O(1)
+    - 다음 봉이 오면 보관하던 봉을 덱에 확정: 지배당한 후보는 오른쪽, 창을 벗어난 후보는 왼쪽에서 제거
+      (각 봉은 덱에 한 번 들어가고 한 번 나가므로 봉당 분할 상환 O(1))
+    창 안에 NaN이 있거나 봉이 window개 미만이면 NaN (pandas 기본값과 동일).
+    column: 대상 컬럼 (HIGH / LOW / CLOSE ...)
+    """
+    def __init__(self, window: int, column: int = HIGH, history: int = 1):
+        self.window = window
+        self.column = column
+        self._candidates = deque()   # 확정된 봉의 (봉 번호, 값)
+        self._count = 0              # 들어온 봉 수 (마지막 봉 번호 = _count - 1)
+        self._last = None            # 아직 덱에 확정하지 않은 마지막 봉 값
+        self._last_nan = -1          # 확정된 봉 중 마지막 NaN 봉 번호
+        super().__init__(history)
+
+    @staticmethod
+    def _dominates(new: float, old: float) -> bool:
+        return new >= old
+
+    def _initial_state(self):
+        return None
+
+    def update(self, bar) -> float:
+        idx = self._count
+        if self._last is not None:
+            self._settle(idx)
+        self._count += 1
+        self._last = float(bar[self.column])
+        out = self._output(idx, ((idx, self._last),))
+        self.values.append(out)
+        return out
+
+    def revise_last(self, bar) -> float:
+        if self._last is None:
+            return self.update(bar)
+        idx = self._count - 1
+        self._last = float(bar[self.column])
+        out = self._output(idx, ((idx, self._last),))
+        self.values[-1] = out
+        return out
+
+    def peek(self, bar) -> list:
+        idx = self._count
+        pending = ((idx, float(bar[self.column])),)
+        if self._last is not None:
+            pending = ((idx - 1, self._last),) + pending
+        return self._peek_values(self._output(idx, pending))
+
+    def _settle(self, next_idx: int):
+        """보관 중인 마지막 봉(next_idx - 1)을 덱에 확정 + next_idx 봉의 창 밖 후보 제거"""
+        idx, x = next_idx - 1, self._last
+        candidates = self._candidates
+        if x != x:
+            self._last_nan = idx
+            candidates.clear()   # NaN 이전 후보가 든 창에는 NaN도 들어 있으므로 다시 쓰이지 않음
+        else:
+            while candidates and self._dominates(x, candidates[-1][1]):
+                candidates.pop()
+            candidates.append((idx, x))
+        while candidates and candidates[0][0] <= next_idx - self.window:
+            candidates.popleft()
+
+    def _output(self, idx: int, pending) -> float:
+        """idx 봉의 창 극값. pending: 덱에 아직 없는 ((봉 번호, 값), ...) (창 밖 봉은 무시)"""
+        start = idx - self.window + 1
+        if start < 0 or self._last_nan >= start:
+            return math.nan
+        # 덱은 idx - 1 봉 기준으로 정리돼 있을 수 있음 → 앞쪽 후보 1개까지 창 밖일 수 있음
+        candidates = self._candidates
+        best = None
+        if candidates:
+            if candidates[0][0] >= start:
+                best = candidates[0][1]
+            elif len(candidates) > 1:
+                best = candidates[1][1]
+        for i, x in pending:
+            if i < start:
+                continue
+            if x != x:
+                return math.nan
+            if best is None or self._dominates(x, best):
+                best = x
+        return best
+
+
+class StreamingRollingMin(StreamingRollingMax):
+    """rolling(window).min() 증분 버전"""
+    def __init__(self, window: int, column: int = LOW, history: int = 1):
+        super().__init__(window, column, history)
+
+    @staticmethod
+    def _dominates(new: float, old: float) -> bool:
+        return new <= old
+
+
+class StreamingMaSlope(_StreamingIndicator):
+    """
+    module_ma.calc_ma_slope (SMA의 최근 lookback개 선형 회귀 기울기) 증분 버전.
+    SMA 합과 회귀용 Σy·Σxy를 창이 한 칸 밀릴 때마다 O(1)로 갱신:
+    Σxy' = Σxy − (Σy − y_out) + (L−1)·y_in, Σy' = Σy − y_out + y_in
+    창에서 빠지는 종가/MA는 봉 번호로 인덱싱하는 고정 링에서 읽음.
+    링은 창보다 1칸 크게 잡아 방금 쓴 봉이 빠질 값을 덮어쓰지 않음 → revise_last / peek도 O(1).
+    창 길이만큼 지날 때마다 합을 링에서 다시 계산 (분할 상환 O(1), 가감 누적 오차가 히스토리 길이에 따라 커지지 않음).
+    """
+    def __init__(self, period: int, lookback: int = 5, history: int = 1):
+        self.period = period
+        self.lookback = lookback
+        sum_x = lookback * (lookback - 1) / 2
+        self._sum_x = sum_x
+        self._denom = lookback * (lookback - 1) * lookback * (2 * lookback - 1) / 6 - sum_x * sum_x
+        self._closes = [0.0] * (period + 1)   # 봉 번호 % (period + 1) → 종가
+        self._mas = [0.0] * (lookback + 1)    # MA 번호 % (lookback + 1) → MA
+        super().__init__(history)
+
+    def _initial_state(self):
+        # (봉 수, 종가 합, MA 수, Σy, Σxy, 이 봉 종가, 이 봉 MA)
+        return (0, 0.0, 0, 0.0, 0.0, None, None)
+
+    def update(self, bar) -> float:
+        out = super().update(bar)
+        self._commit()
+        return out
+
+    def revise_last(self, bar) -> float:
+        out = super().revise_last(bar)
+        self._commit()
+        return out
+
+    def _commit(self):
+        """현재 상태의 마지막 봉 종가/MA를 링에 기록 (_step은 링을 읽기만 함 → peek은 상태 불변)"""
+        count, _, ma_count, _, _, close, ma = self._state
+        self._closes[(count - 1) % (self.period + 1)] = close
+        if ma is not None:
+            self._mas[(ma_count - 1) % (self.lookback + 1)] = ma
+
+    def _step(self, state, bar):
+        count, close_sum, ma_count, sum_y, sum_xy, _, _ = state
+        close = float(bar[CLOSE])
+        if count % self.period == 0:
+            close_sum = close + sum(self._closes[j % (self.period + 1)] for j in range(count - self.period + 1, count))
+        else:
+            close_sum += close
+            if count >= self.period:
+                close_sum -= self._closes[(count - self.period) % (self.period + 1)]
+        count += 1
+        if count < self.period:
+            return (count, close_sum, ma_count, sum_y, sum_xy, close, None), math.nan
+        ma = close_sum / self.period
+        if ma_count >= self.lookback and ma_count % self.lookback == 0:
+            window = [self._mas[j % (self.lookback + 1)] for j in range(ma_count - self.lookback + 1, ma_count)]
+            window.append(ma)
+            sum_y = sum(window)
+            sum_xy = sum(x * y for x, y in enumerate(window))
+        elif ma_count >= self.lookback:
+            ma_out = self._mas[(ma_count - self.lookback) % (self.lookback + 1)]
+            sum_xy = sum_xy - (sum_y - ma_out) + (self.lookback - 1) * ma
+            sum_y = sum_y - ma_out + ma
+        else:
+            sum_xy += ma_count * ma
+            sum_y += ma
+        ma_count += 1
+        state = (count, close_sum, ma_count, sum_y, sum_xy, close, ma)
+        if ma_count < self.lookback:
+            return state, math.nan
+        return state, (self.lookback * sum_xy - self._sum_x * sum_y) / self._denom
+
+
+class IndicatorEngine:
+    """
+    여러 스트리밍 지표를 캔들 버퍼와 동기화.
+    sync(rows): 새 봉은 update, 마지막으로 반영한 봉은 revise_last (마감 봉만 넘기는 것을 전제).
+    peek(bar): 진행 중인 봉을 상태 변경 없이 적용한 값 → 틱마다 sync 범위가 바뀌어도 재계산 없음.
+    버퍼가 백필/리셋돼 이어 붙일 수 없으면 전체 재계산.
+    """
+    def __init__(self, **factories):
+        self._factories = factories   # name → 인자 없는 생성 함수
+        self.last_timestamp = None
+        self._reset()
+
+    def _reset(self):
+        self.indicators = {name: make() for name, make in self._factories.items()}
+        self.last_timestamp = None
+
+    def __getitem__(self, name):
+        return self.indicators[name]
+
+    def sync(self, rows: np.ndarray):
+        if len(rows) == 0:
+            return
+        timestamps = rows[:, TS]
+        if self.last_timestamp is None:
+            start = 0
+        else:
+            idx = int(np.searchsorted(timestamps, self.last_timestamp))
+            if idx >= len(rows) or timestamps[idx] != self.last_timestamp:
+                self._reset()   # 이어 붙일 지점이 버퍼에 없음 → 전체 재계산
+                start = 0
+            else:
+                for ind in self.indicators.values():
+                    ind.revise_last(rows[idx])
+                start = idx + 1
+        for bar in rows[start:]:
+            for ind in self.indicators.values():
+                ind.update(bar)
+        self.last_timestamp = timestamps[-1]
+
+    def peek(self, bar) -> dict:
+        """name → 진행 중인 bar까지 반영한 values (상태는 그대로)"""
+        return {name: ind.peek(bar) for name, ind in self.indicators.items()}
@@ -0,0 +1,172 @@
+# modules/module_supervisor.py
+"""
+멀티 프로세스 supervisor 모드
+- HashRing: 일관된 해싱으로 심볼 → 워커 배정 (워커 수가 바뀌어도 대부분의 심볼은 같은 워커 유지)
+- SharedState: 코디네이터 프로세스(multiprocessing manager)에 두는 공유 상태
+  - 요청 가중치 예산(BudgetState) → 같은 IP의 모든 워커가 하나의 한도를 나눠 씀
+  - 잔고 스냅샷 → 한 워커가 조회하면 다른 워커는 max_age 동안 재사용
+- supervise(): 워커 프로세스 기동 + 비정상 종료 시 재시작 (연속 실패 시 대기 시간 증가)
+"""
+import bisect
+import hashlib
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from multiprocessing.managers import BaseManager
+
+from modules.module_ratelimit import BudgetState
+
+HASH_REPLICAS = 100            # 워커당 가상 노드 수
+SUPERVISOR_POLL = 2.0          # 워커 상태 확인 주기 (초)
+RESTART_DELAY = 5.0            # 재시작 대기 시작값 (초)
+RESTART_DELAY_MAX = 120.0      # 재시작 대기 최대값 (초)
+STABLE_AFTER = 300.0           # 이 시간 이상 살아 있던 워커가 죽으면 대기 시간 초기화 (초)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    def __init__(self, nodes, replicas: int = HASH_REPLICAS):
+        ring = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self._keys = [k for k, _ in ring]
+        self._nodes = [n for _, n in ring]
+
+    def node(self, key: str):
+        idx = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[idx]
+
+
+def shard_symbols(symbols, workers: int) -> dict:
+    """워커 id → 심볼 리스트 (심볼이 배정되지 않은 워커는 제외)"""
+    ring = HashRing(range(workers))
+    shards: dict = {}
+    for symbol in symbols:
+        shards.setdefault(ring.node(symbol), []).append(symbol)
+    return dict(sorted(shards.items()))
+
+
+# =========================================================
+#  코디네이터 공유 상태
+# =========================================================
+class SharedState:
+    """
+    manager 서버는 워커 연결마다 별도 스레드에서 메서드를 실행 →
+    확인 후 차감(try_reserve) 등 읽기-수정-쓰기가 워커 간에 끼어들지 않도록 모든 메서드를 락으로 직렬화
+    """
+    def __init__(self):
+        self.budget = BudgetState()
+        self._balance = None
+        self._balance_at = 0.0
+        self._lock = threading.Lock()
+
+    # --- 요청 가중치 예산 (BudgetState 위임) ---
+    def try_reserve(self, weight, orders, protective, now_ms):
+        with self._lock:
+            return self.budget.try_reserve(weight, orders, protective, now_ms)
+
+    def observe(self, used, count, now_ms):
+        with self._lock:
+            return self.budget.observe(used, count, now_ms)
+
+    def ban(self, seconds, now_ms):
+        with self._lock:
+            self.budget.ban(seconds, now_ms)
+
+    # --- 잔고 스냅샷 ---
+    def get_balance(self, newer_than: float, max_age: float):
+        """newer_than 이후에 조회됐고 max_age 이내인 잔고만 반환 (없으면 None → 호출 측이 직접 조회)"""
+        with self._lock:
+            if self._balance is None or self._balance_at <= newer_than:
+                return None
+            if time.time() - self._balance_at >= max_age:
+                return None
+            return self._balance
+
+    def put_balance(self, balance: dict):
+        with self._lock:
+            self._balance = balance
+            self._balance_at = time.time()
+
+
+_state = None
+
+
+def _get_state() -> SharedState:
+    global _state
+    if _state is None:
+        _state = SharedState()
+    return _state
+
+
+class CoordinatorManager(BaseManager):
+    pass
+
+
+CoordinatorManager.register("state", callable=_get_state)
+
+
+def connect_shared_state(address, authkey: bytes):
+    """워커 프로세스에서 코디네이터 접속 → SharedState 프록시 반환"""
+    manager = CoordinatorManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.state()
+
+
+# =========================================================
+#  워커 기동 / 재시작
+# =========================================================
+def supervise(symbols, workers: int, target):
+    """target(worker_id, symbols, address, authkey): 워커 프로세스 진입점 (모듈 최상위 함수)"""
+    authkey = os.urandom(16)
+    manager = CoordinatorManager(address=("127.0.0.1", 0), authkey=authkey)
+    manager.start()
+    shards = shard_symbols(symbols, workers)
+    for worker_id, assigned in shards.items():
+        logging.info(f"[SUPERVISOR] worker-{worker_id}: {assigned}")
+
+    procs: dict = {}
+    started_at: dict = {}
+    delays = {worker_id: RESTART_DELAY for worker_id in shards}
+    restart_at: dict = {}
+
+    def start(worker_id):
+        proc = mp.Process(
+            target=target, args=(worker_id, shards[worker_id], manager.address, authkey),
+            name=f"worker-{worker_id}",
+        )
+        proc.start()
+        procs[worker_id] = proc
+        started_at[worker_id] = time.time()
+
+    try:
+        for worker_id in shards:
+            start(worker_id)
+        while True:
+            time.sleep(SUPERVISOR_POLL)
+            now = time.time()
+            for worker_id, proc in procs.items():
+                if proc.is_alive() or worker_id in restart_at:
+                    continue
+                if now - started_at[worker_id] >= STABLE_AFTER:
+                    delays[worker_id] = RESTART_DELAY
+                logging.error(
+                    f"[SUPERVISOR] worker-{worker_id} exited (code={proc.exitcode}) "
+                    f"→ restart in {delays[worker_id]:.0f}s"
+                )
+                restart_at[worker_id] = now + delays[worker_id]
+                delays[worker_id] = min(delays[worker_id] * 2, RESTART_DELAY_MAX)
+            for worker_id, at in list(restart_at.items()):
+                if now >= at:
+                    del restart_at[worker_id]
+                    start(worker_id)
+    finally:
+        for proc in procs.values():
+            if proc.is_alive():
+                proc.terminate()
+        for proc in procs.values():
+            proc.join(timeout=10)
+        manager.shutdown()
@@ -0,0 +1,80 @@
+# modules/module_user_stream.py
+"""
+유저 데이터 스트림 (ccxt.pro watch_orders / watch_positions / watch_balance)
+- 체결/취소/포지션 변화를 폴링 없이 AccountService 캐시와 각 전략(on_order/on_position)에 푸시
+- 스트림 오류 시 AccountService.streaming=False → 기존 REST 조회로 자동 폴백
+"""
+import asyncio
+import logging
+
+RECONNECT_DELAY = 1.0
+RECONNECT_DELAY_MAX = 30.0
+
+
+class UserDataStream:
+    def __init__(self, exchange, account, strategies):
+        self.exchange = exchange
+        self.account = account
+        self.strategies = {s.symbol: s for s in strategies}
+        self._tasks = []
+        self._healthy = {}
+
+    async def start(self):
+        self._tasks = [
+            asyncio.create_task(self._loop("orders", self.exchange.watch_orders, self._on_orders)),
+            asyncio.create_task(self._loop("positions", self.exchange.watch_positions, self._on_positions)),
+            asyncio.create_task(self._loop("balance", self.exchange.watch_balance, self._on_balance)),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.account.streaming = False
+
+    def _set_healthy(self, name: str, healthy: bool):
+        self._healthy[name] = healthy
+        streaming = len(self._healthy) == 3 and all(self._healthy.values())
+        if streaming != self.account.streaming:
+            self.account.streaming = streaming
+            # 끊긴 동안(또는 끊기는 순간) 놓친 이벤트가 있을 수 있음 → 양방향 전환 모두 REST로 재동기화
+            self.account.invalidate()
+            logging.info(f"[USER STREAM] {'connected' if streaming else 'disconnected → REST polling'}")
+
+    async def _loop(self, name, watch, handler):
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                events = await watch()
+                self._set_healthy(name, True)  # 첫 이벤트 수신 = 구독 확인 (그 전까지는 REST 폴링 유지)
+                handler(events)
+                delay = RECONNECT_DELAY
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._set_healthy(name, False)
+                logging.warning(
+                    f"[USER STREAM] {name} error: {type(e).__name__}: {e} → retry in {delay:.0f}s"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    # =========================================================
+    #  이벤트 핸들러
+    # =========================================================
+    def _on_orders(self, orders):
+        for order in orders:
+            strategy = self.strategies.get(order.get("symbol"))
+            if strategy is not None:
+                strategy.on_order(order)
+
+    def _on_positions(self, positions):
+        for position in positions:
+            self.account.apply_position(position)
+            strategy = self.strategies.get(position.get("symbol"))
+            if strategy is not None:
+                strategy.on_position(position)
+
+    def _on_balance(self, balance):
+        self.account.apply_balance(balance)
@@ -7,16 +7,20 @@ Trailing ATR 전략 (backtest_v2_no_avgdown.py 로직 1:1 이식)
 - ATR 기반 동적 손절: 진입가 대비 ATR*2.0 (타이트)
 - 포지션 사이징: 잔고의 10%
 """
+import asyncio
 import math
-import pandas as pd
+import numpy as np
 import logging
-from modules.module_rsi import calc_rsi
-from modules.module_ema import calc_ema
-from modules.module_atr import calc_atr
+from modules.module_indicators import stack_aligned, calc_ema_series, calc_rsi_series, calc_atr_series
+from modules.module_account import AccountSnapshot
+from modules.module_orders import OrderManager
+from modules.module_indicator_cache import build_indicators
+from modules.module_stream_indicators import IndicatorEngine, StreamingEma, StreamingRsi, StreamingAtr
 
 # === 전략 상수 (백테스트 v2_no_avgdown과 동일) ===
 TIMEFRAME = "15m"
 LEVERAGE = 3
+MARGIN_MODE = "isolated"
 EMA_MEDIUM = 20
 EMA_SLOW = 120
 SLOPE_PERIOD = 3
@@ -32,6 +36,12 @@ TRAILING_STOP_ATR_MULT = 2.5  # 트레일링 스탑: 최고점 대비 ATR * 2.5
 ATR_PERIOD = 14
 INITIAL_SL_ATR_MULT = 2.0     # 초기 손절: 진입가 대비 ATR * 2.0 (타이트)
 
+# === 거래소 트레일링 스탑 (TRAILING_STOP_MARKET) ===
+NATIVE_TRAILING = True        # 트레일링 구간을 거래소 주문으로 보호 (False면 코드 기반 트레일링)
+CALLBACK_RATE_MIN = 0.1       # Binance callbackRate 허용 범위 (%)
+CALLBACK_RATE_MAX = 10.0
+TRAIL_REPLACE_ATR_CHANGE = 0.2  # 배치 당시 ATR 대비 20% 이상 변하면 재배치
+
 # === 포지션 사이징 ===
 POSITION_SIZE_PCT = 0.10
 MIN_BUY_UNIT = 5
@@ -41,49 +51,133 @@ def _calc_buy_unit(total_balance: float) -> int:
     return max(math.floor(total_balance * POSITION_SIZE_PCT), MIN_BUY_UNIT)
 
 
+def compute_indicators(ohlcv, bar_close: int = None):
+    """
+    REST OHLCV(list) → (c, h, l, rsi, ema20, ema120, atr). 계산 전용 (I/O 없음).
+    IndicatorExecutor(thread/process 풀)에서 실행되므로 모듈 최상위 함수로 유지.
+    """
+    return compute_indicators_batch([ohlcv], bar_close)[0]
+
+
+def compute_indicators_batch(ohlcvs, bar_close: int = None) -> list:
+    """
+    심볼별 REST OHLCV(list) 리스트 → 심볼별 compute_indicators 결과 리스트.
+    (심볼 × 봉) 행렬로 쌓아 EMA20/EMA120/RSI/ATR을 유니버스 전체에 대해 한 번에 계산.
+    RSI는 module_rsi.calc_rsi / StreamingRsi와 같은 정의 (평균 손실 0 → 100).
+    """
+    rows = [np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6) for ohlcv in ohlcvs]
+    if bar_close is not None:
+        rows = [r[r[:, 0] < bar_close] for r in rows]
+    high = stack_aligned([r[:, 2] for r in rows])
+    low = stack_aligned([r[:, 3] for r in rows])
+    close = stack_aligned([r[:, 4] for r in rows])
+    ema20 = calc_ema_series(close, EMA_MEDIUM)
+    ema120 = calc_ema_series(close, EMA_SLOW)
+    rsi = calc_rsi_series(close, RSI_PERIOD, zero_loss_nan=False)
+    atr = calc_atr_series(high, low, close, ATR_PERIOD)
+    return [
+        (
+            float(close[i, -1]), float(high[i, -1]), float(low[i, -1]),
+            float(rsi[i, -1]), ema20[i], ema120[i], float(atr[i, -1]),
+        )
+        for i in range(len(rows))
+    ]
+
+
+async def prepare_indicators(strategies, bar_close: int = None, executor=None):
+    """
+    봉 마감 진입 틱 직전 호출: 캔들 피드가 준비되지 않은(REST 경로) 심볼들의 OHLCV를 동시에 조회해
+    compute_indicators_batch 1회로 계산 → 각 전략의 같은 bar_close run_once가 그대로 사용.
+    조회에 실패한 심볼은 run_once에서 기존대로 단독 조회.
+    """
+    targets = [s for s in strategies if s.candles is None or not s.candles.ready]
+    if not targets:
+        return
+    results = await asyncio.gather(
+        *(s.exchange.fetch_ohlcv(s.symbol, timeframe=s.timeframe, limit=200) for s in targets),
+        return_exceptions=True,
+    )
+    fetched = [(s, ohlcv) for s, ohlcv in zip(targets, results) if not isinstance(ohlcv, Exception)]
+    if not fetched:
+        return
+    ohlcvs = [ohlcv for _, ohlcv in fetched]
+    if executor is not None:
+        batch = await executor.submit(compute_indicators_batch, ohlcvs, bar_close)
+    else:
+        batch = compute_indicators_batch(ohlcvs, bar_close)
+    for (strategy, _), indicators in zip(fetched, batch):
+        strategy.prepared = (bar_close, indicators)
+
+
 class TrailingAtrStrategy:
-    def __init__(self, exchange, symbol, leverage=LEVERAGE, timeframe=TIMEFRAME):
+    def __init__(self, exchange, symbol, leverage=LEVERAGE, timeframe=TIMEFRAME,
+                 account=None, candles=None, stop_engine=None, native_trailing=NATIVE_TRAILING,
+                 executor=None, cache=None):
         self.exchange = exchange
         self.symbol = symbol
+        self.account = account  # AccountService (없으면 심볼별 직접 조회)
+        self.candles = candles  # KlineStream | RestCandleFeed (없으면 매 틱 200봉 REST 조회)
+        self.stop_engine = stop_engine  # StopEngine (거래소 SL 없는 구간 실시간 감시)
+        self.native_trailing = native_trailing
+        self.executor = executor  # IndicatorExecutor (지표 계산을 이벤트 루프 밖에서 실행)
+        self.cache = cache  # IndicatorCache (REST 경로에서 마감 봉 구간 지표 재사용, 전략 간 공유)
+        self.prepared = None  # (bar_close, 지표) - prepare_indicators()가 유니버스 일괄 계산해 둔 값
+        self.orders = OrderManager(exchange, symbol, account)  # 미체결 주문 추적 / ID 취소 / 배치 주문
         self.leverage = leverage
         self.timeframe = timeframe
+        self.lock = asyncio.Lock()  # run_once 동시 실행 방지 (틱 루프 + 스트림)
+        self.changed = asyncio.Event()  # 유저 데이터 스트림 이벤트 도착 (체결/취소/포지션 변화)
+        # 캔들 피드 사용 시 증분 지표 (봉당 O(1), 피드 없으면 pandas로 전체 재계산)
+        self.indicators = IndicatorEngine(
+            ema20=lambda: StreamingEma(EMA_MEDIUM, history=SLOPE_PERIOD + 1),
+            ema120=lambda: StreamingEma(EMA_SLOW, history=SLOPE_PERIOD + 1),
+            rsi=lambda: StreamingRsi(RSI_PERIOD),
+            atr=lambda: StreamingAtr(ATR_PERIOD),
+        )
         self._reset_state()
 
-    async def setup(self):
-        await self.exchange.cancel_all_orders(symbol=self.symbol)
-        await self.exchange.set_leverage(self.leverage, self.symbol)
-        await self.exchange.set_margin_mode("isolated", self.symbol)
+    async def setup(self, current: dict = None):
+        """
+        current: fetch_leverages() 결과 중 이 심볼 항목 (longLeverage / marginMode)
+        → 이미 원하는 값이면 set_leverage / set_margin_mode 생략 (없으면 항상 설정)
+        """
+        current = current or {}
+
+        async def clean_and_set_margin():
+            await self.orders.sync()
+            await self.orders.cancel_all()  # 미체결 주문이 있으면 마진 모드 변경 불가(-4047)
+            if current.get("marginMode") != MARGIN_MODE:
+                await self.exchange.set_margin_mode(MARGIN_MODE, self.symbol)
+
+        async def set_leverage():
+            if current.get("longLeverage") != self.leverage:
+                await self.exchange.set_leverage(self.leverage, self.symbol)
+
+        await asyncio.gather(clean_and_set_margin(), set_leverage())
         logging.info(f"[{self.symbol}] Setup complete - Leverage: {self.leverage}x, Timeframe: {self.timeframe}")
 
     # =========================================================
     #  run_once  (백테스트 for-loop 1회 반복과 동일)
     # =========================================================
-    async def run_once(self):
+    async def run_once(self, snapshot: AccountSnapshot = None, allow_entry: bool = True,
+                       bar_close: int = None):
+        """
+        allow_entry=False: 포지션 관리만 (빠른 주기 체크용)
+        bar_close: 봉 마감 시각(ms) - 주어지면 이 시각 이전에 마감된 봉까지만으로 판단 (백테스트와 동일)
+        """
         try:
             # --- 데이터 수집 ---
-            bal = await self.exchange.fetch_balance()
-            total_balance = bal["USDT"]["total"]
-            avbl = bal["USDT"]["free"]
+            if snapshot is None:
+                snapshot = await self._load_snapshot()
+            total_balance = snapshot.total_balance
+            avbl = snapshot.free_balance
             buy_unit = _calc_buy_unit(total_balance)
 
-            ohlcv = await self.exchange.fetch_ohlcv(
-                self.symbol, timeframe=self.timeframe, limit=200
-            )
-            df = pd.DataFrame(
-                ohlcv, columns=["timestamp", "open", "high", "low", "close", "volume"]
-            )
-            c = float(df["close"].iloc[-1])
-            h = float(df["high"].iloc[-1])
-            l = float(df["low"].iloc[-1])
-            rsi = calc_rsi(df, RSI_PERIOD)
-            ema20 = calc_ema(df["close"], EMA_MEDIUM)
-            ema120 = calc_ema(df["close"], EMA_SLOW)
-            atr = calc_atr(df, ATR_PERIOD)
+            c, h, l, rsi, ema20, ema120, atr = await self._calc_indicators(bar_close)
             if atr <= 0:
                 atr = c * 0.01
 
-            positions = await self.exchange.fetch_positions(symbols=[self.symbol])
-            pos = positions[0] if positions and positions[0]["contracts"] > 0 else None
+            pos = await self._get_position(snapshot)
 
             # --- 포지션 있으면 → 관리 (백테스트 순서 그대로) ---
             if pos:
@@ -92,11 +186,14 @@ class TrailingAtrStrategy:
 
             # --- 포지션 없으면 → 잔여 주문 정리 후 진입 판단 ---
             if self.entry_price is not None:
-                # 이전에 포지션이 있었는데 사라짐 → 거래소 잔여 주문 정리
-                await self.exchange.cancel_all_orders(symbol=self.symbol)
-                logging.info(f"[{self.symbol}] Position gone → cleaned up stale orders")
+                # 이전에 포지션이 있었는데 사라짐 → 거래소 잔여 주문 정리 (남은 주문이 있을 때만)
+                if await self.orders.cancel_all():
+                    logging.info(f"[{self.symbol}] Position gone → cleaned up stale orders")
             self._reset_state()
 
+            if not allow_entry:
+                return
+
             if avbl < buy_unit:
                 logging.debug(f"[{self.symbol}] Insufficient balance: {avbl:.2f} < {buy_unit}")
                 return
@@ -116,14 +213,150 @@ class TrailingAtrStrategy:
         except Exception as e:
             logging.error(f"[{self.symbol}] Error: {type(e).__name__}: {e}")
 
+    # =========================================================
+    #  데이터 조회 (공유 서비스/스트림 없으면 이 심볼만 직접 조회)
+    # =========================================================
+    async def _load_snapshot(self) -> AccountSnapshot:
+        if self.account is not None:
+            return await self.account.get()
+        bal = await self.exchange.fetch_balance()
+        positions = await self.exchange.fetch_positions(symbols=[self.symbol])
+        return AccountSnapshot.from_raw(bal, positions)
+
+    async def _calc_indicators(self, bar_close: int = None):
+        """
+        (c, h, l, rsi, ema20, ema120, atr) 반환. ema20/ema120은 [-1 - SLOPE_PERIOD]까지 인덱싱 가능한 시퀀스.
+        캔들 피드(스트림/델타 REST)가 준비돼 있으면 증분 지표,
+        아니면 prepare_indicators()의 일괄 계산 결과, 그것도 없으면 REST 200봉 조회 후 계산
+        (IndicatorCache가 있으면 마감 봉 구간은 캐시 재사용).
+        bar_close가 주어지면 진행 중인 봉(timestamp >= bar_close)은 제외.
+        """
+        if self.candles is not None:
+            await self.candles.update()
+            if self.candles.ready:
+                # 엔진에는 마감 봉만 반영 (관리 틱/진입 틱이 번갈아 와도 이어 붙이기만 함)
+                rows = self.candles.buffer.view()
+                if bar_close is not None:
+                    rows = rows[:int(np.searchsorted(rows[:, 0], bar_close))]
+                    self.indicators.sync(rows)
+                    ind = self.indicators
+                    bar = rows[-1]
+                    return (
+                        float(bar[4]), float(bar[2]), float(bar[3]),
+                        ind["rsi"].value, ind["ema20"].values, ind["ema120"].values, ind["atr"].value,
+                    )
+                # 진행 중인 봉(마지막 행)은 마감 봉 상태 위에 peek으로만 적용
+                self.indicators.sync(rows[:-1])
+                bar = rows[-1]
+                values = self.indicators.peek(bar)
+                return (
+                    float(bar[4]), float(bar[2]), float(bar[3]),
+                    values["rsi"][-1], values["ema20"], values["ema120"], values["atr"][-1],
+                )
+
+        prepared, self.prepared = self.prepared, None
+        if prepared is not None and prepared[0] == bar_close:
+            return prepared[1]
+
+        ohlcv = await self.exchange.fetch_ohlcv(
+            self.symbol, timeframe=self.timeframe, limit=200
+        )
+        if self.cache is not None:
+            return await self._cached_indicators(ohlcv, bar_close)
+        if self.executor is not None:
+            return await self.executor.submit(compute_indicators, ohlcv, bar_close)
+        return compute_indicators(ohlcv, bar_close)
+
+    async def _cached_indicators(self, ohlcv, bar_close: int = None):
+        """
+        IndicatorCache 경로: 마지막 마감 봉까지의 지표 상태는 캐시에서 재사용하고 진행 중인 봉만 새로 적용.
+        미스난 지표의 마감 봉 구간 계산은 IndicatorExecutor에서 한 번에 실행 후 캐시에 저장.
+        bar_close가 없으면 REST 응답의 마지막 봉을 진행 중인 봉으로 취급.
+        """
+        rows = ohlcv   # 캐시 적중 시에는 마지막 1~2개 행만 읽으므로 배열 변환 없이 list 그대로 사용
+        forming = bar_close is None
+        if not forming:
+            end = len(rows)
+            while end and rows[end - 1][0] >= bar_close:
+                end -= 1
+            rows = rows[:end]
+        closed = rows[:-1] if forming else rows
+
+        specs = [
+            (StreamingRsi, (RSI_PERIOD,), 1),
+            (StreamingEma, (EMA_MEDIUM,), SLOPE_PERIOD + 1),
+            (StreamingEma, (EMA_SLOW,), SLOPE_PERIOD + 1),
+            (StreamingAtr, (ATR_PERIOD,), 1),
+        ]
+        indicators = [self.cache.lookup(self.symbol, self.timeframe, *spec, closed) for spec in specs]
+        missing = [i for i, indicator in enumerate(indicators) if indicator is None]
+        if missing:
+            build = [specs[i] for i in missing]
+            if self.executor is not None:
+                built = await self.executor.submit(build_indicators, build, closed)
+            else:
+                built = build_indicators(build, closed)
+            for i, indicator in zip(missing, built):
+                self.cache.store(self.symbol, self.timeframe, *specs[i], closed, indicator)
+                indicators[i] = indicator
+
+        rsi, ema20, ema120, atr = (
+            indicator.peek(rows[-1]) if forming else list(indicator.values) for indicator in indicators
+        )
+        return (
+            float(rows[-1][4]), float(rows[-1][2]), float(rows[-1][3]),
+            rsi[-1], ema20, ema120, atr[-1],
+        )
+
+    async def _get_position(self, snapshot: AccountSnapshot):
+        """공유 포지션 캐시에서 읽기 (주문 후 무효화된 경우에만 이 심볼 단독 재조회)"""
+        if self.account is not None:
+            return await self.account.positions.get(self.symbol)
+        return snapshot.position(self.symbol)
+
+    async def _create_order(self, order_type, *args, **kwargs):
+        """모든 주문은 여기로 → OrderManager가 미체결 주문 추적 + 포지션 캐시/스냅샷 무효화"""
+        return await self.orders.create(order_type, *args, **kwargs)
+
+    # =========================================================
+    #  유저 데이터 스트림 이벤트 (UserDataStream → 전략 상태 반영)
+    # =========================================================
+    def on_order(self, order: dict):
+        self.orders.on_order(order)
+        status = order.get("status")
+        if self.sl_order_id is not None and order.get("id") == self.sl_order_id:
+            if status == "closed":
+                logging.warning(f"[{self.symbol}] SL order filled (exchange) @ {order.get('average')}")
+                self.sl_order_id = None
+                self.sl_order_placed = False
+            elif status in ("canceled", "expired", "rejected"):
+                # 거래소에서 SL이 사라짐 → 다음 관리 시 _ensure_sl_order가 재배치
+                logging.warning(f"[{self.symbol}] SL order {status} → will restore")
+                self.sl_order_id = None
+                self.sl_order_placed = False
+        elif self.trail_order_id is not None and order.get("id") == self.trail_order_id:
+            if status == "closed":
+                logging.warning(f"[{self.symbol}] Trailing stop filled (exchange) @ {order.get('average')}")
+            elif status in ("canceled", "expired", "rejected"):
+                logging.warning(f"[{self.symbol}] Trailing stop {status} → will restore")
+            if status in ("closed", "canceled", "expired", "rejected"):
+                self.trail_order_id = None
+                self.trail_order_placed = False
+        self.changed.set()
+
+    def on_position(self, position: dict):
+        if self.entry_price is not None and (position.get("contracts") or 0) == 0:
+            logging.info(f"[{self.symbol}] Position closed (exchange event)")
+        self.changed.set()
+
     # =========================================================
     #  추세 판단 (백테스트 detect_trend 동일)
     # =========================================================
     def _detect_trend(self, price, ema20, ema120) -> str:
-        ema20_now = float(ema20.iloc[-1])
-        ema20_prev = float(ema20.iloc[-1 - SLOPE_PERIOD])
-        ema120_now = float(ema120.iloc[-1])
-        ema120_prev = float(ema120.iloc[-1 - SLOPE_PERIOD])
+        ema20_now = float(ema20[-1])
+        ema20_prev = float(ema20[-1 - SLOPE_PERIOD])
+        ema120_now = float(ema120[-1])
+        ema120_prev = float(ema120[-1 - SLOPE_PERIOD])
         slope_20 = (ema20_now - ema20_prev) / ema20_prev * 100 if ema20_prev else 0
         slope_120 = (ema120_now - ema120_prev) / ema120_prev * 100 if ema120_prev else 0
 
@@ -147,9 +380,9 @@ class TrailingAtrStrategy:
             sl_price = price + atr * INITIAL_SL_ATR_MULT
 
         # 1) 혹시 남아있는 잔여 주문 정리 후 Market 진입
-        await self.exchange.cancel_all_orders(symbol=self.symbol)
+        await self.orders.cancel_all()
         try:
-            await self.exchange.create_order(self.symbol, "market", side, amount)
+            await self._create_order("market", side, amount)
         except Exception as e:
             logging.error(f"[{self.symbol}] Entry failed: {e}")
             return
@@ -169,6 +402,7 @@ class TrailingAtrStrategy:
 
         # 3) SL 주문 (실패해도 코드 기반 SL이 관리)
         await self._place_sl_order(tp_side, amount, sl_price)
+        self._arm_stop_engine("long" if side == "buy" else "short", atr)
 
     # =========================================================
     #  포지션 관리 (4단계 - 물타기 없음)
@@ -223,16 +457,16 @@ class TrailingAtrStrategy:
             if side == "long":
                 partial_tp = entry_price * (1 + PARTIAL_TP_PCT)
                 if h >= partial_tp:
-                    await self._partial_close(side, contracts, entry_price)
+                    await self._partial_close(side, contracts, entry_price, c, atr)
                     return
             else:
                 partial_tp = entry_price * (1 - PARTIAL_TP_PCT)
                 if l <= partial_tp:
-                    await self._partial_close(side, contracts, entry_price)
+                    await self._partial_close(side, contracts, entry_price, c, atr)
                     return
 
-        # --- 4. 트레일링 스탑 체크 (백테스트 동일) ---
-        if self.trailing_active:
+        # --- 4. 트레일링 스탑 체크 (백테스트 동일, 거래소 트레일링 주문이 있으면 거래소가 처리) ---
+        if self.trailing_active and not self.trail_order_placed:
             trail_atr = atr * TRAILING_STOP_ATR_MULT
             if side == "long":
                 trail_sl = self.best_price - trail_atr
@@ -250,22 +484,41 @@ class TrailingAtrStrategy:
             )
 
         # --- SL 주문 존재 확인 & 복구 (안전장치) ---
-        await self._ensure_sl_order(side, contracts)
+        await self._ensure_sl_order(side, contracts, c, atr)
+        self._arm_stop_engine(side, atr)
 
     # =========================================================
     #  부분 익절 실행 (50% 청산 → 트레일링 모드 전환)
     # =========================================================
     async def _partial_close(self, side: str, contracts: float,
-                              entry_price: float):
+                              entry_price: float, price: float, atr: float):
+        """시장가 50% 청산 + 나머지 보호 스탑을 배치 1회로 전송 → 이전 SL은 그 뒤 ID로 취소"""
         close_side = "sell" if side == "long" else "buy"
         partial_size = contracts * 0.5
+        remaining = contracts - partial_size
+
+        stop = None
+        if self.native_trailing and self.trail_order_supported:
+            stop = {"type": "TRAILING_STOP_MARKET", "side": close_side, "amount": remaining,
+                    "params": {"callbackRate": self._callback_rate(price, atr), "reduceOnly": True}}
+        elif self.sl_order_supported:
+            stop = {"type": "STOP_MARKET", "side": close_side, "amount": remaining,
+                    "params": {"stopPrice": entry_price, "reduceOnly": True}}
 
         try:
-            await self.exchange.cancel_all_orders(symbol=self.symbol)
+            requests = [{"type": "market", "side": close_side, "amount": partial_size,
+                         "params": {"reduceOnly": True}}]
+            orders = await self.orders.create_batch(requests + ([stop] if stop else []))
+            if orders[0].get("id") is None:
+                # 시장가만 실패하고 스탑은 접수됐으면 취소 (재시도마다 스탑이 쌓이지 않도록)
+                if len(orders) > 1 and orders[1].get("id") is not None:
+                    await self.orders.cancel(orders[1]["id"])
+                raise Exception(orders[0].get("info"))
             self.sl_order_placed = False
-            await self.exchange.create_order(
-                self.symbol, "market", close_side, partial_size
-            )
+            self.sl_order_id = None
+            self._clear_trailing_order()
+            keep = self._apply_batch_stop(stop, orders[1] if len(orders) > 1 else None, atr)
+            await self.orders.cancel_all(keep=keep)
             self.partial_taken = True
             self.trailing_active = True
             self.best_price = None  # 다음 run_once에서 갱신
@@ -282,16 +535,44 @@ class TrailingAtrStrategy:
     #  전량 청산
     # =========================================================
     async def _close(self, side: str, contracts: float, reason: str):
+        """시장가 reduce-only 청산을 먼저 보내고 잔여 주문은 그 뒤 ID로 정리"""
         close_side = "sell" if side == "long" else "buy"
         try:
-            await self.exchange.cancel_all_orders(symbol=self.symbol)
+            await self._create_order("market", close_side, contracts, params={"reduceOnly": True})
+            await self.orders.cancel_all()
             self.sl_order_placed = False
-            await self.exchange.create_order(self.symbol, "market", close_side, contracts)
+            self.sl_order_id = None
+            self._clear_trailing_order()
             logging.warning(f"[{self.symbol}] CLOSED - Reason: {reason}")
             self._reset_state()
         except Exception as e:
             logging.error(f"[{self.symbol}] Close failed: {e}")
 
+    # =========================================================
+    #  인트라바 스탑 엔진 (거래소 SL로 보호되지 않을 때만 무장)
+    # =========================================================
+    def _arm_stop_engine(self, side: str, atr: float):
+        if self.stop_engine is None:
+            return
+        if self.sl_order_placed and not self.trailing_active:
+            self.stop_engine.disarm(self.symbol)  # 거래소 STOP_MARKET이 보호 중
+            return
+        # 거래소 트레일링 주문이 있으면 본전 SL만 감시
+        trailing_local = self.trailing_active and not self.trail_order_placed
+        trail_distance = atr * TRAILING_STOP_ATR_MULT if trailing_local else None
+        self.stop_engine.arm(
+            self.symbol, side, self.sl_price, trail_distance, self.best_price, self._on_stop_triggered
+        )
+
+    async def _on_stop_triggered(self, reason: str, price: float):
+        async with self.lock:
+            pos = await self._get_position(await self._load_snapshot())
+            if not pos:
+                return
+            await self._close(
+                pos["side"], float(pos["contracts"]), f"{reason} (intrabar @ {price})"
+            )
+
     # =========================================================
     #  SL 주문 배치 (STOP_MARKET 미지원 시 코드 SL로 폴백)
     # =========================================================
@@ -299,10 +580,11 @@ class TrailingAtrStrategy:
         if not self.sl_order_supported:
             return
         try:
-            await self.exchange.create_order(
-                self.symbol, "STOP_MARKET", side, amount, None,
+            order = await self._create_order(
+                "STOP_MARKET", side, amount, None,
                 params={"stopPrice": sl_price, "reduceOnly": True}
             )
+            self.sl_order_id = order.get("id")
             self.sl_order_placed = True
         except Exception as e:
             err = str(e)
@@ -320,9 +602,11 @@ class TrailingAtrStrategy:
     # =========================================================
     #  SL 주문 복구 안전장치
     # =========================================================
-    async def _ensure_sl_order(self, side: str, contracts: float):
+    async def _ensure_sl_order(self, side: str, contracts: float, price: float, atr: float):
         if self.trailing_active:
-            return  # 트레일링 모드에서는 코드로 SL 관리
+            if self.native_trailing:
+                await self._ensure_trailing_order(side, contracts, price, atr)
+            return  # 본전 SL은 코드로 관리
         if not self.sl_order_supported:
             return  # 이 심볼은 STOP_MARKET 미지원
         if self.sl_order_placed:
@@ -333,10 +617,98 @@ class TrailingAtrStrategy:
             if self.sl_order_placed:
                 logging.info(f"[{self.symbol}] SL order restored @ {self.sl_price:.4f}")
 
+    # =========================================================
+    #  거래소 트레일링 스탑 (TRAILING_STOP_MARKET, callbackRate = ATR 배수 / 가격)
+    # =========================================================
+    def _callback_rate(self, price: float, atr: float) -> float:
+        rate = atr * TRAILING_STOP_ATR_MULT / price * 100
+        return round(min(max(rate, CALLBACK_RATE_MIN), CALLBACK_RATE_MAX), 1)
+
+    def _trail_tighter(self, side: str, price: float, rate: float) -> bool:
+        """새 주문(현재가부터 추적)의 스탑이 기존 주문(best_price부터 추적)보다 타이트한지"""
+        if self.best_price is None or self.trail_rate is None:
+            return True
+        if side == "long":
+            return price * (1 - rate / 100) > self.best_price * (1 - self.trail_rate / 100)
+        return price * (1 + rate / 100) < self.best_price * (1 + self.trail_rate / 100)
+
+    async def _ensure_trailing_order(self, side: str, contracts: float, price: float, atr: float):
+        if not self.trail_order_supported:
+            return  # 코드 기반 트레일링으로 폴백
+        close_side = "sell" if side == "long" else "buy"
+        rate = self._callback_rate(price, atr)
+        old_id = None
+        if self.trail_order_placed:
+            if self.trail_atr and abs(atr - self.trail_atr) / self.trail_atr <= TRAIL_REPLACE_ATR_CHANGE:
+                return  # ATR 변화가 작으면 기존 주문 유지
+            # 새 주문의 거래소 추적 고점은 현재가부터 다시 시작 → 스탑이 더 타이트해질 때만 교체
+            if not self._trail_tighter(side, price, rate):
+                return
+            old_id = self.trail_order_id
+
+        # 새 주문을 먼저 배치 (실패하면 기존 주문이 계속 보호)
+        try:
+            order = await self._create_order(
+                "TRAILING_STOP_MARKET", close_side, contracts, None,
+                params={"callbackRate": rate, "reduceOnly": True}
+            )
+        except Exception as e:
+            if "-4120" in str(e):
+                self.trail_order_supported = False
+                logging.warning(
+                    f"[{self.symbol}] TRAILING_STOP_MARKET not supported → code-based trailing only"
+                )
+            else:
+                logging.warning(f"[{self.symbol}] Trailing stop order failed: {e}")
+            return
+        self.trail_order_id = order.get("id")
+        self.trail_order_placed = True
+        self.trail_atr = atr
+        self.trail_rate = rate
+        logging.info(f"[{self.symbol}] Trailing stop placed (exchange) | callbackRate={rate}%")
+
+        # 그 다음 이전 주문을 ID로 취소
+        if old_id is not None:
+            try:
+                await self.orders.cancel(old_id)
+            except Exception as e:
+                logging.warning(f"[{self.symbol}] Old trailing stop cancel failed: {e}")
+
+    def _apply_batch_stop(self, stop, order, atr: float) -> tuple:
+        """배치로 보낸 스탑 결과를 상태에 반영 → 취소 대상에서 제외할 주문 ID 반환"""
+        if stop is None or order is None:
+            return ()
+        if order.get("id") is None:
+            err = str(order.get("info"))
+            if "-4120" in err:
+                if stop["type"] == "STOP_MARKET":
+                    self.sl_order_supported = False
+                else:
+                    self.trail_order_supported = False
+            logging.warning(f"[{self.symbol}] {stop['type']} in batch failed: {err}")
+            return ()
+        if stop["type"] == "STOP_MARKET":
+            self.sl_order_id = order["id"]
+            self.sl_order_placed = True
+        else:
+            self.trail_order_id = order["id"]
+            self.trail_order_placed = True
+            self.trail_atr = atr
+            self.trail_rate = stop["params"]["callbackRate"]
+        return (order["id"],)
+
+    def _clear_trailing_order(self):
+        self.trail_order_placed = False
+        self.trail_order_id = None
+        self.trail_atr = None
+        self.trail_rate = None
+
     # =========================================================
     #  상태 초기화
     # =========================================================
     def _reset_state(self):
+        if self.stop_engine is not None:
+            self.stop_engine.disarm(self.symbol)
         self.entry_price = None
         self.size = None
         self.partial_taken = False
@@ -345,3 +717,6 @@ class TrailingAtrStrategy:
         self.sl_price = None
         self.sl_order_supported = True   # STOP_MARKET 지원 여부
         self.sl_order_placed = False     # SL 주문 배치 여부
+        self.sl_order_id = None          # 배치된 SL 주문 ID (유저 데이터 스트림 매칭용)
+        self.trail_order_supported = True  # TRAILING_STOP_MARKET 지원 여부
+        self._clear_trailing_order()       # 거래소 트레일링 주문 (ID / 배치 당시 ATR / callbackRate)